@@ -1,33 +1,325 @@
+import gc
+import logging
+import os
+import subprocess
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
 from PIL import Image
-from pdf2image import convert_from_path
-import easyocr
+from pdf2image import convert_from_path, pdfinfo_from_path
 import numpy as np
 
-reader = easyocr.Reader(["en", "fr"])
+from .preprocess import Preprocessed, default_config, preprocess_cached
+
+OCR_LANGS = ["en", "fr"]
+
+# PDF rasterization: 200 DPI grayscale is plenty for typed lab sheets and is a
+# fraction of the cost of colour rendering at pdf2image's defaults.
+PDF_DPI = int(os.getenv("NEURO_OCR_DPI", "200"))
+PDF_GRAYSCALE = os.getenv("NEURO_OCR_GRAYSCALE", "1") == "1"
+PDF_THREADS = int(os.getenv("NEURO_OCR_PDF_THREADS", "2"))
+
+# Digital PDFs: pages whose embedded text layer has at least this many
+# characters are returned as-is instead of being rasterized and OCR'd.
+TEXT_LAYER = os.getenv("NEURO_OCR_TEXT_LAYER", "1") == "1"
+TEXT_LAYER_MIN_CHARS = int(os.getenv("NEURO_OCR_TEXT_LAYER_MIN_CHARS", "20"))
+
+logger = logging.getLogger(__name__)
+
+
+class OcrEngine:
+    """
+    Owner of the EasyOCR reader. The model is only loaded on first use (or by
+    warm_up()), so importing OCR-dependent modules stays cheap.
+    """
+
+    def __init__(self, langs: Optional[list[str]] = None, **reader_kwargs) -> None:
+        self.langs = list(langs or OCR_LANGS)
+        self.reader_kwargs = reader_kwargs
+        self._reader = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._reader is not None
+
+    def get_reader(self):
+        """Return the reader, loading the model on first call (thread-safe)."""
+        if self._reader is None:
+            with self._lock:
+                if self._reader is None:
+                    import easyocr
+
+                    logger.info("Loading EasyOCR model (langs=%s)", self.langs)
+                    self._reader = easyocr.Reader(self.langs, **self.reader_kwargs)
+        return self._reader
+
+    def readtext(self, image):
+        return self.get_reader().readtext(image)
+
+    def readtext_batch(self, images: list) -> list:
+        """
+        OCR several pages in one batched inference call. Pages are padded with white
+        to a common size (top-left anchored, so box coordinates are unchanged).
+        """
+        arrays = [np.asarray(img) for img in images]
+        if len(arrays) == 1 or any(a.ndim != arrays[0].ndim for a in arrays):
+            return [self.readtext(a) for a in arrays]
+        height = max(a.shape[0] for a in arrays)
+        width = max(a.shape[1] for a in arrays)
+        padded = [
+            np.pad(
+                a,
+                ((0, height - a.shape[0]), (0, width - a.shape[1])) + ((0, 0),) * (a.ndim - 2),
+                constant_values=255,
+            )
+            for a in arrays
+        ]
+        return self.get_reader().readtext_batched(padded, batch_size=len(padded))
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load the model ahead of the first OCR call. With background=True the load
+        runs in a daemon thread, which is returned.
+        """
+        if not background:
+            self.get_reader()
+            return None
+
+        def _load():
+            try:
+                self.get_reader()
+            except Exception:
+                logger.exception("OCR warm-up failed")
+
+        thread = threading.Thread(target=_load, name="ocr-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def release(self) -> None:
+        """Drop the model so its memory can be reclaimed; the next call reloads it."""
+        with self._lock:
+            self._reader = None
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+_ENGINE: Optional[OcrEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine() -> OcrEngine:
+    """The process-wide OCR engine."""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = OcrEngine(OCR_LANGS)
+    return _ENGINE
+
+
+def ocr_settings() -> dict:
+    """Settings that influence OCR output (used to key cached results)."""
+    return {
+        "engine": "easyocr",
+        "langs": get_engine().langs,
+        "dpi": PDF_DPI,
+        "grayscale": PDF_GRAYSCALE,
+        "text_layer_min_chars": TEXT_LAYER_MIN_CHARS if TEXT_LAYER else None,
+        "preprocess": default_config().as_settings(),
+    }
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def iter_pdf_pages(
+    pdf_path: str,
+    dpi: int = PDF_DPI,
+    grayscale: bool = PDF_GRAYSCALE,
+    threads: int = PDF_THREADS,
+    first_page: Optional[int] = None,
+    last_page: Optional[int] = None,
+    pages: Optional[Iterable[int]] = None,
+) -> Iterator[Image.Image]:
+    """
+    Yield the pages of a PDF one at a time, in order. Up to `threads` pages are
+    rendered ahead in parallel, so only that many images are held in memory.
+    `pages` (1-based page numbers) overrides the first_page/last_page range.
+    """
+    if pages is None:
+        count = pdf_page_count(pdf_path)
+        first = max(1, first_page or 1)
+        last = min(count, last_page or count)
+        pages = range(first, last + 1)
+    page_numbers = iter(pages)
+
+    def render(page_no: int) -> Image.Image:
+        return convert_from_path(
+            pdf_path, dpi=dpi, grayscale=grayscale, first_page=page_no, last_page=page_no
+        )[0]
 
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+        pending = deque(pool.submit(render, n) for _, n in zip(range(max(1, threads)), page_numbers))
+        try:
+            while pending:
+                image = pending.popleft().result()
+                next_page = next(page_numbers, None)
+                if next_page is not None:
+                    pending.append(pool.submit(render, next_page))
+                yield image
+        finally:
+            # Caller stopped early: don't render pages nobody will read
+            for future in pending:
+                future.cancel()
 
-def pdf_to_images(pdf_path: str):
+
+def pdf_to_images(pdf_path: str, **kwargs):
     """Convert a PDF file to a list of images."""
-    images = convert_from_path(pdf_path)
+    images = list(iter_pdf_pages(pdf_path, **kwargs))
     return images
 
 
-def ocr_from_file(file_path: str) -> list[str]:
-    """Perform OCR on a file (image or PDF) and return the extracted text."""
+def iter_images(
+    file_path: str,
+    first_page: Optional[int] = None,
+    last_page: Optional[int] = None,
+    pages: Optional[Iterable[int]] = None,
+    grayscale: bool = PDF_GRAYSCALE,
+) -> Iterator:
+    """Yield the page images of a file (image or PDF), in grayscale or RGB."""
     if file_path.lower().endswith(".pdf"):
-        images = pdf_to_images(file_path)
-        if not images:
+        empty = True
+        for image in iter_pdf_pages(
+            file_path, grayscale=grayscale, first_page=first_page, last_page=last_page, pages=pages
+        ):
+            empty = False
+            yield image
+        if empty:
             raise ValueError("No images found in the PDF file.")
-    else:
-        images = [Image.open(file_path).convert("RGB")]
-
-    pages = []
-    for img in images:
-        img = np.array(img)
-        results = reader.readtext(img)
-        full_text = ""
-        for bbox, text, prob in results:
-            full_text += f"{text}\n"
-        pages.append(full_text.strip())
-
-    return pages
\ No newline at end of file
+        return
+    yield Image.open(file_path).convert("L" if grayscale else "RGB")
+
+
+def pdf_text_layer(pdf_path: str, first_page: int = 1, last_page: Optional[int] = None) -> list[str]:
+    """
+    Embedded text of each page in the range, extracted with poppler's pdftotext
+    (installed alongside pdftoppm for pdf2image). Returns [] if it cannot run.
+    """
+    args = ["pdftotext", "-enc", "UTF-8", "-f", str(first_page)]
+    if last_page is not None:
+        args += ["-l", str(last_page)]
+    try:
+        out = subprocess.run(args + [pdf_path, "-"], capture_output=True, check=True, timeout=60).stdout
+    except (OSError, subprocess.SubprocessError) as exc:
+        logger.warning("pdftotext failed for %s: %s", pdf_path, exc)
+        return []
+    # Pages are separated by form feeds; the last one is followed by one too
+    return out.decode("utf-8", errors="replace").split("\f")[:-1]
+
+
+def page_plan(file_path: str, first_page: Optional[int] = None, last_page: Optional[int] = None) -> list[tuple]:
+    """
+    One (page_no, text) pair per page in the range: text is the embedded text layer
+    when it is usable, None when the page has to be OCR'd.
+    """
+    if not file_path.lower().endswith(".pdf"):
+        return [(1, None)] if (first_page or 1) <= 1 else []
+    count = pdf_page_count(file_path)
+    first = max(1, first_page or 1)
+    last = min(count, last_page or count)
+    texts = pdf_text_layer(file_path, first, last) if TEXT_LAYER else []
+    if len(texts) != last - first + 1:
+        texts = [""] * (last - first + 1)
+    return [
+        (page_no, text.strip() if len(text.strip()) >= TEXT_LAYER_MIN_CHARS else None)
+        for page_no, text in zip(range(first, last + 1), texts)
+    ]
+
+
+def text_layer_page(text: str) -> dict:
+    return {"text": text, "boxes": [], "source": "text_layer"}
+
+
+def page_from_results(results, prepared: Optional[Preprocessed] = None) -> dict:
+    """
+    Convert EasyOCR (bbox, text, prob) results for one page into a JSON-friendly dict.
+    With `prepared`, box coordinates are mapped back to the original page.
+    """
+    to_original = prepared.to_original if prepared is not None else (lambda x, y: (x, y))
+    boxes = [
+        {
+            "bbox": [[float(v) for v in to_original(x, y)] for x, y in bbox],
+            "text": text,
+            "prob": float(prob),
+        }
+        for bbox, text, prob in results
+    ]
+    full_text = "\n".join(box["text"] for box in boxes)
+    return {"text": full_text.strip(), "boxes": boxes, "source": "ocr"}
+
+
+def assemble_pages(plan: list[tuple], ocr_pages: Iterable[dict]) -> list[dict]:
+    """Merge text-layer pages and OCR results (in page order) following a page plan."""
+    ocr_pages = iter(ocr_pages)
+    return [text_layer_page(text) if text is not None else next(ocr_pages) for _, text in plan]
+
+
+def ocr_image(image) -> dict:
+    """Preprocess one page image and OCR it."""
+    prepared = preprocess_cached(np.asarray(image))
+    return page_from_results(get_engine().readtext(prepared.image), prepared)
+
+
+def iter_ocr_pages(
+    file_path: str, first_page: Optional[int] = None, last_page: Optional[int] = None
+) -> Iterator[dict]:
+    """
+    Yield the pages of a file (image or PDF) one at a time, in the format of
+    ocr_pages_from_file. Pages are only rendered and OCR'd when the caller asks for
+    them, so a caller that stops early skips the rest of the document.
+    """
+    yield from iter_planned_pages(file_path, page_plan(file_path, first_page, last_page))
+
+
+def iter_planned_pages(file_path: str, plan: list[tuple]) -> Iterator[dict]:
+    """Yield the pages of `plan`: text-layer pages as-is, the others OCR'd on demand."""
+    to_ocr = [page_no for page_no, text in plan if text is None]
+    images = iter_images(file_path, pages=to_ocr) if to_ocr else iter(())
+    try:
+        for _, text in plan:
+            if text is not None:
+                yield text_layer_page(text)
+            else:
+                yield ocr_image(next(images))
+    finally:
+        close = getattr(images, "close", None)
+        if close is not None:
+            close()
+
+
+def ocr_pages_from_file(file_path: str, first_page: Optional[int] = None, last_page: Optional[int] = None) -> list[dict]:
+    """
+    Perform OCR on a file (image or PDF). Returns one dict per page:
+    {"text": str, "boxes": [{"bbox": [[x, y] * 4], "text": str, "prob": float}, ...],
+     "source": "text_layer" | "ocr"}
+    PDF pages with an embedded text layer skip OCR; the others are OCR'd as they
+    are rendered. first_page/last_page restrict the range.
+    """
+    return list(iter_ocr_pages(file_path, first_page, last_page))
+
+
+def ocr_planned_pages(file_path: str, plan: list[tuple]) -> list[dict]:
+    """OCR the pages of `plan` that have no text layer and merge in the others."""
+    return list(iter_planned_pages(file_path, plan))
+
+
+def ocr_from_file(file_path: str) -> list[str]:
+    """Perform OCR on a file (image or PDF) and return the extracted text."""
+    return [page["text"] for page in ocr_pages_from_file(file_path)]
@@ -0,0 +1,213 @@
+"""
+Image preprocessing between page loading and EasyOCR inference.
+
+Each step is optional and driven by PreprocessConfig:
+grayscale -> region-of-interest crop -> downscale to a target text height ->
+deskew -> binarize. The result keeps the offset, scale and rotation applied, so
+box coordinates can be mapped back to the original page. Preprocessed arrays are
+kept in a small in-memory LRU cache keyed by page content and config.
+"""
+
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import NamedTuple, Optional
+
+import numpy as np
+from PIL import Image
+
+# Named regions per lab-sheet template, as (left, top, right, bottom) fractions of the page
+ROI_TEMPLATES: dict[str, dict[str, tuple[float, float, float, float]]] = {
+    "lab_sheet": {
+        "header": (0.0, 0.0, 1.0, 0.3),
+        "prescription": (0.0, 0.15, 1.0, 0.65),
+    },
+}
+
+INK_THRESHOLD = 128  # grey level below which a pixel counts as ink
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    grayscale: bool = True
+    target_text_height: Optional[int] = None  # px; pages are only ever downscaled
+    deskew: bool = False
+    max_skew: float = 5.0  # degrees searched either way
+    binarize: bool = False
+    roi: Optional[tuple[str, str]] = None  # (template, region) in ROI_TEMPLATES
+
+    def as_settings(self) -> dict:
+        return asdict(self)
+
+
+def default_config() -> PreprocessConfig:
+    """Pipeline used by the OCR entry points (NEURO_OCR_* environment overrides)."""
+    height = os.getenv("NEURO_OCR_TEXT_HEIGHT")
+    roi = os.getenv("NEURO_OCR_ROI")  # "template:region"
+    return PreprocessConfig(
+        grayscale=os.getenv("NEURO_OCR_GRAYSCALE", "1") == "1",
+        target_text_height=int(height) if height else None,
+        deskew=os.getenv("NEURO_OCR_DESKEW", "0") == "1",
+        binarize=os.getenv("NEURO_OCR_BINARIZE", "0") == "1",
+        roi=tuple(roi.split(":", 1)) if roi else None,
+    )
+
+
+class Preprocessed(NamedTuple):
+    image: np.ndarray
+    scale: float = 1.0  # preprocessed / original size
+    offset: tuple[int, int] = (0, 0)  # (x, y) of the crop in the original page
+    angle: float = 0.0  # deskew rotation in degrees, counterclockwise about the image centre
+
+    def to_original(self, x: float, y: float) -> tuple[float, float]:
+        if self.angle:
+            # Inverse of Image.rotate(angle): rotate back about the same centre
+            cx, cy = self.image.shape[1] / 2, self.image.shape[0] / 2
+            theta = math.radians(self.angle)
+            cos, sin = math.cos(theta), math.sin(theta)
+            dx, dy = x - cx, y - cy
+            x, y = cx + dx * cos - dy * sin, cy + dx * sin + dy * cos
+        return x / self.scale + self.offset[0], y / self.scale + self.offset[1]
+
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 2:
+        return image
+    return np.asarray(Image.fromarray(image[..., :3]).convert("L"))
+
+
+def _ink_rows(gray: np.ndarray) -> np.ndarray:
+    return (gray < INK_THRESHOLD).any(axis=1)
+
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """Median height in px of the horizontal bands that contain ink (≈ text lines)."""
+    rows = _ink_rows(gray).astype(np.int8)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], rows, [0]))))
+    heights = edges[1::2] - edges[0::2]
+    if heights.size == 0:
+        return None
+    return float(np.median(heights))
+
+
+def estimate_skew(gray: np.ndarray, max_skew: float = 5.0, step: float = 0.5) -> float:
+    """
+    Angle (degrees) that best aligns text lines with the rows: the rotation whose
+    horizontal ink profile has the highest variance. Searched on a reduced copy.
+    """
+    small = Image.fromarray(gray)
+    if small.width > 800:
+        small = small.resize((800, max(1, round(small.height * 800 / small.width))))
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_skew, max_skew + step / 2, step):
+        rotated = np.asarray(small.rotate(float(angle), fillcolor=255))
+        score = float(np.var((rotated < INK_THRESHOLD).sum(axis=1)))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weights = np.cumsum(hist)
+    means = np.cumsum(hist * np.arange(256))
+    total, total_mean = weights[-1], means[-1]
+    background = weights[:-1]
+    foreground = total - background
+    valid = (background > 0) & (foreground > 0)
+    between = np.zeros(255)
+    between[valid] = (
+        (total_mean * background[valid] - means[:-1][valid] * total) ** 2
+        / (background[valid] * foreground[valid])
+    )
+    return int(np.argmax(between))
+
+
+def preprocess(image, config: PreprocessConfig) -> Preprocessed:
+    """Run the configured steps on one page image."""
+    array = np.asarray(image)
+    if array.dtype != np.uint8:
+        array = array.astype(np.uint8)
+    scale, offset, angle = 1.0, (0, 0), 0.0
+
+    needs_gray = config.grayscale or config.target_text_height or config.deskew or config.binarize
+    if needs_gray:
+        array = _to_gray(array)
+
+    if config.roi is not None:
+        template, region = config.roi
+        left, top, right, bottom = ROI_TEMPLATES[template][region]
+        h, w = array.shape[:2]
+        x0, y0, x1, y1 = int(left * w), int(top * h), int(right * w), int(bottom * h)
+        array = array[y0:y1, x0:x1]
+        offset = (x0, y0)
+
+    if config.target_text_height:
+        text_height = estimate_text_height(array)
+        if text_height and text_height > config.target_text_height:
+            scale = config.target_text_height / text_height
+            size = (max(1, round(array.shape[1] * scale)), max(1, round(array.shape[0] * scale)))
+            array = np.asarray(Image.fromarray(array).resize(size, Image.LANCZOS))
+
+    if config.deskew:
+        angle = estimate_skew(array, config.max_skew)
+        if angle:
+            array = np.asarray(Image.fromarray(array).rotate(angle, fillcolor=255))
+
+    if config.binarize:
+        array = np.where(array > otsu_threshold(array), 255, 0).astype(np.uint8)
+
+    return Preprocessed(np.ascontiguousarray(array), scale, offset, angle)
+
+
+class PreprocessCache:
+    """LRU cache of preprocessed pages, bounded by total array bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(array: np.ndarray, config: PreprocessConfig) -> tuple:
+        digest = hashlib.blake2b(np.ascontiguousarray(array).data, digest_size=16).hexdigest()
+        return digest, array.shape, config
+
+    def get_or_compute(self, image, config: PreprocessConfig) -> Preprocessed:
+        array = np.asarray(image)
+        key = self.key_for(array, config)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        result = preprocess(array, config)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = result
+                self._size += result.image.nbytes
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.image.nbytes
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_CACHE = PreprocessCache(int(os.getenv("NEURO_OCR_PREPROCESS_CACHE_MB", "64")) * 1024 * 1024)
+
+
+def preprocess_cached(image, config: Optional[PreprocessConfig] = None) -> Preprocessed:
+    """Preprocess a page through the process-wide LRU cache."""
+    return _CACHE.get_or_compute(image, config or default_config())
@@ -0,0 +1,524 @@
+"""
+Long-lived local OCR service.
+
+One process keeps a single warm EasyOCR model and serves OCR jobs from the CLI,
+the ProtoCheck GUI and the validations. Jobs wait in a bounded priority queue;
+a scheduler thread drains several jobs at once and sends their pages to the
+engine in batches, so pages from different documents share one inference call.
+
+Transport is multiprocessing.connection (a Unix socket, or a named pipe on
+Windows) carrying small dict messages:
+
+    {"op": "ocr", "path": str, "priority": int, "pages": [int] | None, "settings": {...}}
+                                                 -> {"ok": True, "pages": [...]}
+    {"op": "stats"}                              -> {"ok": True, "stats": {...}}
+    {"op": "ping"}                               -> {"ok": True}
+
+An OCR request carries the client's OCR settings (service_settings()), the ones
+its cache keys results with; the service refuses a request whose settings differ
+from its own rather than return pages produced with other settings.
+
+Connections are authenticated with a per-user key (NEURO_OCR_AUTHKEY, else a
+random key kept in a 0600 file), and the default socket lives in a per-user 0700
+directory: only the user running the service can talk to it.
+
+Run it with `python -m neuro_core.neuro_ai.ocr.service`. The model is loaded
+with downloads disabled, so the service never reaches the network.
+"""
+
+import argparse
+import getpass
+import itertools
+import logging
+import os
+import queue
+import secrets
+import stat
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+from typing import Callable, Iterable, Iterator, Optional
+
+import numpy as np
+
+from .main import (
+    OCR_LANGS,
+    OcrEngine,
+    ocr_settings,
+    assemble_pages,
+    iter_images,
+    iter_planned_pages,
+    ocr_planned_pages,
+    page_from_results,
+    page_plan,
+    text_layer_page,
+)
+from .preprocess import PreprocessConfig, default_config, preprocess_cached
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0  # interactive (GUI)
+PRIORITY_NORMAL = 5  # validations
+PRIORITY_LOW = 9  # bulk CLI runs
+
+DEFAULT_BATCH_SIZE = int(os.getenv("NEURO_OCR_BATCH_SIZE", "8"))
+DEFAULT_MAX_QUEUE = int(os.getenv("NEURO_OCR_MAX_QUEUE", "256"))
+
+# ocr_settings() entries that the service applies (the text layer is read by the client)
+SERVICE_SETTINGS = ("engine", "langs", "dpi", "grayscale", "preprocess")
+
+
+class OcrSettingsMismatch(RuntimeError):
+    """The service OCRs with other settings than the client's."""
+
+
+def service_settings(settings: Optional[dict] = None) -> dict:
+    """The part of ocr_settings() a service request must agree on."""
+    settings = ocr_settings() if settings is None else settings
+    return {key: settings.get(key) for key in SERVICE_SETTINGS}
+
+
+def _check_private(path: str, directory: bool) -> None:
+    """Refuse a path another user owns or can access (e.g. planted in a shared temp dir)."""
+    if sys.platform == "win32":
+        return
+    info = os.lstat(path)
+    kind_ok = stat.S_ISDIR(info.st_mode) if directory else stat.S_ISREG(info.st_mode)
+    if not kind_ok or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a {'directory' if directory else 'file'} "
+                              f"owned and only accessible by the current user")
+
+
+def _runtime_path() -> str:
+    base = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"neuro-ocr-{getpass.getuser()}")
+
+
+def runtime_dir() -> str:
+    """Per-user 0700 directory holding the service socket and key (created if missing)."""
+    path = _runtime_path()
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    _check_private(path, directory=True)
+    return path
+
+
+def load_authkey() -> bytes:
+    """
+    Connection key: NEURO_OCR_AUTHKEY, else a random key created on first use in
+    the per-user runtime directory (0600), shared by the service and its clients.
+    """
+    env = os.getenv("NEURO_OCR_AUTHKEY")
+    if env:
+        return env.encode("utf-8")
+    path = os.path.join(runtime_dir(), "authkey")
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, path)  # never replaces a key another process created meanwhile
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+    _check_private(path, directory=False)
+    with open(path, "rb") as f:
+        return f.read().strip()
+
+
+def default_address() -> str:
+    """
+    Service address: NEURO_OCR_SERVICE, else a per-user socket / pipe name. Nothing
+    is created; the server creates the runtime directory.
+    """
+    env = os.getenv("NEURO_OCR_SERVICE")
+    if env:
+        return env
+    if sys.platform == "win32":
+        return rf"\\.\pipe\neuro-ocr-{getpass.getuser()}"
+    return os.path.join(_runtime_path(), "ocr.sock")
+
+
+def _service_exists(address: str) -> bool:
+    """Whether something listens at address (a Unix socket path or a Windows pipe name)."""
+    if sys.platform == "win32":
+        import _winapi
+
+        try:
+            _winapi.WaitNamedPipe(address, 1)
+        except OSError as exc:
+            return getattr(exc, "winerror", None) != 2  # busy (timeout) still exists
+        return True
+    return os.path.exists(address)
+
+
+def _remove_stale_socket(address: str) -> None:
+    """Unlink a socket left by a previous run of this user; refuse anything else."""
+    try:
+        info = os.lstat(address)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise FileExistsError(f"{address} exists and is not a socket owned by the current user")
+    os.unlink(address)
+
+
+class _Job:
+    __slots__ = ("path", "pages", "future", "submitted_at")
+
+    def __init__(self, path: str, pages: Optional[list[int]] = None) -> None:
+        self.path = path
+        self.pages = pages
+        self.future: Future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+class OcrWorker:
+    """
+    In-process OCR scheduler: a bounded priority queue plus one thread that batches
+    pages across queued documents. Lower priority values are served first; jobs of
+    equal priority are served in submission order.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[OcrEngine] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        batch_window: float = 0.02,
+        loader: Callable[[str], Iterable] = iter_images,
+        preprocess: Optional[PreprocessConfig] = None,
+    ) -> None:
+        self.engine = engine or OcrEngine(OCR_LANGS)
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.loader = loader
+        self.preprocess = preprocess or default_config()
+        self._queue: queue.PriorityQueue = queue.PriorityQueue(maxsize=max_queue)
+        self._seq = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {"jobs_submitted": 0, "jobs_done": 0, "jobs_failed": 0,
+                       "pages": 0, "batches": 0, "busy_seconds": 0.0}
+        self._started_at = time.perf_counter()
+
+    def start(self) -> "OcrWorker":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ocr-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(
+        self,
+        path: str,
+        priority: int = PRIORITY_NORMAL,
+        timeout: Optional[float] = None,
+        pages: Optional[list[int]] = None,
+    ) -> Future:
+        """
+        Queue a file for OCR and return a Future resolving to its pages (only the
+        given 1-based PDF pages when `pages` is set).
+        Raises queue.Full if the queue stays full for `timeout` seconds.
+        """
+        job = _Job(str(path), pages)
+        self._queue.put((priority, next(self._seq), job), timeout=timeout)
+        with self._stats_lock:
+            self._stats["jobs_submitted"] += 1
+        return job.future
+
+    def ocr_pages(self, path: str, priority: int = PRIORITY_NORMAL, pages: Optional[list[int]] = None) -> list[dict]:
+        return self.submit(path, priority, pages=pages).result()
+
+    def settings(self) -> dict:
+        """The service_settings() this worker OCRs with (its engine and preprocessing)."""
+        return service_settings({
+            **ocr_settings(),
+            "langs": list(getattr(self.engine, "langs", OCR_LANGS)),
+            "preprocess": self.preprocess.as_settings(),
+        })
+
+    def _next_jobs(self) -> list[_Job]:
+        try:
+            _, _, job = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        jobs = [job]
+        deadline = time.monotonic() + self.batch_window
+        while len(jobs) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                _, _, job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            jobs.append(job)
+        return jobs
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            jobs = self._next_jobs()
+            if jobs:
+                self._process(jobs)
+
+    def _process(self, jobs: list[_Job]) -> None:
+        started = time.perf_counter()
+        # (job, page index, preprocessed image) for every page of every loadable job
+        pages = []
+        results: dict[int, list] = {}
+        live = []
+        for job in jobs:
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                images = list(self.loader(job.path, pages=job.pages))
+            except Exception as exc:
+                self._fail(job, exc)
+                continue
+            live.append(job)
+            results[id(job)] = [None] * len(images)
+            pages.extend((job, i, preprocess_cached(np.asarray(img), self.preprocess)) for i, img in enumerate(images))
+
+        failed = set()
+        batches = 0
+        for start in range(0, len(pages), self.batch_size):
+            chunk = [p for p in pages[start:start + self.batch_size] if id(p[0]) not in failed]
+            if not chunk:
+                continue
+            try:
+                outputs = self.engine.readtext_batch([prepared.image for _, _, prepared in chunk])
+            except Exception as exc:
+                for job, _, _ in chunk:
+                    if id(job) not in failed:
+                        failed.add(id(job))
+                        self._fail(job, exc)
+                continue
+            batches += 1
+            for (job, i, prepared), output in zip(chunk, outputs):
+                results[id(job)][i] = page_from_results(output, prepared)
+
+        done = 0
+        for job in live:
+            if id(job) not in failed:
+                job.future.set_result(results[id(job)])
+                done += 1
+        with self._stats_lock:
+            self._stats["jobs_done"] += done
+            self._stats["pages"] += sum(1 for job, _, _ in pages if id(job) not in failed)
+            self._stats["batches"] += batches
+            self._stats["busy_seconds"] += time.perf_counter() - started
+
+    def _fail(self, job: _Job, exc: Exception) -> None:
+        logger.warning("OCR job failed for %s: %s", job.path, exc)
+        job.future.set_exception(exc)
+        with self._stats_lock:
+            self._stats["jobs_failed"] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        busy = stats["busy_seconds"]
+        stats["pages_per_second"] = stats["pages"] / busy if busy else 0.0
+        stats["pages_per_batch"] = stats["pages"] / stats["batches"] if stats["batches"] else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        stats["uptime_seconds"] = time.perf_counter() - self._started_at
+        stats["model_loaded"] = self.engine.loaded
+        return stats
+
+
+class OcrServer:
+    """Serves an OcrWorker over multiprocessing.connection; one thread per client."""
+
+    def __init__(self, worker: OcrWorker, address: Optional[str] = None, authkey: Optional[bytes] = None) -> None:
+        self.worker = worker
+        if address is None:
+            runtime_dir()
+        self.address = address or default_address()
+        self.settings = worker.settings()
+        if sys.platform != "win32":
+            _remove_stale_socket(self.address)
+        self._listener = Listener(self.address, authkey=authkey or load_authkey())
+        self._closed = threading.Event()
+
+    def serve_forever(self) -> None:
+        self.worker.start()
+        logger.info("OCR service listening on %s", self.address)
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closed.is_set():
+                    break
+                logger.exception("OCR service: accept failed")
+                continue
+            except Exception:
+                logger.exception("OCR service: rejected connection")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn) -> None:
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                conn.send(self._dispatch(request))
+
+    def _dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        try:
+            if op == "ocr":
+                if request.get("settings") != self.settings:
+                    return {"ok": False, "settings_mismatch": True,
+                            "error": f"OCR settings differ: service {self.settings}, request {request.get('settings')}"}
+                pages = self.worker.ocr_pages(
+                    request["path"], request.get("priority", PRIORITY_NORMAL), request.get("pages")
+                )
+                return {"ok": True, "pages": pages}
+            if op == "stats":
+                return {"ok": True, "stats": self.worker.stats()}
+            if op == "ping":
+                return {"ok": True}
+            return {"ok": False, "error": f"unknown op: {op!r}"}
+        except Exception as exc:
+            return {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+
+    def close(self) -> None:
+        self._closed.set()
+        self._listener.close()
+        self.worker.stop()
+
+
+class OcrClient:
+    """Connection to a running OCR service. Not thread-safe; use one per thread."""
+
+    def __init__(self, address: Optional[str] = None, authkey: Optional[bytes] = None) -> None:
+        address = address or default_address()
+        # Checked first: with no service running, connecting must not create the
+        # runtime directory and key file as load_authkey would
+        if not _service_exists(address):
+            raise FileNotFoundError(f"No OCR service at {address}")
+        self._conn = Client(address, authkey=authkey or load_authkey())
+
+    def _call(self, request: dict) -> dict:
+        self._conn.send(request)
+        reply = self._conn.recv()
+        if not reply.get("ok"):
+            error = OcrSettingsMismatch if reply.get("settings_mismatch") else RuntimeError
+            raise error(f"OCR service error: {reply.get('error')}")
+        return reply
+
+    def ocr_pages(
+        self,
+        path: str,
+        priority: int = PRIORITY_NORMAL,
+        pages: Optional[list[int]] = None,
+        settings: Optional[dict] = None,
+    ) -> list[dict]:
+        """
+        OCR a file on the service. settings (default: this process's service_settings())
+        must match the service's, else OcrSettingsMismatch is raised.
+        """
+        request = {
+            "op": "ocr", "path": os.path.abspath(path), "priority": priority, "pages": pages,
+            "settings": service_settings() if settings is None else settings,
+        }
+        return self._call(request)["pages"]
+
+    def stats(self) -> dict:
+        return self._call({"op": "stats"})["stats"]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "OcrClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def ocr_pages_via_service(path: str, priority: int = PRIORITY_NORMAL, address: Optional[str] = None) -> list[dict]:
+    """
+    OCR through the service when one is running, else in this process. PDF pages
+    with an embedded text layer are read locally and never sent to the service.
+    """
+    plan = page_plan(path)
+    to_ocr = [page_no for page_no, text in plan if text is None]
+    if not to_ocr:
+        return assemble_pages(plan, [])
+    try:
+        client = OcrClient(address)
+    except (OSError, EOFError):
+        return ocr_planned_pages(path, plan)
+    with client:
+        try:
+            return assemble_pages(plan, client.ocr_pages(path, priority, pages=to_ocr))
+        except OcrSettingsMismatch as exc:
+            logger.warning("%s; OCR runs in-process", exc)
+    return ocr_planned_pages(path, plan)
+
+
+def iter_ocr_pages_via_service(
+    path: str, first_page: Optional[int] = None, priority: int = PRIORITY_NORMAL, address: Optional[str] = None
+) -> Iterator[dict]:
+    """
+    Lazy counterpart of ocr_pages_via_service: pages are OCR'd one request at a
+    time, so a caller that stops early leaves the rest of the document untouched.
+    """
+    plan = page_plan(path, first_page)
+    if all(text is not None for _, text in plan):
+        yield from assemble_pages(plan, [])
+        return
+    try:
+        client = OcrClient(address)
+    except (OSError, EOFError):
+        yield from iter_planned_pages(path, plan)
+        return
+    with client:
+        for done, (page_no, text) in enumerate(plan):
+            if text is not None:
+                yield text_layer_page(text)
+                continue
+            try:
+                page = client.ocr_pages(path, priority, pages=[page_no])[0]
+            except OcrSettingsMismatch as exc:
+                logger.warning("%s; OCR runs in-process", exc)
+                yield from iter_planned_pages(path, plan[done:])
+                return
+            yield page
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the local OCR service (one warm EasyOCR model).")
+    parser.add_argument("--address", default=None, help="Socket path / pipe name (default: %(default)s).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Pages per inference call.")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="Maximum queued jobs.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    engine = OcrEngine(OCR_LANGS, download_enabled=False)
+    engine.warm_up(background=False)
+    worker = OcrWorker(engine, batch_size=args.batch_size, max_queue=args.max_queue)
+    server = OcrServer(worker, args.address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# neuro_core/neuropacks/health/protocheck/checks/feature1_incremental.py
+
+import hashlib
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import (
+    RESULT_COLUMNS,
+    _iter_feature1_records,
+)
+from neuro_core.neuropacks.health.protocheck.checks.findings_store import CHECK_COLUMN, record_findings
+from neuro_core.neuropacks.health.protocheck.core.constants import DATE_FMT, DOC_TYPE_LAB_SHEET
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+CHECK_NAME = "feature1_lab_no_billing"
+
+# Patients changed in any source table since the stored watermark are dirty
+# (see schema.mark_patient_changes and schema.CHANGE_TRIGGERS)
+CHANGES_TABLE = "patient_changes"
+
+# Incohérent rows are recorded in the findings table under CHECK_NAME, keyed by the
+# lab sheet and CCAM code rows they were evaluated for
+KEY_FIELDS = ("patient_id", "sheet_rowid", "code_rowid")
+
+_FINDINGS_COLUMNS = {
+    "sheet_date": "Date",
+    "patient": "Patient",
+    "quote_material": "Matériau Devis",
+    "lab_material": "Matériau Fiche LABO",
+    "controlled": "Contrôlé",
+    "validated": "Validé",
+    "status": "Statut",
+}
+
+
+def _open(conn_or_path):
+    if isinstance(conn_or_path, (str, Path)):
+        return sqlite3.connect(str(conn_or_path)), True
+    return conn_or_path, False
+
+
+def _ccam_digest(conn: sqlite3.Connection) -> str:
+    """Digest of the CCAM reference; any change to it invalidates every finding."""
+    digest = hashlib.sha256()
+    for row in conn.execute("SELECT rowid, code, label FROM ccam_prosthetics ORDER BY rowid"):
+        digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _stored_watermarks(conn: sqlite3.Connection) -> dict:
+    rows = conn.execute(
+        "SELECT table_name, watermark FROM check_watermarks WHERE check_name = ?", (CHECK_NAME,)
+    )
+    return dict(rows.fetchall())
+
+
+def _current_watermarks(conn: sqlite3.Connection) -> dict:
+    (latest,) = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {CHANGES_TABLE}").fetchone()
+    return {CHANGES_TABLE: str(latest), "ccam_prosthetics": _ccam_digest(conn)}
+
+
+def _record_findings(conn: sqlite3.Connection, patients: Optional[list[str]]) -> dict:
+    """
+    Store the Incohérent rows of the re-evaluated patients (all patients when None)
+    as findings; only those patients' stored findings can be resolved.
+    """
+    scope = "AND patient_id IN (SELECT patient_id FROM temp.feature1_dirty)" if patients is not None else ""
+    df = pd.read_sql_query(
+        f"""
+        SELECT patient_id, sheet_rowid, code_rowid, sheet_date, patient, quote_material, lab_material, validated
+        FROM feature1_findings
+        WHERE status = 'Incohérent' {scope}
+        ORDER BY sheet_rowid, code_rowid
+        """,
+        conn,
+    )
+    flag = np.where(df.pop("validated") == "Supprimé", "DELETED_ACT_FOUND", "NO_INVOICE")
+    findings = df.assign(flag=flag)
+    findings.insert(0, CHECK_COLUMN, CHECK_NAME)
+    return record_findings(
+        conn, findings, checks=[CHECK_NAME], key_fields={CHECK_NAME: KEY_FIELDS}, patients=patients,
+    )
+
+
+def refresh_feature1_findings(conn_or_path, full: bool = False) -> int:
+    """
+    Bring the materialized feature1_findings table up to date and return the number
+    of patients re-evaluated.
+
+    Only patients whose scans, invoices, deleted acts or parsed lab sheet fields were
+    imported, edited or deleted since the previous refresh are recomputed (both the old
+    and the new patient of a row that moved), so the cost follows the size of the
+    latest imports rather than the full history. Rows inserted with plain SQL rather
+    than the importers are not seen (schema.mark_patient_changes). The first run, a CCAM reference
+    change, or full=True rebuild every patient. When any patient was re-evaluated,
+    the Incohérent rows are then recorded in the findings table (NO_INVOICE, or
+    DELETED_ACT_FOUND when a deleted act matched), like a ValidationSession run;
+    an incremental refresh records and resolves the re-evaluated patients only.
+    """
+    conn, should_close = _open(conn_or_path)
+    try:
+        previous = _stored_watermarks(conn)
+        current = _current_watermarks(conn)
+        rebuild = (
+            full
+            or previous.get("ccam_prosthetics") != current["ccam_prosthetics"]
+            or CHANGES_TABLE not in previous  # first run, or watermarks of an older version
+        )
+
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS temp.feature1_dirty")
+            conn.execute("CREATE TEMP TABLE feature1_dirty (patient_id TEXT PRIMARY KEY)")
+            if rebuild:
+                conn.execute("DELETE FROM feature1_findings")
+                conn.execute(
+                    "INSERT OR IGNORE INTO temp.feature1_dirty "
+                    "SELECT patient_id FROM scans WHERE doc_type = ? AND patient_id IS NOT NULL",
+                    (DOC_TYPE_LAB_SHEET,),
+                )
+                sheet_filter = "1"
+            else:
+                conn.execute(
+                    f"INSERT OR IGNORE INTO temp.feature1_dirty SELECT patient_id FROM {CHANGES_TABLE} WHERE id > ?",
+                    (int(previous[CHANGES_TABLE]),),
+                )
+                conn.execute(
+                    "DELETE FROM feature1_findings "
+                    "WHERE patient_id IN (SELECT patient_id FROM temp.feature1_dirty)"
+                )
+                sheet_filter = "s.patient_id IN (SELECT patient_id FROM temp.feature1_dirty)"
+
+            (evaluated,) = conn.execute("SELECT COUNT(*) FROM temp.feature1_dirty").fetchone()
+            if evaluated or rebuild:
+                records = _iter_feature1_records(conn, sheet_filter, {})
+                conn.executemany(
+                    """
+                    INSERT INTO feature1_findings (
+                        patient_id, sheet_rowid, code_rowid, invoice_rowid, sheet_date,
+                        patient, quote_material, lab_material, controlled, validated, status
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        (patient_id, sheet_ord, code_ord, inv_ord, row["Date"], row["Patient"],
+                         row["Matériau Devis"], row["Matériau Fiche LABO"], row["Contrôlé"],
+                         row["Validé"], row["Statut"])
+                        for patient_id, sheet_ord, code_ord, inv_ord, row in records
+                    ),
+                )
+
+            now = datetime.now().isoformat(timespec="seconds")
+            conn.execute("DELETE FROM check_watermarks WHERE check_name = ?", (CHECK_NAME,))
+            conn.executemany(
+                """
+                INSERT INTO check_watermarks (check_name, table_name, watermark, updated_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                [(CHECK_NAME, table, mark, now) for table, mark in current.items()],
+            )
+
+        if evaluated or rebuild:
+            dirty = None if rebuild else [r[0] for r in conn.execute("SELECT patient_id FROM temp.feature1_dirty")]
+            _record_findings(conn, dirty)
+        conn.execute("DROP TABLE temp.feature1_dirty")
+        LOGGER.info(
+            "Feature 1 findings refreshed (%s): %d patients re-evaluated",
+            "full rebuild" if rebuild else "incremental",
+            evaluated,
+        )
+        return evaluated
+    finally:
+        if should_close:
+            conn.close()
+
+
+def load_feature1_findings(conn_or_path, start_date, end_date) -> pd.DataFrame:
+    """
+    Read stored Feature 1 findings for lab sheets dated within [start_date, end_date],
+    in the same shape and order as run_feature1_lab_no_billing().
+    """
+    conn, should_close = _open(conn_or_path)
+    try:
+        df = pd.read_sql_query(
+            f"""
+            SELECT {", ".join(_FINDINGS_COLUMNS)}
+            FROM feature1_findings
+            WHERE sheet_date BETWEEN ? AND ?
+            ORDER BY sheet_rowid, code_rowid, invoice_rowid
+            """,
+            conn,
+            params=(
+                pd.to_datetime(start_date).strftime(DATE_FMT),
+                pd.to_datetime(end_date).strftime(DATE_FMT),
+            ),
+        )
+        return df.rename(columns=_FINDINGS_COLUMNS)[RESULT_COLUMNS]
+    finally:
+        if should_close:
+            conn.close()
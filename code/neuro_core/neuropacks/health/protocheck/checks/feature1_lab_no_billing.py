@@ -1,8 +1,11 @@
 # neuro_core/neuropacks/health/protocheck/checks/feature1_lab_no_billing.py
 
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
-from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE
+from neuro_core.neuropacks.health.protocheck.checks.parallel import run_partitioned
+from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE, DATE_FMT, DOC_TYPE_LAB_SHEET
+from neuro_core.neuropacks.health.protocheck.core.invoice_index import InvoiceDateIndex
 from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
 import sqlite3
 from pathlib import Path
@@ -10,10 +13,263 @@ from pathlib import Path
 # Configurable date range tolerance in days
 INVOICE_DATE_TOLERANCE = 7
 
+# Available execution engines; "loop" is the original row-by-row reference implementation
+ENGINES = ("merge", "sql", "loop")
+
+RESULT_COLUMNS = [
+    "Patient", "Date", "Matériau Devis", "Matériau Fiche LABO", "Contrôlé", "Validé", "Statut"
+]
+
+# Serial row order: lab sheet, CCAM code, then invoice (-1: none), by table position
+ORDER_COLUMNS = ["sheet_ord", "code_ord", "inv_ord"]
+
 def _load_table(table_name: str, conn: sqlite3.Connection) -> pd.DataFrame:
     return pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
 
-def run_feature1_lab_no_billing(conn_or_path, start_date: str, end_date: str) -> pd.DataFrame:
+
+def _or_dash(values: pd.Series) -> pd.Series:
+    """Vectorized equivalent of `value or "—"` for display columns."""
+    return values.where(values.notna() & (values != ""), "—")
+
+
+def _evaluate_frames(
+    scans_df: pd.DataFrame,
+    ccam_df: pd.DataFrame,
+    invoices_df: pd.DataFrame,
+    deleted_df: pd.DataFrame,
+    fields_df: pd.DataFrame | None = None,
+    start_date=None,
+    end_date=None,
+    with_order: bool = False,
+) -> pd.DataFrame:
+    """
+    Set-based Feature 1: lab sheets x prosthetic codes, a tolerance-window join
+    against invoices (binary search over an InvoiceDateIndex), then an anti-join of
+    the unbilled pairs against deleted acts. The lab material is joined from
+    fields_df (lab_sheet_fields) on file_path.
+    Produces the same rows, in the same order, as the "loop" engine. Sheets and
+    invoices are ordered by their frame's index labels (table positions), so
+    with_order=True adds ORDER_COLUMNS that stay valid for a partition of the frames.
+    """
+    start_date = pd.to_datetime(start_date)
+    end_date = pd.to_datetime(end_date)
+
+    lab_sheets = scans_df[scans_df["doc_type"] == DOC_TYPE_LAB_SHEET]
+    sheet_dates = pd.to_datetime(lab_sheets["date"])
+    in_range = ((sheet_dates >= start_date) & (sheet_dates <= end_date)).to_numpy()
+    sheets = pd.DataFrame({
+        "patient_id": lab_sheets["patient_id"].to_numpy()[in_range],
+        "sheet_date": sheet_dates.to_numpy()[in_range],
+        "file_path": lab_sheets["file_path"].to_numpy()[in_range],
+        "sheet_ord": lab_sheets.index.to_numpy()[in_range],
+    })
+    lab_materials = pd.Series(dtype=object) if fields_df is None else (
+        fields_df.drop_duplicates(subset=["file_path"]).set_index("file_path")["material"]
+    )
+    sheets["lab_material"] = _or_dash(sheets["file_path"].map(lab_materials)).to_numpy()
+
+    codes = pd.DataFrame({
+        "code": ccam_df["code"].to_numpy(),
+        "label": ccam_df["label"].to_numpy(),
+        "code_ord": np.arange(len(ccam_df)),
+    })
+
+    columns = ORDER_COLUMNS + RESULT_COLUMNS if with_order else RESULT_COLUMNS
+    pairs = sheets.merge(codes, how="cross")
+    if pairs.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Tolerance-window join: only invoices carrying an invoice or FSE number count
+    billable = (invoices_df["invoice_no"].notna() | invoices_df["fse_no"].notna()).to_numpy()
+    invoices = invoices_df[billable]
+    inv_ords = invoices_df.index.to_numpy()[billable]
+    index = InvoiceDateIndex(invoices)
+
+    tolerance = pd.Timedelta(days=INVOICE_DATE_TOLERANCE)
+    pair_pos, inv_pos = index.join_windows(
+        pairs["patient_id"].to_numpy(),
+        pairs["code"].to_numpy(),
+        pairs["sheet_date"] - tolerance,
+        pairs["sheet_date"] + tolerance,
+    )
+    matched = pairs.iloc[pair_pos].reset_index(drop=True)
+    matched["patient_name"] = invoices["patient_name"].to_numpy()[inv_pos]
+    matched["inv_ord"] = inv_ords[inv_pos]
+
+    # Anti-join: pairs without any invoice in the window
+    pair_keys = pd.MultiIndex.from_frame(pairs[["sheet_ord", "code_ord"]])
+    billed_keys = pd.MultiIndex.from_frame(matched[["sheet_ord", "code_ord"]])
+    unbilled = pairs[~pair_keys.isin(billed_keys)]
+
+    # First deleted act (table order) per patient/code, as the loop engine picks iloc[0]
+    first_deleted = (
+        deleted_df[["patient_id", "code", "patient_name"]]
+        .dropna(subset=["patient_id", "code"])
+        .drop_duplicates(subset=["patient_id", "code"], keep="first")
+    )
+    unbilled = unbilled.merge(first_deleted, on=["patient_id", "code"], how="left", indicator=True)
+    deleted_found = (unbilled["_merge"] == "both").to_numpy()
+
+    conforme = pd.DataFrame({
+        "sheet_ord": matched["sheet_ord"].to_numpy(),
+        "code_ord": matched["code_ord"].to_numpy(),
+        "inv_ord": matched["inv_ord"].to_numpy(),
+        "Patient": _or_dash(matched["patient_name"]).to_numpy(),
+        "Date": matched["sheet_date"].dt.strftime(DATE_FMT).to_numpy(),
+        "label": _or_dash(matched["label"]).to_numpy(),
+        "Matériau Fiche LABO": matched["lab_material"].to_numpy(),
+        "Contrôlé": "Contrôlé",
+        "Validé": "Validé",
+        "Statut": "Conforme",
+    })
+    incoherent = pd.DataFrame({
+        "sheet_ord": unbilled["sheet_ord"].to_numpy(),
+        "code_ord": unbilled["code_ord"].to_numpy(),
+        "inv_ord": -1,
+        "Patient": np.where(deleted_found, _or_dash(unbilled["patient_name"]).to_numpy(), "—"),
+        "Date": unbilled["sheet_date"].dt.strftime(DATE_FMT).to_numpy(),
+        "label": _or_dash(unbilled["label"]).to_numpy(),
+        "Matériau Fiche LABO": unbilled["lab_material"].to_numpy(),
+        "Contrôlé": "Non contrôlé",
+        "Validé": np.where(deleted_found, "Supprimé", "—"),
+        "Statut": "Incohérent",
+    })
+
+    df = pd.concat([conforme, incoherent], ignore_index=True)
+    df = df.sort_values(ORDER_COLUMNS, kind="stable")
+    df["Matériau Devis"] = df["label"]
+    return df[columns].reset_index(drop=True)
+
+
+def _run_merge(conn: sqlite3.Connection, start_date, end_date, workers=None) -> pd.DataFrame:
+    frames = [
+        _load_table("scans", conn),
+        _load_table("ccam_prosthetics", conn),
+        _load_table("invoices", conn),
+        _load_table("deleted_acts", conn),
+        pd.read_sql_query("SELECT file_path, patient_id, material FROM lab_sheet_fields", conn),
+    ]
+    return run_partitioned(
+        _evaluate_frames, frames, workers=workers, order_by=ORDER_COLUMNS,
+        start_date=start_date, end_date=end_date, with_order=True,
+    )
+
+
+# Single-pass SQL formulation of Feature 1. Lab sheets are read through
+# idx_scans_doc_type_date, invoices and deleted acts through (patient_id, code[, date])
+# seeks, so only rows inside [start - tolerance, end + tolerance] are touched.
+# Stored dates are DATE_FMT strings, possibly followed by a time ("YYYY-MM-DD HH:MM:SS"
+# from Excel or datetime sources), so a range ends before the next day rather than at
+# its last day: the comparisons stay plain string ranges over the indexes.
+_FEATURE1_SQL_TEMPLATE = """
+WITH sheets AS (
+    SELECT s.rowid AS sheet_ord, s.patient_id, date(s.date) AS sheet_date, f.material AS lab_material
+    FROM scans s
+    LEFT JOIN lab_sheet_fields f ON f.file_path = s.file_path
+    WHERE s.doc_type = :doc_type AND {sheet_filter}
+),
+pairs AS (
+    SELECT sh.sheet_ord, sh.patient_id, sh.sheet_date, sh.lab_material,
+           date(sh.sheet_date, :before) AS window_start,
+           date(sh.sheet_date, :after) AS window_end,
+           c.rowid AS code_ord, c.code, c.label
+    FROM sheets sh CROSS JOIN ccam_prosthetics c
+)
+SELECT p.sheet_ord, p.code_ord, i.rowid AS inv_ord, p.patient_id, p.sheet_date, p.label,
+       p.lab_material, i.patient_name, 1 AS billed, 0 AS deleted
+FROM pairs p
+JOIN invoices i
+  ON i.patient_id = p.patient_id
+ AND i.code = p.code
+ AND i.date >= p.window_start AND i.date < date(p.window_end, '+1 day')
+ AND (i.invoice_no IS NOT NULL OR i.fse_no IS NOT NULL)
+UNION ALL
+SELECT p.sheet_ord, p.code_ord, -1 AS inv_ord, p.patient_id, p.sheet_date, p.label,
+       p.lab_material,
+       (SELECT d.patient_name FROM deleted_acts d
+        WHERE d.patient_id = p.patient_id AND d.code = p.code
+        ORDER BY d.id LIMIT 1) AS patient_name,
+       0 AS billed,
+       EXISTS (SELECT 1 FROM deleted_acts d
+               WHERE d.patient_id = p.patient_id AND d.code = p.code) AS deleted
+FROM pairs p
+WHERE NOT EXISTS (
+    SELECT 1 FROM invoices i
+    WHERE i.patient_id = p.patient_id
+      AND i.code = p.code
+      AND i.date >= p.window_start AND i.date < date(p.window_end, '+1 day')
+      AND (i.invoice_no IS NOT NULL OR i.fse_no IS NOT NULL)
+)
+ORDER BY 1, 2, 3
+"""
+
+_SHEET_DATE_FILTER = "s.date >= :start AND s.date < date(:end, '+1 day')"
+
+_FEATURE1_SQL = _FEATURE1_SQL_TEMPLATE.format(sheet_filter=_SHEET_DATE_FILTER)
+
+
+def _iter_feature1_records(conn: sqlite3.Connection, sheet_filter: str, params: dict):
+    """
+    Run the SQL formulation with a custom lab sheet filter and yield
+    (patient_id, sheet_rowid, code_rowid, invoice_rowid, row) tuples, where row is
+    keyed by RESULT_COLUMNS. invoice_rowid is -1 for Incohérent rows.
+    """
+    params = {
+        "doc_type": DOC_TYPE_LAB_SHEET,
+        "before": f"-{INVOICE_DATE_TOLERANCE} days",
+        "after": f"+{INVOICE_DATE_TOLERANCE} days",
+        **params,
+    }
+    cur = conn.execute(_FEATURE1_SQL_TEMPLATE.format(sheet_filter=sheet_filter), params)
+    for sheet_ord, code_ord, inv_ord, patient_id, sheet_date, label, lab_material, patient_name, billed, deleted in cur:
+        label = label or "—"
+        if billed:
+            patient, controlled, validated, status = patient_name or "—", "Contrôlé", "Validé", "Conforme"
+        elif deleted:
+            patient, controlled, validated, status = patient_name or "—", "Non contrôlé", "Supprimé", "Incohérent"
+        else:
+            patient, controlled, validated, status = "—", "Non contrôlé", "—", "Incohérent"
+        yield patient_id, sheet_ord, code_ord, inv_ord, {
+            "Patient": patient,
+            "Date": sheet_date,
+            "Matériau Devis": label,
+            "Matériau Fiche LABO": lab_material or "—",
+            "Contrôlé": controlled,
+            "Validé": validated,
+            "Statut": status,
+        }
+
+
+def iter_feature1_rows(conn: sqlite3.Connection, start_date, end_date):
+    """
+    Stream Feature 1 result rows (dicts keyed by RESULT_COLUMNS) straight from SQLite.
+    Memory stays flat regardless of table sizes.
+    """
+    params = {
+        "start": pd.to_datetime(start_date).strftime(DATE_FMT),
+        "end": pd.to_datetime(end_date).strftime(DATE_FMT),
+    }
+    for *_, row in _iter_feature1_records(conn, _SHEET_DATE_FILTER, params):
+        yield row
+
+
+def run_feature1_lab_no_billing(
+    conn_or_path, start_date: str, end_date: str, engine: str = "merge", workers=None
+) -> pd.DataFrame:
+    """
+    Feature 1: lab sheets dated within [start_date, end_date] without a matching invoice.
+
+    engine="merge" (default) evaluates the check with set-based joins in pandas;
+    engine="sql" pushes it down to a single indexed SQLite query and only reads rows
+    inside the requested window; engine="loop" is the original per-sheet/per-code
+    implementation, kept as a reference.
+
+    workers (default CHECK_WORKERS) > 1 runs the merge engine on a process pool,
+    partitioned by patient; see checks.parallel.run_partitioned.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown Feature 1 engine: {engine!r} (expected one of {ENGINES})")
+
     print("Received DB path or conn:", conn_or_path)
     if isinstance(conn_or_path, (str, Path)):
         conn = sqlite3.connect(str(conn_or_path))  # Convert Path to str if needed
@@ -23,9 +279,14 @@ def run_feature1_lab_no_billing(conn_or_path, start_date: str, end_date: str) ->
         should_close = False
 
     logger = get_logger(__name__)
-    logger.info("Running Feature 1: Lab Sheet Without Billing")
+    logger.info("Running Feature 1: Lab Sheet Without Billing (engine=%s)", engine)
 
     try:
+        if engine == "merge":
+            return _run_merge(conn, start_date, end_date, workers=workers)
+        if engine == "sql":
+            return pd.DataFrame(iter_feature1_rows(conn, start_date, end_date), columns=RESULT_COLUMNS)
+
         # Normalize dates
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
@@ -34,6 +295,8 @@ def run_feature1_lab_no_billing(conn_or_path, start_date: str, end_date: str) ->
         ccam_df = _load_table("ccam_prosthetics", conn)
         invoices_df = _load_table("invoices", conn)
         deleted_df = _load_table("deleted_acts", conn)
+        fields_df = _load_table("lab_sheet_fields", conn)
+        lab_materials = dict(zip(fields_df["file_path"], _or_dash(fields_df["material"])))
 
         lab_sheets = scans_df[scans_df["doc_type"] == "lab_sheet"].copy()
         lab_sheets["date"] = pd.to_datetime(lab_sheets["date"])
@@ -45,6 +308,7 @@ def run_feature1_lab_no_billing(conn_or_path, start_date: str, end_date: str) ->
             patient_id = sheet["patient_id"]
             sheet_date = pd.to_datetime(sheet["date"])
             path = sheet["file_path"]
+            lab_material = lab_materials.get(path, "—")
 
             for _, prosth in ccam_df.iterrows():
                 ccam_code = prosth["code"]
@@ -70,7 +334,7 @@ def run_feature1_lab_no_billing(conn_or_path, start_date: str, end_date: str) ->
                             "Patient": inv["patient_name"] or "—",
                             "Date": sheet_date.strftime("%Y-%m-%d"),
                             "Matériau Devis": label or "—",
-                            "Matériau Fiche LABO": label or "—",  # 🔧 placeholder until LABO parsing
+                            "Matériau Fiche LABO": lab_material,
                             "Contrôlé": "Contrôlé",
                             "Validé": "Validé",
                             "Statut": "Conforme"
@@ -87,7 +351,7 @@ def run_feature1_lab_no_billing(conn_or_path, start_date: str, end_date: str) ->
                             "Patient": deleted_match.iloc[0]["patient_name"] or "—",
                             "Date": sheet_date.strftime("%Y-%m-%d"),
                             "Matériau Devis": label or "—",
-                            "Matériau Fiche LABO": label or "—",
+                            "Matériau Fiche LABO": lab_material,
                             "Contrôlé": "Non contrôlé",
                             "Validé": "Supprimé",
                             "Statut": "Incohérent"
@@ -97,7 +361,7 @@ def run_feature1_lab_no_billing(conn_or_path, start_date: str, end_date: str) ->
                             "Patient": "—",
                             "Date": sheet_date.strftime("%Y-%m-%d"),
                             "Matériau Devis": label or "—",
-                            "Matériau Fiche LABO": label or "—",
+                            "Matériau Fiche LABO": lab_material,
                             "Contrôlé": "Non contrôlé",
                             "Validé": "—",
                             "Statut": "Incohérent"
@@ -0,0 +1,185 @@
+# neuro_core/neuropacks/health/protocheck/checks/findings_store.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+CHECK_COLUMN = "check"
+
+
+def _open(conn_or_path):
+    if isinstance(conn_or_path, (str, Path)):
+        return sqlite3.connect(str(conn_or_path)), True
+    return conn_or_path, False
+
+
+def _text(value) -> str:
+    return "" if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)) else str(value)
+
+
+def finding_keys(check_name: str, findings: pd.DataFrame, key_fields: Sequence[str] = ()) -> pd.Series:
+    """
+    Deterministic key per finding: SHA-256 of the check name, the flag and the
+    identifying fields (absent ones count as empty; every column when key_fields is
+    empty). The same finding in a later run gets the same key, whatever its row
+    position or other columns.
+    """
+    if key_fields:
+        fields = ["flag", *(f for f in key_fields if f != "flag")]
+    else:
+        fields = sorted(c for c in findings.columns if c != CHECK_COLUMN)
+    joined = pd.Series(check_name, index=findings.index, dtype=object)
+    for field in fields:
+        values = findings[field].map(_text) if field in findings.columns else ""
+        joined = joined + f"\x1f{field}=" + values
+    return joined.map(lambda s: hashlib.sha256(s.encode("utf-8")).hexdigest())
+
+
+def _finding_rows(findings: pd.DataFrame, key_fields: Mapping[str, Sequence[str]]) -> list[tuple]:
+    rows = []
+    for check_name, group in findings.groupby(CHECK_COLUMN, sort=False):
+        # Columns that only other checks fill are all-NaN here
+        group = group.drop(columns=[CHECK_COLUMN]).dropna(axis=1, how="all")
+        keys = finding_keys(check_name, group, key_fields.get(check_name, ()))
+        records = group.to_dict(orient="records")
+        for key, record in zip(keys, records):
+            rows.append((
+                key,
+                check_name,
+                _text(record.get("patient_id")) or None,
+                _text(record.get("flag")) or None,
+                json.dumps(record, default=str, sort_keys=True),
+            ))
+    return rows
+
+
+def record_findings(
+    conn_or_path,
+    findings: pd.DataFrame,
+    checks: Iterable[str],
+    key_fields: Optional[Mapping[str, Sequence[str]]] = None,
+    run_id: Optional[str] = None,
+    seen_at: Optional[str] = None,
+    patients: Optional[Iterable[str]] = None,
+) -> dict:
+    """
+    Store one run's findings (a frame with a "check" column) and diff it against the
+    open findings of the same checks, by key:
+
+    - new: not stored, or stored but resolved (it is reopened; first_seen is kept)
+    - persisting: still open; last_seen moves to this run
+    - resolved: open findings of a check in `checks` that this run no longer reports
+
+    Checks not listed in `checks` are left untouched. With `patients`, the run only
+    covered those patients (an incremental refresh): findings of other patients are
+    neither resolved nor counted. The findings table must exist (init_db).
+    Returns {"new", "persisting", "resolved"}.
+    """
+    seen_at = seen_at or datetime.now().isoformat(timespec="seconds")
+    checks = list(checks)
+    rows = _finding_rows(findings, key_fields or {}) if not findings.empty else []
+
+    conn, should_close = _open(conn_or_path)
+    try:
+        conn.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS seen_findings (
+                finding_key TEXT PRIMARY KEY, check_name TEXT, patient_id TEXT, flag TEXT, details TEXT
+            )
+            """
+        )
+        conn.execute("DELETE FROM seen_findings")
+        conn.executemany("INSERT OR REPLACE INTO seen_findings VALUES (?, ?, ?, ?, ?)", rows)
+        scope = ""
+        if patients is not None:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS finding_scope (patient_id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM finding_scope")
+            conn.executemany("INSERT OR IGNORE INTO finding_scope VALUES (?)", ((p,) for p in patients))
+            scope = "AND patient_id IN (SELECT patient_id FROM temp.finding_scope)"
+
+        in_checks = ", ".join("?" * len(checks))
+        (new,) = conn.execute(
+            """
+            SELECT COUNT(*) FROM seen_findings s
+            LEFT JOIN findings f ON f.finding_key = s.finding_key
+            WHERE f.finding_key IS NULL OR f.resolved_at IS NOT NULL
+            """
+        ).fetchone()
+        (seen,) = conn.execute("SELECT COUNT(*) FROM seen_findings").fetchone()
+        resolved = conn.execute(
+            f"""
+            UPDATE findings SET resolved_at = ?
+            WHERE check_name IN ({in_checks}) AND resolved_at IS NULL {scope}
+              AND finding_key NOT IN (SELECT finding_key FROM seen_findings)
+            """,
+            (seen_at, *checks),
+        ).rowcount
+        conn.execute(
+            """
+            INSERT INTO findings (finding_key, check_name, patient_id, flag, details, first_seen, last_seen, resolved_at)
+            SELECT finding_key, check_name, patient_id, flag, details, ?, ?, NULL FROM seen_findings WHERE true
+            ON CONFLICT(finding_key) DO UPDATE SET
+                last_seen = excluded.last_seen,
+                details = excluded.details,
+                resolved_at = NULL
+            """,
+            (seen_at, seen_at),
+        )
+        diff = {"new": new, "persisting": seen - new, "resolved": resolved}
+        conn.execute(
+            "INSERT INTO finding_runs (run_id, ran_at, checks, new, persisting, resolved) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id or seen_at, seen_at, ",".join(checks), diff["new"], diff["persisting"], diff["resolved"]),
+        )
+        conn.commit()
+        LOGGER.info("Findings stored: %d new, %d persisting, %d resolved", new, seen - new, resolved)
+        return diff
+    finally:
+        if should_close:
+            conn.close()
+
+
+def load_findings(
+    conn_or_path,
+    check: Optional[str] = None,
+    include_resolved: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> pd.DataFrame:
+    """
+    Page through stored findings without running any check, newest first. Columns
+    are the stored keys and dates followed by the check's own fields.
+    """
+    where, params = [], []
+    if check is not None:
+        where.append("check_name = ?")
+        params.append(check)
+    if not include_resolved:
+        where.append("resolved_at IS NULL")
+    sql = (
+        "SELECT finding_key, check_name, first_seen, last_seen, resolved_at, details FROM findings"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + " ORDER BY first_seen DESC, finding_key"
+    )
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+    conn, should_close = _open(conn_or_path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        if should_close:
+            conn.close()
+    details = pd.DataFrame([json.loads(d) for d in df.pop("details")], index=df.index)
+    return pd.concat([df, details.drop(columns=[c for c in details.columns if c in df.columns])], axis=1)
@@ -0,0 +1,97 @@
+# neuro_core/neuropacks/health/protocheck/checks/parallel.py
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.core.constants import CHECK_WORKERS
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+PARTITION_KEY = "patient_id"
+
+
+def partition_ids(values: pd.Series, partitions: int) -> np.ndarray:
+    """
+    Stable hash partition of key values: the same patient_id lands in the same
+    partition in every frame and every process (unlike the salted built-in hash()).
+    """
+    hashed = pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+    return (hashed % np.uint64(partitions)).astype(np.int64)
+
+
+def _as_frame(result) -> pd.DataFrame:
+    return result if isinstance(result, pd.DataFrame) else pd.DataFrame(result)
+
+
+def _in_order(result: pd.DataFrame, order_by: Sequence[str]) -> pd.DataFrame:
+    if not order_by:
+        return result
+    result = result.sort_values(list(order_by), kind="stable")
+    return result.drop(columns=list(order_by)).reset_index(drop=True)
+
+
+def _run_partition(check: Callable, frames: tuple, kwargs: dict) -> pd.DataFrame:
+    return _as_frame(check(*frames, **kwargs))
+
+
+def run_partitioned(
+    check: Callable,
+    frames: Sequence[pd.DataFrame],
+    workers: Optional[int] = None,
+    key: str = PARTITION_KEY,
+    order_by: Sequence[str] = (),
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Run a frame-based check across a process pool, hash-partitioned by patient.
+
+    Every frame that has a `key` column is split so that all rows of a patient go to
+    the same partition; frames without it (e.g. the CCAM reference) are passed whole to
+    every partition. check(*partition_frames, **kwargs) must be a module-level function
+    that only relates rows of the same patient.
+
+    order_by names result columns holding the serial row order; the check derives them
+    from the frames' index labels, which partitions keep. Partition results are
+    concatenated, stably sorted on them and the columns dropped, so the output is the
+    serial one, row for row. Without order_by, results are concatenated in partition
+    order: the same rows as a serial run, in another order.
+
+    workers defaults to CHECK_WORKERS (PROTOCHECK_WORKERS); 1 or less runs serially.
+    """
+    workers = CHECK_WORKERS if workers is None else workers
+    if workers <= 1:
+        return _in_order(_as_frame(check(*frames, **kwargs)), order_by)
+
+    assignments = [
+        partition_ids(frame[key], workers) if key in frame.columns else None
+        for frame in frames
+    ]
+    if all(a is None for a in assignments):
+        raise ValueError(f"None of the frames has a {key!r} column to partition on")
+
+    jobs = []
+    for part in range(workers):
+        part_frames = tuple(
+            frame if a is None else frame[a == part]
+            for frame, a in zip(frames, assignments)
+        )
+        # A partition without any keyed row cannot produce findings
+        if any(not f.empty for f, a in zip(part_frames, assignments) if a is not None):
+            jobs.append(part_frames)
+
+    if not jobs:
+        return _in_order(_as_frame(check(*frames, **kwargs)), order_by)
+
+    LOGGER.info("Running %s on %d partitions with %d workers", check.__name__, len(jobs), workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_partition, check, job, kwargs) for job in jobs]
+        results = [f.result() for f in futures]
+
+    non_empty = [r for r in results if not r.empty]
+    if not non_empty:
+        return _in_order(results[0], order_by)
+    return _in_order(pd.concat(non_empty, ignore_index=True), order_by)
@@ -0,0 +1,190 @@
+# neuro_core/neuropacks/health/protocheck/checks/session.py
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.checks.findings_store import record_findings
+from neuro_core.neuropacks.health.protocheck.checks.validations import (
+    validate_deleted_prosthetic_invoices,
+    validate_deleted_quote_flow,
+    validate_duplicate_quotes_after_deletion,
+    validate_insurance_coverage,
+    validate_material_mismatch,
+)
+from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE
+from neuro_core.neuropacks.health.protocheck.core.doc_index import load_document_index
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+from neuro_core.neuropacks.health.protocheck.core.utils.prosthetics_filter import load_prosthetic_codes
+
+LOGGER = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Check:
+    """
+    A validation registered with a ValidationSession.
+
+    inputs maps each keyword argument of `run` to the (table, columns) it reads; the
+    session passes the shared snapshot frame of that table, which the check must not
+    modify. loaders maps keyword arguments to functions of the snapshot connection
+    (e.g. load_document_index); each runs once per session, in the snapshot
+    transaction, and its result is shared like the frames. Checks that query SQLite
+    themselves set uses_db: they get the snapshot connection as their only argument
+    and run inside the same read transaction as the frames.
+    key_fields identify a finding across runs (see findings_store.finding_keys).
+    """
+    name: str
+    run: Callable
+    inputs: Mapping[str, tuple[str, tuple[str, ...]]] = field(default_factory=dict)
+    loaders: Mapping[str, Callable[[sqlite3.Connection], object]] = field(default_factory=dict)
+    uses_db: bool = False
+    key_fields: tuple[str, ...] = ()
+
+
+def _deleted_prosthetic_invoices(deleted_df: pd.DataFrame, prosthetic: frozenset) -> pd.DataFrame:
+    flagged = deleted_df.assign(is_prosthetic=deleted_df["code"].isin(prosthetic).astype(int))
+    return validate_deleted_prosthetic_invoices(flagged)
+
+
+QUOTE_COLUMNS = ("quote_id", "status", "patient_id", "declared_material")
+
+DEFAULT_CHECKS = (
+    Check("deleted_quote_flow", validate_deleted_quote_flow, uses_db=True, key_fields=("quote_id", "code")),
+    Check("duplicate_quotes_after_deletion", validate_duplicate_quotes_after_deletion, uses_db=True,
+          key_fields=("quote_id", "code", "deleted_quote_id")),
+    Check("material_mismatch", validate_material_mismatch, {
+        "quotes_df": ("quotes", QUOTE_COLUMNS),
+        "scans_df": ("scans", ("patient_id", "doc_type", "file_path")),
+        "fields_df": ("lab_sheet_fields", ("file_path", "material")),
+    }, key_fields=("quote_id", "doc_path")),
+    Check("insurance_coverage", validate_insurance_coverage, {
+        "quotes_df": ("quotes", QUOTE_COLUMNS),
+        "invoices_df": ("invoices", ("patient_id", "invoice_no", "fse_no")),
+    }, loaders={"doc_index": load_document_index}, key_fields=("patient_id", "quote_id", "invoice_id")),
+    Check("deleted_prosthetic_invoices", _deleted_prosthetic_invoices, {
+        "deleted_df": ("deleted_acts", ("patient_id", "doctor_name", "code", "label", "date", "source_file")),
+    }, loaders={"prosthetic": load_prosthetic_codes}, key_fields=("patient_id", "code", "date", "source_file")),
+)
+
+
+class ValidationSession:
+    """
+    Runs a set of checks over one snapshot of the database: each table is read once,
+    in a single read transaction, with the union of the columns its checks declare,
+    and the frames are shared by every check. SQL checks (uses_db) run on that
+    transaction's connection, so every check sees the same state. Frame checks then
+    run concurrently on threads (SQLite and most pandas work release the GIL). With
+    store=True the findings are recorded in the findings table and diffed against
+    the previous run. The session never writes to the checked tables nor runs DDL,
+    and neither does record_findings: the schema comes from init_db and the ingesters.
+
+        session = ValidationSession(db_path)
+        findings = session.run()      # one frame, "check" column first
+        session.timings               # seconds per check, plus "snapshot"
+        session.diff                  # {"new", "persisting", "resolved"}
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path = DB_FILE,
+        checks: Sequence[Check] = DEFAULT_CHECKS,
+        workers: Optional[int] = None,
+        store: bool = True,
+    ) -> None:
+        self.db_path = str(db_path)
+        self.checks: list[Check] = []
+        self.workers = workers
+        self.store = store
+        self.frames: dict[str, pd.DataFrame] = {}
+        self.loaded: dict[Callable, object] = {}
+        self.db_findings: dict[str, pd.DataFrame] = {}
+        self.timings: dict[str, float] = {}
+        self.diff: Optional[dict] = None
+        for check in checks:
+            self.register(check)
+
+    def register(self, check: Check) -> None:
+        if any(c.name == check.name for c in self.checks):
+            raise ValueError(f"Check {check.name!r} is already registered")
+        self.checks.append(check)
+
+    def required_columns(self) -> dict[str, list[str]]:
+        """table -> columns read by at least one registered check, in declaration order."""
+        tables: dict[str, list[str]] = {}
+        for check in self.checks:
+            for table, columns in check.inputs.values():
+                wanted = tables.setdefault(table, [])
+                wanted.extend(c for c in columns if c not in wanted)
+        return tables
+
+    def load_snapshot(self) -> dict[str, pd.DataFrame]:
+        started = time.perf_counter()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("BEGIN")  # one consistent view across all tables
+            try:
+                self.frames = {
+                    table: pd.read_sql_query(f"SELECT {', '.join(columns)} FROM {table}", conn)
+                    for table, columns in self.required_columns().items()
+                }
+                self.loaded = {}
+                for check in self.checks:
+                    for loader in check.loaders.values():
+                        if loader not in self.loaded:
+                            self.loaded[loader] = loader(conn)
+                self.timings["snapshot"] = time.perf_counter() - started
+                self.db_findings = {
+                    check.name: self._run_check(check, conn) for check in self.checks if check.uses_db
+                }
+            finally:
+                conn.rollback()
+        LOGGER.info("Snapshot loaded: %s", ", ".join(f"{t}={len(f)}" for t, f in self.frames.items()))
+        return self.frames
+
+    def _run_check(self, check: Check, conn: Optional[sqlite3.Connection] = None) -> pd.DataFrame:
+        started = time.perf_counter()
+        if check.uses_db:
+            result = check.run(conn)
+        else:
+            result = check.run(
+                **{arg: self.frames[table] for arg, (table, _) in check.inputs.items()},
+                **{arg: self.loaded[loader] for arg, loader in check.loaders.items()},
+            )
+        self.timings[check.name] = time.perf_counter() - started
+        findings = result if isinstance(result, pd.DataFrame) else pd.DataFrame(result)
+        findings.insert(0, "check", check.name)
+        return findings
+
+    def run(self) -> pd.DataFrame:
+        """Run every registered check; returns their findings concatenated in registration order."""
+        self.timings = {}
+        self.load_snapshot()
+        frame_checks = [check for check in self.checks if not check.uses_db]
+        workers = self.workers or min(len(frame_checks), os.cpu_count() or 1)
+        if workers <= 1:
+            computed = [self._run_check(check) for check in frame_checks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                computed = list(pool.map(self._run_check, frame_checks))
+        by_name = {**self.db_findings, **{c.name: r for c, r in zip(frame_checks, computed)}}
+        results = [by_name[check.name] for check in self.checks]
+
+        for check, findings in zip(self.checks, results):
+            LOGGER.info("Check %s: %d findings in %.3fs", check.name, len(findings), self.timings[check.name])
+        non_empty = [r for r in results if not r.empty]
+        findings = pd.concat(non_empty, ignore_index=True, sort=False) if non_empty else pd.DataFrame(columns=["check"])
+        if self.store:
+            self.diff = record_findings(
+                self.db_path, findings,
+                checks=[c.name for c in self.checks],
+                key_fields={c.name: c.key_fields for c in self.checks},
+            )
+        return findings
@@ -1,7 +1,11 @@
 import sqlite3
+import numpy as np
 import pandas as pd
 import re
-from neuro_core.neuro_ai.ocr.main import ocr_from_file
+from contextlib import closing, contextmanager
+from typing import Iterator
+from neuro_core.neuropacks.health.protocheck.core.doc_index import DocumentIndex
+from neuro_core.neuropacks.health.protocheck.core.ocr_cache import get_ocr_cache
 
 
 from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE
@@ -10,60 +14,105 @@ from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
 logger = get_logger(__name__)
 
 
-def validate_deleted_quote_flow(db_path: str = DB_FILE) -> list[dict]:
+# One row per deleted quote line. The lab sheet and invoice are looked up per quote
+# (latest one, replacing invoices first) instead of joined, so a patient with many
+# scans or invoices does not multiply the rows.
+DELETED_QUOTE_FLOW_SQL = """
+SELECT q.quote_id, q.patient_id, q.doctor_id, q.code, q.status, q.date AS quote_date,
+       (SELECT s.file_path FROM scans s
+        WHERE s.patient_id = q.patient_id AND s.doc_type = 'lab_sheet'
+        ORDER BY s.date DESC LIMIT 1) AS scan_path,
+       i.invoice_no, i.fse_no, i.date AS invoice_date,
+       CASE WHEN EXISTS (
+           SELECT 1 FROM invoices r
+           WHERE r.patient_id = q.patient_id AND r.code = q.code
+             AND (COALESCE(r.invoice_no, '') <> '' OR COALESCE(r.fse_no, '') <> '')
+       ) THEN 'OK_REPLACED' ELSE 'QUOTE_DELETED_NO_INVOICE' END AS flag
+FROM quotes q
+LEFT JOIN invoices i ON i.rowid = (
+    SELECT r.rowid FROM invoices r
+    WHERE r.patient_id = q.patient_id AND r.code = q.code
+    ORDER BY (COALESCE(r.invoice_no, '') <> '' OR COALESCE(r.fse_no, '') <> '') DESC, r.date DESC
+    LIMIT 1
+)
+WHERE q.status = 'deleted'
+ORDER BY q.quote_id, q.code
+"""
+
+DELETED_QUOTE_FLOW_FIELDS = [
+    "quote_id", "patient_id", "doctor_id", "code", "status", "quote_date",
+    "scan_path", "invoice_no", "fse_no", "invoice_date", "flag",
+]
+
+
+@contextmanager
+def _connection(db_path: str | sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    # An open connection is used as is (and its transaction left alone)
+    if isinstance(db_path, sqlite3.Connection):
+        yield db_path
+        return
     with sqlite3.connect(db_path) as conn:
-        c = conn.cursor()
-        query = """
-        SELECT q.quote_id, q.patient_id, q.doctor_id, q.code, q.status, q.date AS quote_date,
-               s.file_path AS scan_path, i.invoice_no, i.fse_no, i.date AS invoice_date
-        FROM quotes q
-        LEFT JOIN scans s ON q.patient_id = s.patient_id AND s.doc_type = 'lab_sheet'
-        LEFT JOIN invoices i ON q.patient_id = i.patient_id AND q.code = i.code
-        WHERE q.status = 'deleted'
-        """
-        rows = c.execute(query).fetchall()
+        yield conn
 
-    results = []
-    for row in rows:
-        quote_id, patient_id, doctor_id, code, status, quote_date, scan_path, invoice_no, fse_no, invoice_date = row
-
-        if invoice_no or fse_no:
-            flag = "OK_REPLACED"
-        else:
-            flag = "QUOTE_DELETED_NO_INVOICE"
-
-        results.append({
-            "quote_id": quote_id,
-            "patient_id": patient_id,
-            "doctor_id": doctor_id,
-            "code": code,
-            "status": status,
-            "quote_date": quote_date,
-            "scan_path": scan_path,
-            "invoice_no": invoice_no,
-            "fse_no": fse_no,
-            "invoice_date": invoice_date,
-            "flag": flag
-        })
 
+def iter_deleted_quote_flow(db_path: str | sqlite3.Connection = DB_FILE, batch_size: int = 1000) -> Iterator[dict]:
+    """
+    Stream validate_deleted_quote_flow results from a cursor, batch_size rows at a
+    time, so large databases are never materialized in memory. db_path may also be
+    an open connection (e.g. a ValidationSession snapshot).
+    """
+    with _connection(db_path) as conn:
+        cur = conn.execute(DELETED_QUOTE_FLOW_SQL)
+        try:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(DELETED_QUOTE_FLOW_FIELDS, row))
+        finally:
+            cur.close()
+
+
+def validate_deleted_quote_flow(db_path: str | sqlite3.Connection = DB_FILE) -> list[dict]:
+    """
+    One row per deleted quote: OK_REPLACED when the patient was invoiced for the
+    code, QUOTE_DELETED_NO_INVOICE otherwise. Use iter_deleted_quote_flow to stream.
+    """
+    results = list(iter_deleted_quote_flow(db_path))
     logger.info("Validation: %d deleted quotes processed.", len(results))
     return results
 
 
 # Validation 2 — Material Mismatch
+MATERIAL_PATTERN = re.compile(r"(zirconia|ceramic|resin|metal)", re.IGNORECASE)
+
+
 def extract_material_from_ocr(path: str) -> str:
+    # Pages are OCR'd lazily: annex pages after the first match are never read
     try:
-        texts = ocr_from_file(path)
-        for text in texts:
-            match = re.search(r"(zirconia|ceramic|resin|metal)", text, re.IGNORECASE)
-            if match:
-                return match.group(1).lower()
+        with closing(get_ocr_cache().iter_pages(path)) as pages:
+            for page in pages:
+                match = MATERIAL_PATTERN.search(page["text"])
+                if match:
+                    return match.group(1).lower()
     except Exception as e:
         logger.warning("OCR failed for %s: %s", path, str(e))
     return "unknown"
 
 
-def validate_material_mismatch(quotes_df: pd.DataFrame, scans_df: pd.DataFrame) -> pd.DataFrame:
+def validate_material_mismatch(
+    quotes_df: pd.DataFrame, scans_df: pd.DataFrame, fields_df: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    """
+    Flag quotes whose declared material differs from the material on the patient's
+    (first) lab sheet. With fields_df (lab_sheet_fields, see
+    ingesters.lab_sheet_fields.load_lab_sheet_fields) the lab material is a join on
+    file_path; without it each sheet is OCR'd.
+    """
+    if fields_df is not None:
+        return _material_mismatch_from_fields(quotes_df, scans_df, fields_df)
+
     results = []
     lab_scans = scans_df[scans_df["doc_type"] == "lab_sheet"]
 
@@ -91,77 +140,170 @@ def validate_material_mismatch(quotes_df: pd.DataFrame, scans_df: pd.DataFrame)
     logger.info("Validation: %d material mismatches detected.", len(results))
     return pd.DataFrame(results)
 
+
+def _material_mismatch_from_fields(
+    quotes_df: pd.DataFrame, scans_df: pd.DataFrame, fields_df: pd.DataFrame
+) -> pd.DataFrame:
+    columns = ["patient_id", "quote_id", "declared_material", "lab_material", "doc_path", "flag"]
+    first_sheets = (
+        scans_df.loc[scans_df["doc_type"] == "lab_sheet", ["patient_id", "file_path"]]
+        .drop_duplicates(subset=["patient_id"], keep="first")
+    )
+    df = quotes_df.merge(first_sheets, on="patient_id", how="inner")
+    df = df.merge(
+        fields_df[["file_path", "material"]].drop_duplicates(subset=["file_path"]), on="file_path", how="left"
+    )
+    if "declared_material" in df.columns:
+        declared = df["declared_material"].fillna("").astype(str).str.strip().str.lower()
+    else:
+        declared = pd.Series("", index=df.index)
+    lab_material = df["material"].fillna("unknown").astype(str)
+
+    mismatch = (declared != "") & (lab_material != "unknown") & (declared != lab_material)
+    results = pd.DataFrame({
+        "patient_id": df["patient_id"],
+        "quote_id": df["quote_id"],
+        "declared_material": declared,
+        "lab_material": lab_material,
+        "doc_path": df["file_path"],
+        "flag": "MATERIAL_MISMATCH",
+    })[mismatch].reset_index(drop=True)
+
+    logger.info("Validation: %d material mismatches detected.", len(results))
+    return results if not results.empty else pd.DataFrame(columns=columns)
+
 def validate_deleted_prosthetic_invoices(deleted_df: pd.DataFrame) -> pd.DataFrame:
     df = deleted_df[deleted_df["is_prosthetic"] == 1].copy()
     df["flag"] = "DELETED_PROSTHESIS"
     logger.info("Validation: %d deleted prosthetic acts found.", len(df))
     return df[["patient_id", "doctor_name", "code", "label", "date", "source_file", "flag"]]
 
-def validate_insurance_coverage(quotes_df: pd.DataFrame, invoices_df: pd.DataFrame, scans_df: pd.DataFrame) -> pd.DataFrame:
-    grouped = scans_df.groupby(["patient_id", "doc_type"])
-    results = []
+INSURANCE_COLUMNS = ["patient_id", "quote_id", "invoice_id", "missing_type", "flag"]
+# Serial row order: accepted quotes (0) then invoices (1), by index label
+INSURANCE_ORDER_COLUMNS = ["source_ord", "row_ord"]
 
-    def has_scan(pid, doc_type):
-        return (pid, doc_type) in grouped.groups
 
-    records = pd.concat([
-        quotes_df[quotes_df["status"] == "accepted"],
-        invoices_df
-    ], ignore_index=True)
+def _first_truthy(*columns: pd.Series) -> pd.Series:
+    """Element-wise `a or b or c` (Python truthiness, so NaN counts as a value)."""
+    result = columns[-1]
+    for column in reversed(columns[:-1]):
+        result = column.where(column.map(bool, na_action=None).astype(bool), result)
+    return result
 
-    for _, row in records.iterrows():
-        pid = row["patient_id"]
-        quote_id = row.get("quote_id", "")
-        invoice_id = row.get("invoice_no") or row.get("fse_no") or ""
-        missing = []
 
-        if not has_scan(pid, "insurance_card"):
-            missing.append("insurance_card")
-        if not (has_scan(pid, "pec") or has_scan(pid, "insurance_claim")):
-            missing.append("pec_or_claim")
+def validate_insurance_coverage(
+    quotes_df: pd.DataFrame,
+    invoices_df: pd.DataFrame,
+    scans_df: pd.DataFrame | None = None,
+    doc_index: DocumentIndex | None = None,
+    with_order: bool = False,
+) -> pd.DataFrame:
+    """
+    Flag accepted quotes and invoices whose patient has no insurance card and/or no
+    PEC or insurance claim on file. Availability comes from the per-patient document
+    bitmask (`doc_index`, e.g. the persisted one from load_document_index; built from
+    scans_df when not given); no per-row lookups.
+    with_order=True adds INSURANCE_ORDER_COLUMNS (see checks.parallel.run_partitioned).
+    """
+    accepted = quotes_df[quotes_df["status"] == "accepted"]
+    wanted = ["patient_id", "quote_id", "invoice_no", "fse_no"]
+    records = pd.concat([
+        accepted[[c for c in wanted if c in accepted.columns]].assign(source_ord=0, row_ord=accepted.index),
+        invoices_df[[c for c in wanted if c in invoices_df.columns]].assign(source_ord=1, row_ord=invoices_df.index),
+    ], ignore_index=True)
 
-        if missing:
-            results.append({
-                "patient_id": pid,
-                "quote_id": quote_id,
-                "invoice_id": invoice_id,
-                "missing_type": ",".join(missing),
-                "flag": "INSURANCE_DOC_MISSING"
-            })
+    if doc_index is None:
+        if scans_df is None:
+            raise ValueError("validate_insurance_coverage needs scans_df or doc_index")
+        doc_index = DocumentIndex.from_scans(scans_df)
+    no_card = ~doc_index.has(records["patient_id"], "insurance_card")
+    no_pec = ~doc_index.has(records["patient_id"], "pec", "insurance_claim")
+    missing = no_card | no_pec
+
+    flagged = records[missing]
+    none = pd.Series(None, index=flagged.index, dtype=object)
+    empty = pd.Series("", index=flagged.index, dtype=object)
+    results = pd.DataFrame({
+        "patient_id": flagged["patient_id"],
+        "quote_id": flagged["quote_id"] if "quote_id" in flagged.columns else empty,
+        "invoice_id": _first_truthy(
+            flagged["invoice_no"].astype(object) if "invoice_no" in flagged.columns else none,
+            flagged["fse_no"].astype(object) if "fse_no" in flagged.columns else none,
+            empty,
+        ),
+        "missing_type": np.select(
+            [no_card[missing] & no_pec[missing], no_card[missing]],
+            ["insurance_card,pec_or_claim", "insurance_card"],
+            "pec_or_claim",
+        ),
+        "flag": "INSURANCE_DOC_MISSING",
+        "source_ord": flagged["source_ord"],
+        "row_ord": flagged["row_ord"],
+    }, columns=INSURANCE_ORDER_COLUMNS + INSURANCE_COLUMNS if with_order else INSURANCE_COLUMNS)
+    results = results.reset_index(drop=True)
 
     logger.info("Validation: %d insurance document issues found.", len(results))
-    return pd.DataFrame(results)
+    return results
 
 
-def validate_duplicate_quotes_after_deletion(db_path: str = DB_FILE) -> list[dict]:
+# For each proposed/accepted quote, the latest deletion of the same patient, doctor,
+# code, tooth and material up to its date (same-day deletions included). Deleted
+# rows carry "date<US>quote_id" so MAX picks the latest deletion and its id together.
+DUPLICATE_QUOTES_SQL = """
+WITH ordered AS (
+    SELECT quote_id, status, date, patient_id, doctor_id, code, tooth_number, declared_material,
+           MAX(CASE WHEN status = 'deleted' THEN date || char(31) || quote_id END) OVER (
+               PARTITION BY patient_id, doctor_id, code, tooth_number, declared_material
+               ORDER BY date
+               RANGE BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+           ) AS last_deleted
+    FROM quotes  -- idx_quotes_partition_date, when present, already yields window order: no sort
+    WHERE +status IN ('deleted', 'proposed', 'accepted')  -- unary +: keeps idx_quotes_status out of the plan
+      AND patient_id IS NOT NULL AND doctor_id IS NOT NULL AND code IS NOT NULL
+      AND tooth_number IS NOT NULL AND declared_material IS NOT NULL
+)
+SELECT patient_id, doctor_id, code, tooth_number, declared_material AS material,
+       quote_id, date AS new_quote_date,
+       substr(last_deleted, instr(last_deleted, char(31)) + 1) AS deleted_quote_id,
+       substr(last_deleted, 1, instr(last_deleted, char(31)) - 1) AS deleted_quote_date,
+       'RECREATED_QUOTE_AFTER_DELETION' AS flag
+FROM ordered
+WHERE status IN ('proposed', 'accepted') AND last_deleted IS NOT NULL
+"""
+
+DUPLICATE_QUOTES_FIELDS = [
+    "patient_id", "doctor_id", "code", "tooth_number", "material",
+    "quote_id", "new_quote_date", "deleted_quote_id", "deleted_quote_date", "flag",
+]
+
+
+def iter_duplicate_quotes_after_deletion(
+    db_path: str | sqlite3.Connection = DB_FILE, batch_size: int = 1000
+) -> Iterator[dict]:
+    """
+    Stream quotes recreated (proposed or accepted) on or after the deletion of a quote
+    with the same patient, doctor, code, tooth and material. Computed in SQLite with a
+    window (sort-free when idx_quotes_partition_date exists), batch_size rows at a
+    time. db_path may also be an open connection.
+    """
+    with _connection(db_path) as conn:
+        cur = conn.execute(DUPLICATE_QUOTES_SQL)
+        try:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(DUPLICATE_QUOTES_FIELDS, row))
+        finally:
+            cur.close()
+
+
+def validate_duplicate_quotes_after_deletion(db_path: str | sqlite3.Connection = DB_FILE) -> list[dict]:
     """
     Detects if a quote was deleted and then another with the same tooth and material
     was created later for the same patient and doctor.
     """
-    with sqlite3.connect(db_path) as conn:
-        df = pd.read_sql_query("SELECT * FROM quotes WHERE status IN ('deleted', 'proposed', 'accepted')", conn)
-
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.sort_values(by="date")
-
-    results = []
-    grouped = df.groupby(["patient_id", "doctor_id", "code", "tooth_number", "declared_material"])
-
-    for _, group in grouped:
-        statuses = group["status"].tolist()
-        if "deleted" in statuses and ("proposed" in statuses or "accepted" in statuses):
-            deleted_rows = group[group["status"] == "deleted"]
-            new_rows = group[group["status"].isin(["proposed", "accepted"])]
-            for _, new_row in new_rows.iterrows():
-                results.append({
-                    "patient_id": new_row["patient_id"],
-                    "doctor_id": new_row["doctor_id"],
-                    "code": new_row["code"],
-                    "tooth_number": new_row.get("tooth_number", ""),
-                    "material": new_row.get("declared_material", ""),
-                    "new_quote_date": new_row["date"],
-                    "flag": "RECREATED_QUOTE_AFTER_DELETION"
-                })
-
+    results = list(iter_duplicate_quotes_after_deletion(db_path))
     logger.info("Validation: %d duplicate quotes after deletion detected.", len(results))
-    return results
\ No newline at end of file
+    return results
@@ -0,0 +1,104 @@
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from neuro_core.neuro_ai.ocr.main import get_engine, iter_images, page_from_results
+from neuro_core.neuro_ai.ocr.preprocess import PreprocessConfig, preprocess
+from neuro_core.neuropacks.health.protocheck.checks.validations import MATERIAL_PATTERN
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCAN_SUFFIXES = {".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+
+
+def build_variants(text_height: int, roi: tuple[str, str] | None) -> dict[str, PreprocessConfig]:
+    variants = {
+        "none": PreprocessConfig(grayscale=False),
+        "grayscale": PreprocessConfig(),
+        "downscale": PreprocessConfig(target_text_height=text_height),
+        "deskew": PreprocessConfig(deskew=True),
+        "binarize": PreprocessConfig(binarize=True),
+    }
+    if roi:
+        variants["roi"] = PreprocessConfig(roi=roi)
+    variants["all"] = PreprocessConfig(target_text_height=text_height, deskew=True, binarize=True, roi=roi)
+    return variants
+
+
+def detect_material(pages: list[dict]) -> str:
+    for page in pages:
+        match = MATERIAL_PATTERN.search(page["text"])
+        if match:
+            return match.group(1).lower()
+    return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare OCR latency and material extraction with and without each preprocessing step."
+    )
+    parser.add_argument("--dir", required=True, help="Folder of lab sheet scans (PDF or images).")
+    parser.add_argument("--labels", help="Optional CSV with columns file_name, material (ground truth).")
+    parser.add_argument("--text-height", type=int, default=32, help="Target text height for the downscale step.")
+    parser.add_argument("--roi", help="Region of interest as template:region (e.g. lab_sheet:prescription).")
+    parser.add_argument("--limit", type=int, default=None, help="Only benchmark the first N files.")
+    parser.add_argument("--out", help="Optional CSV path for per-file results.")
+    args = parser.parse_args()
+
+    files = sorted(p for p in Path(args.dir).iterdir() if p.suffix.lower() in SCAN_SUFFIXES)[: args.limit]
+    labels = {}
+    if args.labels:
+        df_labels = pd.read_csv(args.labels)
+        labels = dict(zip(df_labels["file_name"], df_labels["material"].str.lower()))
+    variants = build_variants(args.text_height, tuple(args.roi.split(":", 1)) if args.roi else None)
+
+    engine = get_engine()
+    engine.warm_up(background=False)
+
+    rows = []
+    for path in files:
+        # Rendered once in colour, shared by all variants: "none" OCRs the raw page
+        images = list(iter_images(str(path), grayscale=False))
+        for name, config in variants.items():
+            started = time.perf_counter()
+            pages = []
+            for image in images:
+                prepared = preprocess(image, config)
+                pages.append(page_from_results(engine.readtext(prepared.image), prepared))
+            elapsed = time.perf_counter() - started
+            rows.append({
+                "file_name": path.name,
+                "variant": name,
+                "pages": len(images),
+                "seconds": elapsed,
+                "material": detect_material(pages),
+                "expected": labels.get(path.name),
+            })
+        logger.info("Benchmarked %s (%d pages)", path.name, len(images))
+
+    df = pd.DataFrame(rows)
+    if df.empty:
+        print("No scans found.")
+        return
+    df["correct"] = df["material"] == df["expected"]
+    summary = df.groupby("variant", sort=False).agg(
+        files=("file_name", "count"),
+        pages=("pages", "sum"),
+        total_s=("seconds", "sum"),
+        detected=("material", lambda m: int((m != "unknown").sum())),
+    )
+    summary["ms_per_page"] = 1000 * summary["total_s"] / summary["pages"]
+    if labels:
+        summary["accuracy"] = df[df["expected"].notna()].groupby("variant", sort=False)["correct"].mean()
+    print(summary.round(3).to_string())
+
+    if args.out:
+        df.to_csv(args.out, index=False)
+        logger.info("Per-file results written to %s", args.out)
+
+
+if __name__ == "__main__":
+    main()
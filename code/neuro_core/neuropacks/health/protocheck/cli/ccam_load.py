@@ -9,6 +9,7 @@ from typing import Optional
 from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
 from neuro_core.neuropacks.health.protocheck.core.schema import init_db
 from neuro_core.neuropacks.health.protocheck.core.constants import DB_PATH
+from neuro_core.neuropacks.health.protocheck.core.import_manifest import import_once
 from neuro_core.neuropacks.health.protocheck.core.adapters.azzem_ccam import (
     AzzemCcamAdapter,
 )
@@ -16,7 +17,7 @@ from neuro_core.neuropacks.health.protocheck.ingesters.ccam import (
     load_ccam_from_docx,
     load_ccam_from_csv,
     load_ccam_from_txt,
-    upsert_ccam,
+    bulk_upsert_ccam,
 )
 
 LOGGER = get_logger(__name__)
@@ -42,6 +43,11 @@ def main(argv: Optional[list[str]] = None) -> int:
         default=str(DB_PATH),
         help="SQLite DB path (default protocheck default)",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Import even if the file is unchanged since its last import",
+    )
     parser.add_argument(
         "--verify-with-azzem",
         action="store_true",
@@ -52,17 +58,28 @@ def main(argv: Optional[list[str]] = None) -> int:
     # Ensure DB exists
     db_path = init_db(args.db)
 
-    # Load DataFrame
-    if args.docx:
-        df = load_ccam_from_docx(args.docx)
-    elif args.csv:
-        df = load_ccam_from_csv(args.csv)
-    else:
-        df = load_ccam_from_txt(args.txt, delimiter=args.txt_delimiter)
+    source = args.docx or args.csv or args.txt
+    loaded = {}
 
-    # Upsert
-    total = upsert_ccam(df, db_path)
-    LOGGER.info("CCAM ingestion complete: %d rows upserted.", total)
+    def do_import() -> dict:
+        if args.docx:
+            df = load_ccam_from_docx(args.docx)
+        elif args.csv:
+            df = load_ccam_from_csv(args.csv)
+        else:
+            df = load_ccam_from_txt(args.txt, delimiter=args.txt_delimiter)
+        loaded["df"] = df
+        return bulk_upsert_ccam(df, db_path)
+
+    stats = import_once("ccam", source, do_import, db_path=db_path, force=args.force)
+    if stats is None:
+        LOGGER.info("CCAM reference %s unchanged since its last import; nothing to do.", source)
+        return 0
+    df = loaded["df"]
+    LOGGER.info(
+        "CCAM ingestion complete: %d inserted, %d updated, %d unchanged.",
+        stats["inserted"], stats["updated"], stats["unchanged"],
+    )
 
     # Optional verify via Azzem stub
     if args.verify_with_azzem:
@@ -1,11 +1,45 @@
 import argparse
-from neuro_core.neuropacks.health.protocheck.ingesters import invoices
-from neuro_core.neuropacks.health.protocheck.core.utils.prosthetics_filter import filter_prosthetics
+import sys
+import time
 
-parser = argparse.ArgumentParser()
-parser.add_argument("--file", required=True)
-args = parser.parse_args()
+from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE, IMPORT_CHUNK_ROWS
+from neuro_core.neuropacks.health.protocheck.core.import_manifest import import_once
+from neuro_core.neuropacks.health.protocheck.core.utils.prosthetics_filter import prosthetic_codes_digest
+from neuro_core.neuropacks.health.protocheck.ingesters.invoices import stream_invoices_from_file
 
-df = invoices.load_invoices_from_file(args.file)
-df = filter_prosthetics(df)
-invoices.upsert_invoices(df)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream an invoices export (CSV or XLSX) into the DB, prosthetic codes only."
+    )
+    parser.add_argument("--file", required=True)
+    parser.add_argument("--db", default=str(DB_FILE), help="SQLite DB path (default protocheck default).")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_ROWS,
+                        help="Rows read and committed per chunk (default: %(default)s).")
+    parser.add_argument("--force", action="store_true", help="Import even if the file is unchanged.")
+    args = parser.parse_args()
+
+    last_print = [0.0]
+
+    def show(progress):
+        now = time.monotonic()
+        if now - last_print[0] >= 1:
+            last_print[0] = now
+            print(f"\r{progress.summary()}", end="", file=sys.stderr, flush=True)
+
+    result = import_once(
+        "invoices", args.file,
+        lambda: stream_invoices_from_file(args.file, db_path=args.db, chunksize=args.chunk_size, on_progress=show),
+        # Only prosthetic codes are kept: a CCAM reference change re-imports the file
+        db_path=args.db, force=args.force, depends_on=prosthetic_codes_digest(args.db),
+    )
+    if result is None:
+        print(f"{args.file} unchanged since its last import; skipped (use --force to re-import).")
+        return
+    print(file=sys.stderr)
+    print(f"{result['rows']} rows read ({result['rows_per_second']:.0f} rows/s), {result['kept']} prosthetic: "
+          f"{result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import argparse
+
+from neuro_core.neuropacks.health.protocheck.core.constants import DB_PATH
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+from neuro_core.neuropacks.health.protocheck.ingesters.lab_sheet_fields import ingest_lab_sheet_fields
+
+logger = get_logger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parse indexed lab sheets into structured fields (material, teeth, lab, dates)."
+    )
+    parser.add_argument("--db", default=str(DB_PATH), help="SQLite DB path (default protocheck default)")
+    parser.add_argument("--force", action="store_true", help="Re-parse sheets whose content is unchanged.")
+    args = parser.parse_args()
+
+    stats = ingest_lab_sheet_fields(args.db, force=args.force)
+    print(f"Parsed {stats['parsed']} lab sheets ({stats['unchanged']} unchanged, {stats['failed']} failed).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import sys
+import time
+
+from neuro_core.neuropacks.health.protocheck.core.constants import DB_PATH, DOC_TYPE_LAB_SHEET
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+from neuro_core.neuropacks.health.protocheck.ingesters.ocr_batch import (
+    default_run_id,
+    find_scan_files,
+    run_ocr_batch,
+)
+from neuro_core.neuropacks.health.protocheck.ingesters.scans import load_scans_index
+
+logger = get_logger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="OCR a directory of scans or a scans index in bulk. Results are kept in the OCR cache "
+                    "(never evicted); re-running the same command resumes an interrupted run."
+    )
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dir", help="Directory of scans (PDF or images), searched recursively.")
+    src.add_argument("--scans-csv", help="Scans index CSV (patient_id, doc_type, file_path, date).")
+    parser.add_argument("--doc-type", default=DOC_TYPE_LAB_SHEET,
+                        help="doc_type to OCR from --scans-csv (default: %(default)s, 'all' for every row).")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1).")
+    parser.add_argument("--db", default=str(DB_PATH), help="SQLite DB path (default protocheck default).")
+    parser.add_argument("--run-id", help="Checkpoint name (default: derived from the input path).")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry files that failed in a previous run.")
+    args = parser.parse_args()
+
+    if args.dir:
+        files = find_scan_files(args.dir)
+    else:
+        df = load_scans_index(args.scans_csv)
+        if args.doc_type != "all":
+            df = df[df["doc_type"] == args.doc_type]
+        files = list(dict.fromkeys(df["file_path"].astype(str)))
+    run_id = args.run_id or default_run_id(args.dir or args.scans_csv)
+
+    last_print = [0.0]
+
+    def show(progress):
+        now = time.monotonic()
+        if now - last_print[0] >= 1 or progress.already_done + progress.done == progress.total:
+            last_print[0] = now
+            print(f"\r{progress.summary()}", end="", file=sys.stderr, flush=True)
+
+    try:
+        result = run_ocr_batch(files, run_id, db_path=args.db, workers=args.workers,
+                               retry_failed=args.retry_failed, on_progress=show)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; re-run the same command to resume (run id {run_id}).", file=sys.stderr)
+        return 130
+
+    print(file=sys.stderr)
+    print(f"Run {run_id}: {result['done']} done, {result['failed']} failed, "
+          f"{result['skipped']} already processed.")
+    for file_path, error in result["failures"]:
+        print(f"  FAILED {file_path}: {error}")
+    return 1 if result["failures"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
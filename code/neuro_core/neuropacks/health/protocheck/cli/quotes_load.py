@@ -1,14 +1,22 @@
 import argparse
+from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE
+from neuro_core.neuropacks.health.protocheck.core.import_manifest import import_once
 from neuro_core.neuropacks.health.protocheck.ingesters.quotes import load_quotes_csv, upsert_quotes
 
 
 def main():
     parser = argparse.ArgumentParser(description="Load deleted quotes CSV into the database.")
     parser.add_argument("--csv", required=True, help="Path to deleted quotes CSV file.")
+    parser.add_argument("--db", default=str(DB_FILE), help="SQLite DB path (default protocheck default).")
+    parser.add_argument("--force", action="store_true", help="Import even if the file is unchanged.")
     args = parser.parse_args()
 
-    df = load_quotes_csv(args.csv)
-    upsert_quotes(df)
+    result = import_once(
+        "quotes", args.csv, lambda: upsert_quotes(load_quotes_csv(args.csv), db_path=args.db),
+        db_path=args.db, force=args.force,
+    )
+    if result is None:
+        print(f"{args.csv} unchanged since its last import; skipped (use --force to re-import).")
 
 
 if __name__ == "__main__":
@@ -5,8 +5,11 @@ from datetime import datetime
 from pathlib import Path
 
 from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE
-from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import run_feature1_lab_no_billing
-from neuro_core.neuropacks.health.protocheck.core.logger import logger
+from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import ENGINES, run_feature1_lab_no_billing
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+from neuro_core.neuropacks.health.protocheck.core.schema import init_db
+
+logger = get_logger(__name__)
 
 
 def main():
@@ -14,6 +17,9 @@ def main():
     parser.add_argument("--start", required=True, help="Start date in YYYY-MM-DD")
     parser.add_argument("--end", required=True, help="End date in YYYY-MM-DD")
     parser.add_argument("--out", required=True, help="Output CSV path")
+    parser.add_argument("--engine", choices=ENGINES, default="merge", help="Execution engine (default: merge)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for the merge engine (default: PROTOCHECK_WORKERS or 1)")
 
     args = parser.parse_args()
     start_date = datetime.strptime(args.start, "%Y-%m-%d").date()
@@ -22,9 +28,10 @@ def main():
 
     logger.info(f"Running Feature 1 from {start_date} to {end_date}")
 
+    init_db(str(DB_FILE))  # tables added since the database was created (lab_sheet_fields, ...)
     try:
         conn = sqlite3.connect(DB_FILE)
-        df_results = run_feature1_lab_no_billing(conn, start_date, end_date)
+        df_results = run_feature1_lab_no_billing(conn, start_date, end_date, engine=args.engine, workers=args.workers)
         df_results.to_csv(output_path, index=False)
         logger.info(f"Results written to {output_path}")
     except Exception as e:
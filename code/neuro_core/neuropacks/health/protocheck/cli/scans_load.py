@@ -3,6 +3,8 @@
 import argparse
 from pathlib import Path
 from ..ingesters.scans import load_scans_index, upsert_scans
+from ..core.constants import DB_FILE
+from ..core.import_manifest import import_once
 from ..core.logger import get_logger
 
 LOGGER = get_logger(__name__)
@@ -10,6 +12,8 @@ LOGGER = get_logger(__name__)
 def main():
     parser = argparse.ArgumentParser(description="Load scanned documents index into DB.")
     parser.add_argument("--csv", required=True, help="Path to scans index CSV file")
+    parser.add_argument("--db", default=str(DB_FILE), help="SQLite DB path (default protocheck default)")
+    parser.add_argument("--force", action="store_true", help="Import even if the file is unchanged")
 
     args = parser.parse_args()
     csv_path = Path(args.csv)
@@ -18,8 +22,12 @@ def main():
         return
 
     try:
-        df = load_scans_index(str(csv_path))
-        upsert_scans(df)
+        result = import_once(
+            "scans", csv_path, lambda: upsert_scans(load_scans_index(str(csv_path)), db_path=args.db),
+            db_path=args.db, force=args.force,
+        )
+        if result is None:
+            LOGGER.info("Scans index %s unchanged since its last import; skipped.", csv_path)
     except Exception as e:
         LOGGER.exception("Failed to load scans index: %s", e)
 
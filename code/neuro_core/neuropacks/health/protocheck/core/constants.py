@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Project anchors
@@ -20,4 +21,13 @@ DOC_TYPE_PEC = "pec"
 DOC_TYPE_INSURANCE_CARD = "insurance_card"
 DOC_TYPE_INSURANCE_CLAIM = "insurance_claim"
 
-DB_FILE = DB_PATH
\ No newline at end of file
+DB_FILE = DB_PATH
+
+# Parallel check execution (opt-in): number of worker processes, 1 = serial
+CHECK_WORKERS = int(os.getenv("PROTOCHECK_WORKERS", "1"))
+
+# OCR result cache size limit (least recently used entries are evicted beyond it)
+OCR_CACHE_MAX_MB = int(os.getenv("PROTOCHECK_OCR_CACHE_MB", "256"))
+
+# Rows per chunk when streaming invoice / deleted act exports into the DB
+IMPORT_CHUNK_ROWS = int(os.getenv("PROTOCHECK_IMPORT_CHUNK_ROWS", "50000"))
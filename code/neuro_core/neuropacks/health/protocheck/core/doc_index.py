@@ -0,0 +1,200 @@
+# neuro_core/neuropacks/health/protocheck/core/doc_index.py
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from .constants import (
+    DOC_TYPE_INSURANCE_CARD,
+    DOC_TYPE_INSURANCE_CLAIM,
+    DOC_TYPE_LAB_SHEET,
+    DOC_TYPE_PEC,
+    DOC_TYPE_SIGNED_QUOTE,
+)
+from .logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+# One bit per document type; the order is persisted in patient_documents.doc_mask
+DOC_TYPES = (
+    DOC_TYPE_LAB_SHEET,
+    DOC_TYPE_SIGNED_QUOTE,
+    DOC_TYPE_PEC,
+    DOC_TYPE_INSURANCE_CARD,
+    DOC_TYPE_INSURANCE_CLAIM,
+)
+DOC_BITS = {doc_type: 1 << i for i, doc_type in enumerate(DOC_TYPES)}
+
+_LAST_COLUMNS = {doc_type: f"last_{doc_type}" for doc_type in DOC_TYPES}
+
+
+def doc_mask(*doc_types: str) -> int:
+    mask = 0
+    for doc_type in doc_types:
+        mask |= DOC_BITS[doc_type]
+    return mask
+
+
+class DocumentIndex:
+    """
+    Which document types each patient has on file (one bitmask per patient_id) and
+    the latest scan date per type. Lookups take arrays of patient ids; unknown
+    patients have no documents.
+    """
+
+    def __init__(self, masks: pd.Series, latest: pd.DataFrame | None = None) -> None:
+        self.masks = masks.astype(np.int64)
+        self.latest_dates = latest if latest is not None else pd.DataFrame(index=masks.index)
+        self._index = pd.Index(self.masks.index)
+        # Trailing 0 so that get_indexer's -1 (unknown patient) maps to "no documents"
+        self._mask_values = np.append(self.masks.to_numpy(), 0)
+
+    @classmethod
+    def from_scans(cls, scans_df: pd.DataFrame) -> "DocumentIndex":
+        df = scans_df[scans_df["patient_id"].notna() & scans_df["doc_type"].isin(DOC_BITS)]
+        pairs = df[["patient_id", "doc_type"]].drop_duplicates()
+        # Distinct bits per patient, so their sum is their OR
+        masks = pairs["doc_type"].map(DOC_BITS).astype(np.int64).groupby(pairs["patient_id"].to_numpy()).sum()
+        latest = None
+        if "date" in df.columns:
+            latest = (
+                df.groupby(["patient_id", "doc_type"])["date"].max().unstack()
+                .reindex(columns=list(DOC_TYPES))
+            )
+        return cls(masks, latest)
+
+    @classmethod
+    def from_db(cls, conn: sqlite3.Connection, query: str | None = None) -> "DocumentIndex":
+        """Load the persisted patient_documents table (or rows of the same shape from `query`)."""
+        if query is None:
+            query = f"SELECT patient_id, doc_mask, {', '.join(_LAST_COLUMNS.values())} FROM patient_documents"
+        df = pd.read_sql_query(query, conn).set_index("patient_id")
+        latest = df[list(_LAST_COLUMNS.values())].rename(columns={v: k for k, v in _LAST_COLUMNS.items()})
+        return cls(df["doc_mask"], latest)
+
+    def masks_for(self, patient_ids: Iterable) -> np.ndarray:
+        positions = self._index.get_indexer(pd.Index(patient_ids))
+        return self._mask_values[positions]
+
+    def has(self, patient_ids: Iterable, *doc_types: str) -> np.ndarray:
+        """Boolean array: does each patient have at least one of doc_types?"""
+        return (self.masks_for(patient_ids) & doc_mask(*doc_types)) != 0
+
+    def has_all(self, patient_ids: Iterable, *doc_types: str) -> np.ndarray:
+        wanted = doc_mask(*doc_types)
+        return (self.masks_for(patient_ids) & wanted) == wanted
+
+    def latest(self, patient_ids: Iterable, doc_type: str) -> np.ndarray:
+        """Latest scan date of doc_type per patient (None when absent)."""
+        if doc_type not in self.latest_dates.columns:
+            return np.full(len(pd.Index(patient_ids)), None, dtype=object)
+        column = self.latest_dates[doc_type].astype(object)
+        return column.reindex(pd.Index(patient_ids)).where(lambda s: s.notna(), None).to_numpy()
+
+
+_MASK_SQL = " | ".join(
+    f"(MAX(doc_type = '{doc_type}') * {bit})" for doc_type, bit in DOC_BITS.items()
+)
+_LAST_SQL = ", ".join(
+    f"MAX(CASE WHEN doc_type = '{doc_type}' THEN date END) AS {col}" for doc_type, col in _LAST_COLUMNS.items()
+)
+_FROM_SCANS_SQL = f"""
+    SELECT patient_id, {_MASK_SQL} AS doc_mask, {_LAST_SQL}
+    FROM scans
+    WHERE patient_id IS NOT NULL
+    GROUP BY patient_id
+"""
+
+
+def _recompute_patient(row: str) -> str:
+    # Delete then insert: no row is left for a patient without scans, and the outer
+    # statement's conflict policy cannot override the trigger's
+    return f"""
+        DELETE FROM patient_documents WHERE patient_id = {row}.patient_id;
+        INSERT INTO patient_documents (patient_id, doc_mask, {', '.join(_LAST_COLUMNS.values())})
+        SELECT patient_id, {_MASK_SQL}, {_LAST_SQL}
+        FROM scans
+        WHERE patient_id = {row}.patient_id
+        GROUP BY patient_id;
+    """
+
+
+# Inserts are folded in by update_patient_documents (an OR cannot lose a bit), but a
+# deleted or re-typed scan may remove one: recompute the patients it leaves and joins.
+# Nothing is written while the index is still empty (load_document_index then reads
+# scans directly), so a partial index is never mistaken for a complete one.
+DOC_INDEX_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_scans_{event.split()[0].lower()}_patient_documents
+    AFTER {event} ON scans
+    WHEN EXISTS (SELECT 1 FROM patient_documents)
+    BEGIN
+        {"".join(_recompute_patient(row) for row in rows)}
+    END;
+    """
+    for event, rows in (("UPDATE OF patient_id, doc_type, date", ("OLD", "NEW")), ("DELETE", ("OLD",)))
+]
+
+
+def rebuild_patient_documents(conn: sqlite3.Connection) -> int:
+    """Recompute patient_documents from the whole scans table. Returns the patient count."""
+    conn.execute("DELETE FROM patient_documents")
+    conn.execute(
+        f"""
+        INSERT INTO patient_documents (patient_id, doc_mask, {', '.join(_LAST_COLUMNS.values())})
+        {_FROM_SCANS_SQL}
+        """
+    )
+    (count,) = conn.execute("SELECT COUNT(*) FROM patient_documents").fetchone()
+    LOGGER.info("Patient document index rebuilt: %d patients", count)
+    return count
+
+
+def update_patient_documents(conn: sqlite3.Connection, new_scans: pd.DataFrame) -> None:
+    """
+    Fold newly inserted scan rows into patient_documents (bitwise OR of the masks,
+    max of the dates). An empty index on a database that already has scans is
+    rebuilt from the scans table instead. Deleted and edited scans are handled by
+    DOC_INDEX_TRIGGERS.
+    """
+    (indexed,) = conn.execute("SELECT COUNT(*) FROM patient_documents").fetchone()
+    if not indexed:
+        rebuild_patient_documents(conn)
+        return
+
+    index = DocumentIndex.from_scans(new_scans)
+    if index.masks.empty:
+        return
+    last = index.latest_dates.reindex(index.masks.index)
+    rows = [
+        (patient_id, int(mask), *(None if pd.isna(v) else str(v) for v in last.loc[patient_id]))
+        for patient_id, mask in index.masks.items()
+    ]
+    updates = ",\n".join(
+        f"{col} = CASE WHEN excluded.{col} > COALESCE({col}, '') THEN excluded.{col} ELSE {col} END"
+        for col in _LAST_COLUMNS.values()
+    )
+    conn.executemany(
+        f"""
+        INSERT INTO patient_documents (patient_id, doc_mask, {', '.join(_LAST_COLUMNS.values())})
+        VALUES (?, ?, {', '.join('?' * len(_LAST_COLUMNS))})
+        ON CONFLICT(patient_id) DO UPDATE SET
+            doc_mask = doc_mask | excluded.doc_mask,
+            {updates}
+        """,
+        rows,
+    )
+
+
+def load_document_index(conn: sqlite3.Connection) -> DocumentIndex:
+    """
+    The persisted index. Read-only: while patient_documents is still empty (database
+    filled before the index existed) the same aggregate is computed from scans in
+    memory; the next scans import persists it.
+    """
+    (indexed,) = conn.execute("SELECT COUNT(*) FROM patient_documents").fetchone()
+    return DocumentIndex.from_db(conn, None if indexed else _FROM_SCANS_SQL)
@@ -0,0 +1,135 @@
+# neuro_core/neuropacks/health/protocheck/core/import_manifest.py
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+from .constants import DB_PATH
+from .logger import get_logger
+from .schema import ensure_schema
+from .utils.file_hash import sha256_file
+
+LOGGER = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def _open(conn_or_path):
+    if isinstance(conn_or_path, (str, Path)):
+        return sqlite3.connect(str(conn_or_path)), True
+    return conn_or_path, False
+
+
+def _key(path: str | Path) -> str:
+    return str(Path(path).resolve())
+
+
+def row_count(result) -> Optional[int]:
+    """Rows an ingester reported: an int, or the counts of an upsert stats dict."""
+    if isinstance(result, bool):
+        return None
+    if isinstance(result, int):
+        return result
+    if isinstance(result, dict):
+        if "rows" in result:
+            return int(result["rows"])
+        counts = [result.get(k) for k in ("inserted", "updated", "unchanged")]
+        if all(isinstance(c, int) for c in counts):
+            return sum(counts)
+    if hasattr(result, "__len__"):
+        return len(result)
+    return None
+
+
+def is_unchanged(conn_or_path, ingester: str, path: str | Path, depends_on: Optional[str] = None) -> bool:
+    """
+    True when `path` was already imported by `ingester` with the same content (and
+    the same `depends_on` digest). Same size and mtime: unchanged without reading
+    the file. Same size, other mtime (copied or touched): the content hash decides,
+    and a match refreshes the stored mtime so the next check is cheap again.
+    """
+    stat = Path(path).stat()
+    conn, should_close = _open(conn_or_path)
+    try:
+        ensure_schema(conn)
+        row = conn.execute(
+            "SELECT size, mtime, sha256, depends_on FROM import_manifest WHERE ingester = ? AND file_path = ?",
+            (ingester, _key(path)),
+        ).fetchone()
+        if row is None or row[0] != stat.st_size or row[3] != depends_on:
+            return False
+        if row[1] == stat.st_mtime:
+            return True
+        if sha256_file(path) != row[2]:
+            return False
+        conn.execute(
+            "UPDATE import_manifest SET mtime = ? WHERE ingester = ? AND file_path = ?",
+            (stat.st_mtime, ingester, _key(path)),
+        )
+        conn.commit()
+        return True
+    finally:
+        if should_close:
+            conn.close()
+
+
+def record_import(
+    conn_or_path, ingester: str, path: str | Path, rows: Optional[int],
+    size: Optional[int] = None, mtime: Optional[float] = None, sha256: Optional[str] = None,
+    depends_on: Optional[str] = None,
+) -> None:
+    """Store the fingerprint of an imported file (taken now unless given)."""
+    if size is None or mtime is None:
+        stat = Path(path).stat()
+        size, mtime = stat.st_size, stat.st_mtime
+    sha256 = sha256 or sha256_file(path)
+    conn, should_close = _open(conn_or_path)
+    try:
+        ensure_schema(conn)
+        conn.execute(
+            """
+            INSERT INTO import_manifest (ingester, file_path, size, mtime, sha256, rows, imported_at, depends_on)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(ingester, file_path) DO UPDATE SET
+                size = excluded.size, mtime = excluded.mtime, sha256 = excluded.sha256,
+                rows = excluded.rows, imported_at = excluded.imported_at, depends_on = excluded.depends_on
+            """,
+            (ingester, _key(path), size, mtime, sha256, rows, datetime.now().isoformat(timespec="seconds"),
+             depends_on),
+        )
+        conn.commit()
+    finally:
+        if should_close:
+            conn.close()
+
+
+def import_once(
+    ingester: str,
+    path: str | Path,
+    do_import: Callable[[], T],
+    db_path: str | Path = DB_PATH,
+    force: bool = False,
+    depends_on: Optional[str] = None,
+) -> Optional[T]:
+    """
+    Run do_import() unless `path` is unchanged since `ingester` last imported it.
+    Returns do_import's result, or None when the file was skipped. The fingerprint
+    is taken before the import, so a file rewritten meanwhile is imported again.
+    depends_on is a digest of any other input that shapes the import (e.g.
+    prosthetic_codes_digest for exports filtered to prosthetic codes); when it
+    differs from the stored one the file is imported again.
+    """
+    if not force and is_unchanged(db_path, ingester, path, depends_on):
+        LOGGER.info("%s: %s unchanged since its last import, skipped", ingester, path)
+        return None
+    stat = Path(path).stat()
+    sha256 = sha256_file(path)
+    result = do_import()
+    record_import(
+        db_path, ingester, path, row_count(result),
+        size=stat.st_size, mtime=stat.st_mtime, sha256=sha256, depends_on=depends_on,
+    )
+    return result
@@ -0,0 +1,117 @@
+# neuro_core/neuropacks/health/protocheck/core/invoice_index.py
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ("patient_id", "code")
+
+
+def _to_days(values) -> np.ndarray:
+    """Convert date-like values to int64 day numbers (days since epoch)."""
+    return pd.to_datetime(values).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def _to_day(value) -> int:
+    """Scalar fast path of _to_days for ISO strings, dates and timestamps."""
+    try:
+        return int(np.datetime64(value, "D").astype(np.int64))
+    except (TypeError, ValueError):
+        return int(_to_days([value])[0])
+
+
+class InvoiceDateIndex:
+    """
+    In-memory index of dated rows (invoices, deleted acts, ...) keyed by
+    (patient_id, code), holding one sorted numpy array of days per key.
+
+    Built once per run in O(n log n); each window query is a hash lookup plus two
+    binary searches, O(log n). Dates are compared in whole days, matching the
+    DATE_FMT strings stored by the ingesters. Rows with a missing key or an
+    unparseable date are left out of the index.
+
+    Query results are positional row numbers into the frame given to the constructor.
+    """
+
+    def __init__(
+        self,
+        frame: pd.DataFrame,
+        key_columns: Sequence[str] = KEY_COLUMNS,
+        date_column: str = "date",
+    ) -> None:
+        self.key_columns = tuple(key_columns)
+        keys = frame[list(self.key_columns)]
+        days = pd.to_datetime(frame[date_column]).to_numpy().astype("datetime64[D]")
+        valid = keys.notna().all(axis=1).to_numpy() & ~np.isnat(days)
+        positions = np.flatnonzero(valid)
+
+        group_ids, self._keys = pd.MultiIndex.from_frame(keys[valid]).factorize()
+        days = days[valid].astype(np.int64)
+
+        order = np.lexsort((days, group_ids))
+        self._group_ids = group_ids[order]
+        self._days = days[order]
+        self._rows = positions[order]
+
+        n_groups = len(self._keys)
+        self._starts = np.searchsorted(self._group_ids, np.arange(n_groups), side="left")
+        self._ends = np.searchsorted(self._group_ids, np.arange(n_groups), side="right")
+        self._group_of = {key: gid for gid, key in enumerate(self._keys)}
+
+        # Composite (group, day) keys let vectorized queries binary-search all groups at once
+        if len(self._days):
+            self._min_day = int(self._days.min()) - 1
+            self._span = int(self._days.max()) + 2 - self._min_day
+        else:
+            self._min_day, self._span = 0, 1
+        self._composite = self._group_ids.astype(np.int64) * (self._span + 1) + (self._days - self._min_day)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def window(self, patient_id, code, start, end) -> np.ndarray:
+        """
+        Row positions for (patient_id, code) dated within [start, end], sorted by date.
+        """
+        gid = self._group_of.get((patient_id, code))
+        if gid is None:
+            return self._rows[:0]
+        lo, hi = self._starts[gid], self._ends[gid]
+        days = self._days[lo:hi]
+        first = lo + np.searchsorted(days, _to_day(start), side="left")
+        last = lo + np.searchsorted(days, _to_day(end), side="right")
+        return self._rows[first:last]
+
+    def has_in_window(self, patient_id, code, start, end) -> bool:
+        return len(self.window(patient_id, code, start, end)) > 0
+
+    def window_bounds(self, patient_ids, codes, starts, ends) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized window lookup for many queries at once. Returns (lo, hi) offsets
+        into the sorted index; query i matches sorted entries lo[i]:hi[i].
+        """
+        query_keys = pd.MultiIndex.from_arrays([np.asarray(patient_ids, dtype=object), np.asarray(codes, dtype=object)])
+        gids = self._keys.get_indexer(query_keys)
+        start_days = np.clip(_to_days(starts), self._min_day, self._min_day + self._span) - self._min_day
+        end_days = np.clip(_to_days(ends), self._min_day, self._min_day + self._span) - self._min_day
+        base = np.where(gids >= 0, gids, 0).astype(np.int64) * (self._span + 1)
+        lo = np.searchsorted(self._composite, base + start_days, side="left")
+        hi = np.searchsorted(self._composite, base + end_days, side="right")
+        missing = gids < 0
+        lo[missing] = 0
+        hi[missing] = 0
+        return lo, np.maximum(lo, hi)
+
+    def join_windows(self, patient_ids, codes, starts, ends) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized window join: returns (query_positions, row_positions) pairs, one
+        per indexed row falling inside the window of each query.
+        """
+        lo, hi = self.window_bounds(patient_ids, codes, starts, ends)
+        counts = hi - lo
+        query_positions = np.repeat(np.arange(len(lo)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return query_positions, self._rows[np.repeat(lo, counts) + offsets]
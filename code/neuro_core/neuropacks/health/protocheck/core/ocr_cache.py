@@ -0,0 +1,239 @@
+# neuro_core/neuropacks/health/protocheck/core/ocr_cache.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .constants import DB_PATH, OCR_CACHE_MAX_MB
+from .logger import get_logger
+from .schema import ensure_schema
+from .utils.file_hash import sha256_file
+
+LOGGER = get_logger(__name__)
+
+
+def _settings_hash(settings: dict) -> str:
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _default_ocr():
+    # Imported lazily: loading the OCR stack is only needed on a cache miss.
+    # Misses go to the shared OCR service when one is running.
+    from neuro_core.neuro_ai.ocr.main import ocr_settings
+    from neuro_core.neuro_ai.ocr.service import ocr_pages_via_service
+
+    return ocr_pages_via_service, ocr_settings()
+
+
+def _default_ocr_iter():
+    from neuro_core.neuro_ai.ocr.main import ocr_settings
+    from neuro_core.neuro_ai.ocr.service import iter_ocr_pages_via_service
+
+    return iter_ocr_pages_via_service, ocr_settings()
+
+
+class OcrCache:
+    """
+    Persistent OCR result cache in the ProtoCheck DB (table ocr_cache).
+
+    Entries are keyed by the SHA-256 of the file content plus a hash of the OCR
+    settings, so renamed or re-indexed scans still hit and a settings change misses.
+    Each entry holds the page texts and bounding boxes, either for the whole document
+    or (complete = 0) for the leading pages a lazy reader stopped after. When the
+    stored size of unpinned entries exceeds max_bytes, least recently used ones are
+    evicted; pinned entries (batch OCR output, see pin=) are kept whatever the size.
+    """
+
+    def __init__(self, db_path: str | Path = DB_PATH, max_bytes: int = OCR_CACHE_MAX_MB * 1024 * 1024) -> None:
+        self.db_path = str(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        with sqlite3.connect(self.db_path) as conn:
+            ensure_schema(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def key_for(content_sha256: str, settings: dict) -> str:
+        return f"{content_sha256}:{_settings_hash(settings)}"
+
+    def _entry(self, key: str) -> Optional[tuple[list[dict], bool]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT pages, complete FROM ocr_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE ocr_cache SET hits = hits + 1, last_access = ? WHERE cache_key = ?",
+                (time.time(), key),
+            )
+        return json.loads(row[0]), bool(row[1])
+
+    def get(self, key: str) -> Optional[list[dict]]:
+        """Pages of a complete entry, or None."""
+        entry = self._entry(key)
+        if entry is None or not entry[1]:
+            return None
+        return entry[0]
+
+    def put(self, key: str, pages: list[dict], complete: bool = True, pin: bool = False) -> None:
+        payload = json.dumps(pages, ensure_ascii=False)
+        content_sha256, settings_hash = key.split(":", 1)
+        with self._connect() as conn:
+            # A partial entry never replaces a complete or longer one
+            conn.execute(
+                """
+                INSERT INTO ocr_cache (cache_key, content_sha256, settings_hash, pages, complete, size_bytes,
+                                       hits, created_at, last_access, pinned)
+                VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    pages=excluded.pages,
+                    complete=excluded.complete,
+                    size_bytes=excluded.size_bytes,
+                    last_access=excluded.last_access,
+                    pinned=MAX(ocr_cache.pinned, excluded.pinned)
+                WHERE excluded.complete = 1
+                   OR (ocr_cache.complete = 0
+                       AND json_array_length(excluded.pages) > json_array_length(ocr_cache.pages))
+                """,
+                (key, content_sha256, settings_hash, payload, int(complete), len(payload.encode("utf-8")),
+                 datetime.now().isoformat(timespec="seconds"), time.time(), int(pin)),
+            )
+            self._evict(conn)
+
+    def pin(self, key: str) -> None:
+        """Exempt an entry from eviction."""
+        with self._connect() as conn:
+            conn.execute("UPDATE ocr_cache SET pinned = 1 WHERE cache_key = ?", (key,))
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (total,) = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM ocr_cache WHERE pinned = 0").fetchone()
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute(
+            "SELECT cache_key, size_bytes FROM ocr_cache WHERE pinned = 0 ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM ocr_cache WHERE cache_key = ?", (key,))
+            total -= size
+            evicted += 1
+        with self._lock:
+            self.evictions += evicted
+        LOGGER.info("OCR cache: evicted %d entries (size now %d bytes)", evicted, total)
+
+    def ocr_pages(
+        self,
+        file_path: str | Path,
+        compute: Optional[Callable[[str], list[dict]]] = None,
+        settings: Optional[dict] = None,
+        pin: bool = False,
+    ) -> list[dict]:
+        """
+        Return OCR pages for a file, running `compute` (default: the EasyOCR pipeline)
+        only on a cache miss. pin=True keeps the entry out of eviction.
+        """
+        if compute is None or settings is None:
+            default_compute, default_settings = _default_ocr()
+            compute = compute or default_compute
+            settings = default_settings if settings is None else settings
+
+        key = self.key_for(sha256_file(file_path), settings)
+        pages = self.get(key)
+        if pages is not None:
+            with self._lock:
+                self.hits += 1
+            if pin:
+                self.pin(key)
+            return pages
+
+        with self._lock:
+            self.misses += 1
+        pages = compute(str(file_path))
+        self.put(key, pages, pin=pin)
+        return pages
+
+    def iter_pages(
+        self,
+        file_path: str | Path,
+        compute: Optional[Callable[[str, int], Iterator[dict]]] = None,
+        settings: Optional[dict] = None,
+    ) -> Iterator[dict]:
+        """
+        Yield OCR pages lazily. Cached pages (a complete entry or a stored prefix) are
+        served first; `compute(path, first_page)` (default: page-by-page OCR) is only
+        started for pages past them. When the caller stops early, the pages read so
+        far are stored as a prefix for the next reader.
+        """
+        if compute is None or settings is None:
+            default_compute, default_settings = _default_ocr_iter()
+            compute = compute or default_compute
+            settings = default_settings if settings is None else settings
+
+        key = self.key_for(sha256_file(file_path), settings)
+        cached, complete = self._entry(key) or ([], False)
+        computed = False
+        pages = list(cached)
+        try:
+            yield from cached
+            if complete:
+                return
+            computed = True
+            for page in compute(str(file_path), len(cached) + 1):
+                pages.append(page)
+                yield page
+            complete = True
+        finally:
+            with self._lock:
+                if computed:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            if len(pages) > len(cached) or (complete and computed):
+                self.put(key, pages, complete=complete)
+
+    def ocr_texts(self, file_path: str | Path, **kwargs) -> list[str]:
+        return [page["text"] for page in self.ocr_pages(file_path, **kwargs)]
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries, size, pinned = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(pinned), 0) FROM ocr_cache"
+            ).fetchone()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "size_bytes": size,
+                "pinned": pinned,
+            }
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM ocr_cache")
+
+
+_CACHES: dict[str, OcrCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_ocr_cache(db_path: str | Path = DB_PATH) -> OcrCache:
+    """Process-wide cache on a ProtoCheck DB (the default one unless given)."""
+    key = str(Path(db_path).resolve())
+    with _CACHES_LOCK:
+        if key not in _CACHES:
+            _CACHES[key] = OcrCache(db_path)
+        return _CACHES[key]
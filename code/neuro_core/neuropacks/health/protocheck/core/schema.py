@@ -2,6 +2,7 @@ from pathlib import Path
 import sqlite3
 from .logger import get_logger
 from .constants import DB_PATH
+from .doc_index import DOC_INDEX_TRIGGERS
 from typing import Optional
 
 LOGGER = get_logger(__name__)
@@ -29,7 +30,8 @@ DDL = [
         code TEXT,
         label TEXT,
         amount REAL,
-        source_file TEXT
+        source_file TEXT,
+        row_hash TEXT          -- content hash for de-duplication, see core/upsert.py
     );
     """,
     # Issued invoices (raw import)
@@ -55,7 +57,22 @@ DDL = [
         patient_id TEXT,
         doc_type TEXT,
         file_path TEXT,
-        date TEXT
+        date TEXT,
+        row_hash TEXT          -- content hash for de-duplication, see core/upsert.py
+    );
+    """,
+    # Per-patient document availability: one bit per doc_type (see core/doc_index.py)
+    # plus the latest scan date of each type. Maintained by upsert_scans, and by
+    # DOC_INDEX_TRIGGERS when scans are deleted or edited.
+    """
+    CREATE TABLE IF NOT EXISTS patient_documents (
+        patient_id TEXT PRIMARY KEY,
+        doc_mask INTEGER NOT NULL DEFAULT 0,
+        last_lab_sheet TEXT,
+        last_signed_quote TEXT,
+        last_pec TEXT,
+        last_insurance_card TEXT,
+        last_insurance_claim TEXT
     );
     """,
     # Quotes table to support deleted/proposed/accepted quotes logic
@@ -74,8 +91,248 @@ DDL = [
         PRIMARY KEY (quote_id, code)
     );
     """,
+    # Structured fields parsed once from each scanned lab sheet (joined to scans on file_path).
+    # A re-parse replaces the row, which marks its patient in patient_changes.
+    """
+    CREATE TABLE IF NOT EXISTS lab_sheet_fields (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        file_path TEXT NOT NULL UNIQUE,
+        content_sha256 TEXT,
+        patient_id TEXT,
+        material TEXT,         -- zirconia | ceramic | resin | metal
+        teeth TEXT,            -- comma-separated FDI tooth numbers
+        lab_name TEXT,
+        sheet_date TEXT,
+        delivery_date TEXT,
+        confidence REAL,       -- OCR confidence of the material reading (1.0 for a text layer)
+        extracted_at TEXT
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_lab_sheet_fields_patient ON lab_sheet_fields (patient_id, material);",
+    # Materialized Feature 1 results, refreshed incrementally per patient
+    """
+    CREATE TABLE IF NOT EXISTS feature1_findings (
+        patient_id TEXT,
+        sheet_rowid INTEGER,   -- scans.rowid of the lab sheet
+        code_rowid INTEGER,    -- ccam_prosthetics.rowid
+        invoice_rowid INTEGER, -- invoices.rowid, -1 when no invoice matched
+        sheet_date TEXT,
+        patient TEXT,
+        quote_material TEXT,
+        lab_material TEXT,
+        controlled TEXT,
+        validated TEXT,
+        status TEXT
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_feature1_findings_patient ON feature1_findings (patient_id);",
+    "CREATE INDEX IF NOT EXISTS idx_feature1_findings_date ON feature1_findings (sheet_date);",
+    # Latest change per patient across the Feature 1 source tables, kept by
+    # mark_patient_changes and the CHANGE_TRIGGERS below. AUTOINCREMENT ids are never
+    # reused, so MAX(id) only grows:
+    # it is the incremental refresh's watermark, whether rows were inserted, edited in
+    # place, replaced or deleted.
+    """
+    CREATE TABLE IF NOT EXISTS patient_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        patient_id TEXT NOT NULL UNIQUE
+    );
+    """,
+    # Per-check change watermarks over the source tables
+    """
+    CREATE TABLE IF NOT EXISTS check_watermarks (
+        check_name TEXT,
+        table_name TEXT,
+        watermark TEXT,
+        updated_at TEXT,
+        PRIMARY KEY (check_name, table_name)
+    );
+    """,
+    # Findings of every validation run, keyed by check + identifying fields
+    """
+    CREATE TABLE IF NOT EXISTS findings (
+        finding_key TEXT PRIMARY KEY,  -- sha256, see checks/findings_store.finding_keys
+        check_name TEXT,
+        patient_id TEXT,
+        flag TEXT,
+        details TEXT,          -- JSON: the check's own fields
+        first_seen TEXT,
+        last_seen TEXT,
+        resolved_at TEXT       -- NULL while the latest run still reports it
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_findings_check_open ON findings (check_name, resolved_at);",
+    "CREATE INDEX IF NOT EXISTS idx_findings_patient ON findings (patient_id);",
+    # One row per stored run: how many findings appeared, persisted and were resolved
+    """
+    CREATE TABLE IF NOT EXISTS finding_runs (
+        run_id TEXT,
+        ran_at TEXT,
+        checks TEXT,           -- comma-separated check names
+        new INTEGER,
+        persisting INTEGER,
+        resolved INTEGER
+    );
+    """,
+    # Fingerprints of imported files, so an unchanged file is not imported again
+    """
+    CREATE TABLE IF NOT EXISTS import_manifest (
+        ingester TEXT,         -- ccam | invoices | deleted | quotes | scans
+        file_path TEXT,        -- resolved absolute path
+        size INTEGER,
+        mtime REAL,
+        sha256 TEXT,
+        rows INTEGER,          -- rows the import reported
+        imported_at TEXT,
+        depends_on TEXT,       -- digest of other inputs of the import (e.g. the CCAM codes)
+        PRIMARY KEY (ingester, file_path)
+    );
+    """,
+    # OCR results keyed by file content hash + OCR settings
+    """
+    CREATE TABLE IF NOT EXISTS ocr_cache (
+        cache_key TEXT PRIMARY KEY,
+        content_sha256 TEXT,
+        settings_hash TEXT,
+        pages TEXT,            -- JSON: [{"text": ..., "boxes": [...]}, ...]
+        complete INTEGER NOT NULL DEFAULT 1,  -- 0: pages is a prefix of the document
+        size_bytes INTEGER,
+        hits INTEGER DEFAULT 0,
+        created_at TEXT,
+        last_access REAL,
+        pinned INTEGER NOT NULL DEFAULT 0     -- 1: never evicted (batch OCR output)
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_access ON ocr_cache (last_access);",
+    # Checkpoints of batch OCR runs, so an interrupted run resumes where it stopped
+    """
+    CREATE TABLE IF NOT EXISTS ocr_batch_files (
+        run_id TEXT,
+        file_path TEXT,
+        status TEXT,           -- pending | done | failed
+        pages INTEGER,
+        error TEXT,
+        updated_at TEXT,
+        PRIMARY KEY (run_id, file_path)
+    );
+    """,
+]
+
+# Tables whose changes mark a patient in patient_changes
+CHANGE_TRACKED_TABLES = ("scans", "invoices", "deleted_acts", "lab_sheet_fields")
+
+
+def _touch_patient(row: str) -> str:
+    # Delete then insert rather than INSERT OR REPLACE: the conflict policy of an outer
+    # statement (UPDATE OR IGNORE, ...) would override the trigger's
+    return f"""
+        DELETE FROM patient_changes WHERE patient_id = {row}.patient_id;
+        INSERT INTO patient_changes (patient_id) SELECT {row}.patient_id WHERE {row}.patient_id IS NOT NULL;
+    """
+
+
+# Edits and deletes are marked row by row. Inserts are not: a row trigger made a bulk
+# import of 1M invoice rows 53% slower, where marking the inserted rows' patients in one
+# statement afterwards (mark_patient_changes, from upsert_rows and the lab sheet
+# fields upsert) costs 6%. Other writers inserting rows call it themselves.
+CHANGE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_patient_changes
+    AFTER {event} ON {table}
+    BEGIN
+        {"".join(_touch_patient(row) for row in rows)}
+    END;
+    """
+    for table in CHANGE_TRACKED_TABLES
+    for event, rows in (("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",)))
+]
+DDL += CHANGE_TRIGGERS
+# Row-level insert triggers of databases created before mark_patient_changes
+DDL += [f"DROP TRIGGER IF EXISTS trg_{table}_insert_patient_changes;" for table in CHANGE_TRACKED_TABLES]
+DDL += DOC_INDEX_TRIGGERS
+
+# Columns added after a table first shipped: (table, column, declaration).
+# ensure_schema adds them to databases created before they existed.
+COLUMNS = [
+    ("ocr_cache", "complete", "INTEGER NOT NULL DEFAULT 1"),
+    ("ocr_cache", "pinned", "INTEGER NOT NULL DEFAULT 0"),
+    ("scans", "row_hash", "TEXT"),
+    ("deleted_acts", "row_hash", "TEXT"),
+    # Content hash of keyed rows whose key is incomplete (NULL), see core/upsert.py
+    ("invoices", "row_hash", "TEXT"),
+    ("quotes", "row_hash", "TEXT"),
+    ("import_manifest", "depends_on", "TEXT"),
+]
+
+# Indexes over migrated columns, created once COLUMNS have been added
+COLUMN_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_scans_row_hash ON scans (row_hash);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_deleted_acts_row_hash ON deleted_acts (row_hash);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_invoices_row_hash ON invoices (row_hash);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_quotes_row_hash ON quotes (row_hash);",
+]
+
+# Covering indexes for the Feature 1 lab sheet / invoice window / deleted act lookups.
+# Kept apart from DDL so checks can create them on databases built by older versions.
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_scans_doc_type_date ON scans (doc_type, date, patient_id);",
+    """
+    CREATE INDEX IF NOT EXISTS idx_invoices_patient_code_date
+    ON invoices (patient_id, code, date, invoice_no, fse_no, patient_name);
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_deleted_acts_patient_code ON deleted_acts (patient_id, code);",
+    "CREATE INDEX IF NOT EXISTS idx_scans_patient_doc_type ON scans (patient_id, doc_type);",
+    # Deleted-quote flow: deleted quotes, then the latest lab sheet per patient
+    "CREATE INDEX IF NOT EXISTS idx_quotes_status ON quotes (status, patient_id, code);",
+    "CREATE INDEX IF NOT EXISTS idx_scans_patient_doc_type_date ON scans (patient_id, doc_type, date, file_path);",
+    # Duplicate quotes after deletion: quotes pre-sorted by window partition and date
+    """
+    CREATE INDEX IF NOT EXISTS idx_quotes_partition_date
+    ON quotes (patient_id, doctor_id, code, tooth_number, declared_material, date);
+    """,
 ]
 
+
+def mark_patient_changes(conn: sqlite3.Connection, select: str, params=()) -> None:
+    """
+    Mark the patients returned by `select` (a query of one patient_id column) in
+    patient_changes: two statements, however many rows the query returns.
+    """
+    conn.execute(f"DELETE FROM patient_changes WHERE patient_id IN ({select})", params)
+    conn.execute(
+        f"INSERT INTO patient_changes (patient_id) SELECT DISTINCT patient_id FROM ({select}) "
+        "WHERE patient_id IS NOT NULL",
+        params,
+    )
+
+
+def ensure_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Create the query-support indexes (idempotent).
+    """
+    cur = conn.cursor()
+    for stmt in INDEXES:
+        cur.execute(stmt)
+    conn.commit()
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """
+    Create any missing table or index on an open connection (idempotent).
+    """
+    cur = conn.cursor()
+    for stmt in DDL:
+        cur.execute(stmt)
+    for table, column, decl in COLUMNS:
+        existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    for stmt in COLUMN_INDEXES:
+        cur.execute(stmt)
+    conn.commit()
+    ensure_indexes(conn)
+
+
 def init_db(db_path: Optional[str] = None) -> str:
     """
     Create (or migrate) the ProtoCheck DB. Returns the DB path used.
@@ -83,9 +340,6 @@ def init_db(db_path: Optional[str] = None) -> str:
     path = Path(db_path) if db_path else Path(DB_PATH)
     path.parent.mkdir(parents=True, exist_ok=True)
     with sqlite3.connect(path) as conn:
-        cur = conn.cursor()
-        for stmt in DDL:
-            cur.execute(stmt)
-        conn.commit()
+        ensure_schema(conn)
     LOGGER.info("ProtoCheck database initialized at %s", path)
     return str(path)
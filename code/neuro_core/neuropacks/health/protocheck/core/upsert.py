@@ -0,0 +1,205 @@
+# neuro_core/neuropacks/health/protocheck/core/upsert.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from .constants import DATE_FMT
+from .logger import get_logger
+from .schema import CHANGE_TRACKED_TABLES, ensure_schema, mark_patient_changes
+
+LOGGER = get_logger(__name__)
+
+# Natural key of each imported table. None: no key, rows are de-duplicated on a
+# hash of their content (row_hash, unique). Rows of a keyed table with a NULL key
+# part (never equal in SQL) fall back to the same content hash.
+UPSERT_KEYS = {
+    "invoices": ("invoice_no", "code"),
+    "quotes": ("quote_id", "code"),
+    "scans": None,
+    "deleted_acts": None,
+}
+
+HASH_COLUMN = "row_hash"
+# Provenance, not content: the same act re-exported in another file is the same row
+HASH_EXCLUDED = ("source_file",)
+
+STAGE_CHUNK_SIZE = 10_000
+
+
+def _open(conn_or_path):
+    if isinstance(conn_or_path, (str, Path)):
+        return sqlite3.connect(str(conn_or_path)), True
+    return conn_or_path, False
+
+
+def _row_hash(*values) -> str:
+    return hashlib.sha256(json.dumps(values, default=str).encode("utf-8")).hexdigest()
+
+
+def _content_columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    """Table columns minus the row_hash and an INTEGER PRIMARY KEY (rowid alias)."""
+    info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    pk = [r for r in info if r[5]]
+    rowid_alias = {pk[0][1]} if len(pk) == 1 and pk[0][2].upper() == "INTEGER" else set()
+    return [r[1] for r in info if r[1] != HASH_COLUMN and r[1] not in rowid_alias]
+
+
+def _date_text(value):
+    return value.strftime(DATE_FMT) if isinstance(value, date) and not pd.isna(value) else value
+
+
+def to_date_text(column: pd.Series) -> pd.Series:
+    """
+    The datetime values of a column (read_excel and openpyxl yield Timestamps and
+    datetimes) as DATE_FMT text, like the dates of CSV imports; NaT becomes NaN and
+    other values are left as they are.
+    """
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.dt.strftime(DATE_FMT)
+    if column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) not in ("string", "empty"):
+        return column.map(_date_text)
+    return column
+
+
+def _bindable(df: pd.DataFrame) -> pd.DataFrame:
+    """Values sqlite3 can bind: datetimes as DATE_FMT text (to_date_text), NaN / NaT as None."""
+    values = pd.DataFrame(
+        {name: to_date_text(column).astype(object) for name, column in df.items()},
+        index=df.index, columns=df.columns,
+    )
+    return values.where(values.notna(), None)
+
+
+def _hash_expr(content: list[str]) -> str:
+    return f"row_hash({', '.join(c for c in content if c not in HASH_EXCLUDED)})"
+
+
+def _stage(conn: sqlite3.Connection, table: str, df: pd.DataFrame, columns: list[str], chunk_size: int) -> str:
+    stage = f"stage_{table}"
+    conn.execute(f"DROP TABLE IF EXISTS temp.{stage}")
+    # Same column affinities as the target, so staged values compare like stored ones
+    conn.execute(f"CREATE TEMP TABLE {stage} AS SELECT * FROM main.{table} WHERE 0")
+    insert = f"INSERT INTO {stage} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    values = _bindable(df[columns])
+    for start in range(0, len(values), chunk_size):
+        conn.executemany(insert, values.iloc[start:start + chunk_size].itertuples(index=False, name=None))
+    return stage
+
+
+def _backfill_hashes(conn, table: str, content: list[str], where: str = "1") -> None:
+    # Rows written by other means (older versions, direct SQL) get their hash first;
+    # those that turn out to be duplicates are dropped
+    pending = f"{HASH_COLUMN} IS NULL AND ({where})"
+    if conn.execute(f"SELECT 1 FROM {table} WHERE {pending} LIMIT 1").fetchone():
+        conn.execute(f"UPDATE OR IGNORE {table} SET {HASH_COLUMN} = {_hash_expr(content)} WHERE {pending}")
+        dropped = conn.execute(f"DELETE FROM {table} WHERE {pending}").rowcount
+        if dropped:
+            LOGGER.info("Removed %d duplicate rows from %s", dropped, table)
+
+
+def _insert_staged(conn, table: str, stage: str, columns: list[str]) -> int:
+    # New rows get rowids past the current maximum: their patients are marked for the
+    # incremental checks in one pass (schema.mark_patient_changes), not by a row trigger
+    (last_rowid,) = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()
+    written = conn.execute(
+        f"""
+        INSERT INTO {table} ({', '.join(columns)}, {HASH_COLUMN})
+        SELECT {', '.join(columns)}, {HASH_COLUMN} FROM {stage} WHERE true
+        ON CONFLICT DO NOTHING
+        """
+    ).rowcount
+    if written and table in CHANGE_TRACKED_TABLES:
+        mark_patient_changes(conn, f"SELECT patient_id FROM {table} WHERE rowid > ?", (last_rowid,))
+    return written
+
+
+def _merge_keyed(conn, table: str, stage: str, key: tuple, content: list[str], columns: list[str]) -> dict:
+    # A changed row is deleted and re-inserted rather than updated in place: the delete
+    # trigger (schema.CHANGE_TRIGGERS) marks its old patient, _insert_staged the new one.
+    # Rows with a NULL key part never match a key: they are kept or skipped on their
+    # content hash instead (unique row_hash, NULL for complete keys).
+    null_key = " OR ".join(f"{k} IS NULL" for k in key)
+    _backfill_hashes(conn, table, content, null_key)
+    conn.execute(f"UPDATE {stage} SET {HASH_COLUMN} = {_hash_expr(content)} WHERE {null_key}")
+    match = " AND ".join(f"t.{k} = s.{k}" for k in key)
+    stored = ", ".join(f"t.{c}" for c in columns)
+    staged = ", ".join(f"s.{c}" for c in columns)
+    updated = conn.execute(
+        f"""
+        DELETE FROM {table} WHERE rowid IN (
+            SELECT t.rowid FROM {table} t JOIN {stage} s ON {match}
+            WHERE ({stored}) IS NOT ({staged})
+        )
+        """
+    ).rowcount
+    written = _insert_staged(conn, table, stage, columns)
+    return {"inserted": written - updated, "updated": updated}
+
+
+def _merge_hashed(conn, table: str, stage: str, content: list[str], columns: list[str]) -> dict:
+    _backfill_hashes(conn, table, content)
+    conn.execute(f"UPDATE {stage} SET {HASH_COLUMN} = {_hash_expr(content)}")
+    written = _insert_staged(conn, table, stage, columns)
+    return {"inserted": written, "updated": 0}
+
+
+def upsert_rows(
+    conn_or_path, table: str, df: pd.DataFrame, chunk_size: int = STAGE_CHUNK_SIZE, key: Optional[tuple] = None
+) -> dict:
+    """
+    Idempotently merge df into an imported table, in one transaction: rows are staged
+    in a temp table with the target's column affinities, then merged with a single
+    INSERT ... SELECT ... ON CONFLICT.
+
+    Keyed tables (UPSERT_KEYS) insert new keys and replace rows whose content changed
+    (the last row wins for a key repeated in df). Tables without a key, and rows with
+    a NULL key part, skip any row whose content hash (all columns but source_file) is
+    already stored.
+    Returns {"inserted", "updated", "unchanged"}.
+    """
+    key = key or UPSERT_KEYS[table]
+    conn, should_close = _open(conn_or_path)
+    try:
+        ensure_schema(conn)
+        conn.create_function("row_hash", -1, _row_hash, deterministic=True)
+        content = _content_columns(conn, table)
+        columns = [c for c in content if c in df.columns]
+        if key:
+            missing = set(key) - set(columns)
+            if missing:
+                raise ValueError(f"Missing key columns for {table}: {missing}")
+            # NaN key parts compare equal in pandas but not in SQL: only complete keys collapse
+            complete = df[list(key)].notna().all(axis=1)
+            df = df[~(complete & df.duplicated(subset=list(key), keep="last"))]
+
+        conn.commit()
+        conn.execute("BEGIN")
+        try:
+            stage = _stage(conn, table, df, columns, chunk_size)
+            if key:
+                stats = _merge_keyed(conn, table, stage, key, content, columns)
+            else:
+                stats = _merge_hashed(conn, table, stage, content, columns)
+            conn.execute(f"DROP TABLE temp.{stage}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    finally:
+        if should_close:
+            conn.close()
+
+    stats["unchanged"] = len(df) - stats["inserted"] - stats["updated"]
+    LOGGER.info(
+        "Upserted %d rows into %s: %d inserted, %d updated, %d unchanged",
+        len(df), table, stats["inserted"], stats["updated"], stats["unchanged"],
+    )
+    return stats
@@ -0,0 +1,13 @@
+import hashlib
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path, chunk_size: int = CHUNK_SIZE) -> str:
+    """SHA-256 of a file's content, read in fixed-size chunks (constant memory)."""
+    digest = hashlib.sha256()
+    with open(Path(path), "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
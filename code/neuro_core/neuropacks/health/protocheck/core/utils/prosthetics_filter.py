@@ -1,8 +1,84 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
 import pandas as pd
 import sqlite3
 from neuro_core.neuropacks.health.protocheck.core.constants import DB_PATH
 
+# Process-wide prosthetic code registry, per database. Each entry keeps its own
+# connection: PRAGMA data_version on it changes whenever another connection (of this
+# process or any other) commits, so the codes are only re-read after a write and a
+# CCAM import by another process is never missed. upsert_ccam still drops the entry
+# of the database it changed (invalidate_prosthetic_codes).
+_LOCK = threading.Lock()
+
+
+@dataclass
+class _Entry:
+    conn: sqlite3.Connection
+    data_version: int
+    codes: frozenset
+    index: pd.Index
+
+
+_CODES: dict[str, _Entry] = {}
+
+
+def _key(db_path) -> str:
+    return str(Path(db_path).resolve())
+
+
+def _read_codes(conn: sqlite3.Connection) -> list:
+    return [row[0] for row in conn.execute("SELECT code FROM ccam_prosthetics")]
+
+
+def _registry(db_path) -> _Entry:
+    key = _key(db_path)
+    with _LOCK:
+        entry = _CODES.get(key)
+        if entry is None:
+            conn = sqlite3.connect(str(db_path), check_same_thread=False)
+            entry = _CODES[key] = _Entry(conn, -1, frozenset(), pd.Index([], dtype=object))
+        (data_version,) = entry.conn.execute("PRAGMA data_version").fetchone()
+        if data_version != entry.data_version:
+            codes = _read_codes(entry.conn)
+            entry.data_version = data_version
+            if frozenset(codes) != entry.codes:
+                entry.codes, entry.index = frozenset(codes), pd.Index(codes, dtype=object)
+        return entry
+
+
+def prosthetic_codes(db_path: str = DB_PATH) -> frozenset:
+    """CCAM prosthetic codes of the database, re-read only after the database changed."""
+    return _registry(db_path).codes
+
+
+def prosthetic_codes_digest(db_path: str = DB_PATH) -> str:
+    """SHA-256 of the prosthetic codes: what an import filtered with filter_prosthetics depends on."""
+    return hashlib.sha256("\n".join(sorted(prosthetic_codes(db_path))).encode("utf-8")).hexdigest()
+
+
+def load_prosthetic_codes(conn: sqlite3.Connection) -> frozenset:
+    """
+    prosthetic_codes() of the database `conn` is open on (e.g. as a ValidationSession
+    loader). An in-memory database has no registry entry: its codes are read directly.
+    """
+    db_file = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+    return prosthetic_codes(db_file) if db_file else frozenset(_read_codes(conn))
+
+
+def invalidate_prosthetic_codes(db_path: Optional[str] = None) -> None:
+    """Drop the cached codes of one database (all databases when db_path is None)."""
+    with _LOCK:
+        keys = list(_CODES) if db_path is None else [_key(db_path)]
+        for key in keys:
+            entry = _CODES.pop(key, None)
+            if entry is not None:
+                entry.conn.close()
+
+
 def filter_prosthetics(df: pd.DataFrame, db_path: str = DB_PATH) -> pd.DataFrame:
-    with sqlite3.connect(db_path) as conn:
-        prosthetics = pd.read_sql("SELECT code FROM ccam_prosthetics", conn)['code'].tolist()
-    return df[df["code"].isin(prosthetics)].copy()
+    return df[df["code"].isin(_registry(db_path).index)].copy()
@@ -24,6 +24,8 @@ import sqlite3
 
 from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
 from neuro_core.neuropacks.health.protocheck.core.constants import DB_PATH
+from neuro_core.neuropacks.health.protocheck.core.schema import ensure_schema
+from neuro_core.neuropacks.health.protocheck.core.utils.prosthetics_filter import invalidate_prosthetic_codes
 
 LOGGER = get_logger(__name__)
 
@@ -185,52 +187,81 @@ def load_ccam_from_txt(path: str | Path, delimiter: str = ";") -> "pandas.DataFr
     return df
 
 
-def upsert_ccam(df: "pandas.DataFrame", db_path: Optional[str] = None) -> int:
+# Rows per executemany call in bulk_upsert_ccam
+CCAM_CHUNK_SIZE = 5000
+
+_UPSERT_SQL = """
+INSERT INTO ccam_prosthetics (code, label, is_prosthetic, materials, basket)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(code) DO UPDATE SET
+    label=excluded.label,
+    is_prosthetic=excluded.is_prosthetic,
+    materials=excluded.materials,
+    basket=excluded.basket
+WHERE (label, is_prosthetic, materials, basket)
+    IS NOT (excluded.label, excluded.is_prosthetic, excluded.materials, excluded.basket)
+"""
+
+
+def _ccam_rows(df: "pandas.DataFrame", chunk_size: int) -> Iterable[list[tuple]]:
+    frame = pd.DataFrame({
+        "code": df["code"],
+        "label": df["label"],
+        "is_prosthetic": df["is_prosthetic"].astype(int) if "is_prosthetic" in df.columns else 1,
+        "materials": df["materials"] if "materials" in df.columns else "",
+        "basket": df["basket"] if "basket" in df.columns else "",
+    })
+    for start in range(0, len(frame), chunk_size):
+        yield list(frame.iloc[start:start + chunk_size].itertuples(index=False, name=None))
+
+
+def bulk_upsert_ccam(
+    df: "pandas.DataFrame", db_path: Optional[str] = None, chunk_size: int = CCAM_CHUNK_SIZE
+) -> dict:
     """
-    Upsert CCAM rows into SQLite. Returns number of rows written.
-    Uses INSERT OR REPLACE on PRIMARY KEY (code).
+    Upsert CCAM rows in chunks of executemany, inside one transaction.
+    Rows identical to the stored ones are not rewritten. Any change invalidates the
+    cached prosthetic code registry (core.utils.prosthetics_filter).
+    Returns {"inserted", "updated", "unchanged"}.
     """
     if pd is None:
         raise RuntimeError("pandas is required to upsert CCAM")
 
     db = Path(db_path) if db_path else Path(DB_PATH)
     db.parent.mkdir(parents=True, exist_ok=True)
-    written = 0
     with sqlite3.connect(db) as conn:
-        cur = conn.cursor()
-        # Ensure table exists (idempotent if schema.init_db already ran)
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS ccam_prosthetics (
-                code TEXT PRIMARY KEY,
-                label TEXT,
-                is_prosthetic INTEGER NOT NULL,
-                materials TEXT,
-                basket TEXT
-            );
-            """
-        )
-        rows = df.to_dict("records")
-        for r in rows:
-            cur.execute(
-                """
-                INSERT INTO ccam_prosthetics (code, label, is_prosthetic, materials, basket)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(code) DO UPDATE SET
-                    label=excluded.label,
-                    is_prosthetic=excluded.is_prosthetic,
-                    materials=excluded.materials,
-                    basket=excluded.basket
-                """,
-                (
-                    r["code"],
-                    r["label"],
-                    int(r.get("is_prosthetic", 1)),
-                    r.get("materials", ""),
-                    r.get("basket", ""),
-                ),
-            )
-            written += 1
+        ensure_schema(conn)
+        # Connection-scoped bulk-load settings; durability comes from the single commit
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        (before,) = conn.execute("SELECT COUNT(*) FROM ccam_prosthetics").fetchone()
+        changes_before = conn.total_changes
+        conn.execute("BEGIN")
+        try:
+            for chunk in _ccam_rows(df, chunk_size):
+                conn.executemany(_UPSERT_SQL, chunk)
+        except Exception:
+            conn.rollback()
+            raise
         conn.commit()
-    LOGGER.info("Upserted %d CCAM rows into %s", written, db)
-    return written
+        changed = conn.total_changes - changes_before
+        (after,) = conn.execute("SELECT COUNT(*) FROM ccam_prosthetics").fetchone()
+    if changed:
+        invalidate_prosthetic_codes(str(db))
+
+    stats = {"inserted": after - before, "updated": changed - (after - before)}
+    stats["unchanged"] = len(df) - stats["inserted"] - stats["updated"]
+    LOGGER.info(
+        "Upserted %d CCAM rows into %s: %d inserted, %d updated, %d unchanged",
+        len(df), db, stats["inserted"], stats["updated"], stats["unchanged"],
+    )
+    return stats
+
+
+def upsert_ccam(df: "pandas.DataFrame", db_path: Optional[str] = None) -> int:
+    """
+    Upsert CCAM rows into SQLite. Returns number of rows written.
+    Uses INSERT ... ON CONFLICT on PRIMARY KEY (code); see bulk_upsert_ccam.
+    """
+    bulk_upsert_ccam(df, db_path)
+    return len(df)
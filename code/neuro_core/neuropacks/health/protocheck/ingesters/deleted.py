@@ -1,7 +1,7 @@
 import pandas as pd
-import sqlite3
-from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE
-from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE, IMPORT_CHUNK_ROWS
+from neuro_core.neuropacks.health.protocheck.core.upsert import upsert_rows
+from neuro_core.neuropacks.health.protocheck.ingesters.streaming import stream_import
 
 EXPECTED_COLUMNS = [
     "date", "patient_id", "patient_name", "doctor_id", "doctor_name",
@@ -16,7 +16,26 @@ def load_deleted_from_file(path: str) -> pd.DataFrame:
         raise ValueError(f"Missing columns in deleted acts file: {missing}")
     return df[EXPECTED_COLUMNS]
 
-def upsert_deleted_acts(df: pd.DataFrame, db_path: str = DB_FILE):
-    with sqlite3.connect(db_path) as conn:
-        df.to_sql("deleted_acts", conn, if_exists="append", index=False)
-        get_logger.info(f"{len(df)} deleted acts inserted into database.")
+def upsert_deleted_acts(df: pd.DataFrame, db_path: str = DB_FILE) -> dict:
+    """
+    Idempotent import into deleted_acts: exact duplicates (same content hash) are skipped.
+    Returns {"inserted", "updated", "unchanged"}.
+    """
+    return upsert_rows(db_path, "deleted_acts", df)
+
+
+def stream_deleted_from_file(
+    path: str,
+    db_path: str = DB_FILE,
+    chunksize: int = IMPORT_CHUNK_ROWS,
+    prosthetics_only: bool = True,
+    on_progress=None,
+) -> dict:
+    """
+    Stream a deleted acts export into the DB in chunks of `chunksize` rows, keeping
+    prosthetic codes only (see ingesters.streaming.stream_import).
+    """
+    return stream_import(
+        path, "deleted_acts", EXPECTED_COLUMNS, "deleted acts",
+        db_path=db_path, chunksize=chunksize, prosthetics_only=prosthetics_only, on_progress=on_progress,
+    )
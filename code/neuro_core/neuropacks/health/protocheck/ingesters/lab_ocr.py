@@ -1,5 +1,5 @@
 from pathlib import Path
-from neuro_core.neuro_ai.ocr.main import ocr_from_file
+from neuro_core.neuropacks.health.protocheck.core.ocr_cache import get_ocr_cache
 from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -8,7 +8,8 @@ logger = get_logger(__name__)
 def extract_lab_sheet_texts(file_path: str) -> list[str]:
     """
     Use OCR to extract text from a lab sheet image or PDF.
-    Returns a list of strings, one per page.
+    Returns a list of strings, one per page. Results are served from the OCR cache
+    when the file content and OCR settings are unchanged.
     """
     file = Path(file_path)
     if not file.exists():
@@ -16,7 +17,7 @@ def extract_lab_sheet_texts(file_path: str) -> list[str]:
 
     logger.info("Running OCR on file: %s", file_path)
     try:
-        texts = ocr_from_file(file_path)
+        texts = get_ocr_cache().ocr_texts(file_path)
         logger.info("OCR completed. %d pages extracted.", len(texts))
         return texts
     except Exception as e:
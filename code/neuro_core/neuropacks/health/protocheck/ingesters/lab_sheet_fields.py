@@ -0,0 +1,198 @@
+# neuro_core/neuropacks/health/protocheck/ingesters/lab_sheet_fields.py
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.core.constants import DATE_FMT, DB_PATH, DOC_TYPE_LAB_SHEET
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+from neuro_core.neuropacks.health.protocheck.core.ocr_cache import get_ocr_cache
+from neuro_core.neuropacks.health.protocheck.core.schema import ensure_schema, mark_patient_changes
+from neuro_core.neuropacks.health.protocheck.core.utils.file_hash import sha256_file
+
+LOGGER = get_logger(__name__)
+
+FIELD_COLUMNS = ["material", "teeth", "lab_name", "sheet_date", "delivery_date", "confidence"]
+
+# Spellings found on lab sheets -> canonical material (as declared on quotes)
+MATERIALS = {
+    "zirconia": "zirconia",
+    "zircone": "zirconia",
+    "zirconium": "zirconia",
+    "ceramic": "ceramic",
+    "céramique": "ceramic",
+    "ceramique": "ceramic",
+    "porcelaine": "ceramic",
+    "resin": "resin",
+    "résine": "resin",
+    "resine": "resin",
+    "metal": "metal",
+    "métal": "metal",
+    "métallique": "metal",
+    "metallique": "metal",
+}
+
+_MATERIAL_RE = re.compile(r"\b(" + "|".join(sorted(MATERIALS, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+_TEETH_RE = re.compile(r"\b(?:dents?|teeth|tooth)\b\s*(?:n°|no\.?)?\s*:?\s*((?:[1-4][1-8]\b[\s,;/+&-]*(?:et\s+)?)+)",
+                       re.IGNORECASE)
+_TOOTH_RE = re.compile(r"\b[1-4][1-8]\b")
+_LAB_RE = re.compile(r"\b(?:laboratoire|labo|lab)\b\.?\s*[:\-]\s*([^\n]+)", re.IGNORECASE)
+_DATE_RE = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b")
+_DELIVERY_RE = re.compile(r"\b(?:livraison|delivery|retour)\b[^\n\d]*(\d{1,2}[/.-]\d{1,2}[/.-]\d{4})", re.IGNORECASE)
+
+# Fields that must be found before parsing stops reading further pages
+_REQUIRED_FIELDS = ("material", "teeth", "lab_name", "sheet_date")
+
+
+def _parse_date(text: str) -> Optional[str]:
+    match = _DATE_RE.search(text)
+    if not match:
+        return None
+    day, month, year = (int(g) for g in match.groups())
+    try:
+        return date(year, month, day).strftime(DATE_FMT)
+    except ValueError:
+        return None
+
+
+def _material_confidence(page: dict, word: str) -> float:
+    if page.get("source") == "text_layer":
+        return 1.0
+    probs = [box["prob"] for box in page.get("boxes", []) if word.lower() in box["text"].lower()]
+    return max(probs) if probs else 0.0
+
+
+def _parse_page(page: dict, fields: dict) -> None:
+    text = page["text"]
+    if fields["material"] is None:
+        match = _MATERIAL_RE.search(text)
+        if match:
+            fields["material"] = MATERIALS[match.group(1).lower()]
+            fields["confidence"] = _material_confidence(page, match.group(1))
+    if fields["teeth"] is None:
+        match = _TEETH_RE.search(text)
+        if match:
+            teeth = sorted(set(_TOOTH_RE.findall(match.group(1))))
+            fields["teeth"] = ",".join(teeth) or None
+    if fields["lab_name"] is None:
+        match = _LAB_RE.search(text)
+        if match and match.group(1).strip():
+            fields["lab_name"] = match.group(1).strip()
+    if fields["delivery_date"] is None:
+        match = _DELIVERY_RE.search(text)
+        if match:
+            fields["delivery_date"] = _parse_date(match.group(1))
+    if fields["sheet_date"] is None:
+        # First date on the sheet that is not the delivery date
+        for match in _DATE_RE.finditer(text):
+            parsed = _parse_date(match.group(0))
+            if parsed and parsed != fields["delivery_date"]:
+                fields["sheet_date"] = parsed
+                break
+
+
+def parse_lab_sheet(pages: Iterable[dict]) -> dict:
+    """
+    Parse structured fields from OCR pages of a lab sheet. Pages are consumed lazily
+    and parsing stops once material, teeth, lab name and sheet date are all known.
+    Missing fields are None.
+    """
+    fields = dict.fromkeys(FIELD_COLUMNS)
+    for page in pages:
+        _parse_page(page, fields)
+        if all(fields[name] is not None for name in _REQUIRED_FIELDS):
+            break
+    return fields
+
+
+def extract_lab_sheet_fields(file_path: str, db_path: str | Path = DB_PATH) -> dict:
+    """OCR (through the OCR cache of db_path) and parse one lab sheet."""
+    with closing(get_ocr_cache(db_path).iter_pages(file_path)) as pages:
+        return parse_lab_sheet(pages)
+
+
+def upsert_lab_sheet_fields(records: list[dict], conn: sqlite3.Connection) -> int:
+    """
+    Write parsed records (file_path, content_sha256, patient_id + FIELD_COLUMNS).
+    The patients of the written rows, and those a re-parsed sheet was filed under
+    before, are marked in patient_changes for the next Feature 1 refresh.
+    """
+    if not records:
+        return 0
+    now = datetime.now().isoformat(timespec="seconds")
+    paths = [r["file_path"] for r in records]
+    # REPLACE deletes the previous row without firing delete triggers: mark it here
+    mark_patient_changes(
+        conn, f"SELECT patient_id FROM lab_sheet_fields WHERE file_path IN ({', '.join('?' * len(paths))})", paths
+    )
+    (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM lab_sheet_fields").fetchone()
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO lab_sheet_fields (
+            file_path, content_sha256, patient_id, material, teeth, lab_name,
+            sheet_date, delivery_date, confidence, extracted_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (r["file_path"], r["content_sha256"], r["patient_id"], r["material"], r["teeth"], r["lab_name"],
+             r["sheet_date"], r["delivery_date"], r["confidence"], now)
+            for r in records
+        ],
+    )
+    mark_patient_changes(conn, "SELECT patient_id FROM lab_sheet_fields WHERE id > ?", (last_id,))
+    return len(records)
+
+
+def ingest_lab_sheet_fields(db_path: str | Path = DB_PATH, force: bool = False, batch_size: int = 100) -> dict:
+    """
+    Parse every indexed lab sheet whose content changed since it was last parsed
+    (or all of them with force=True) into lab_sheet_fields.
+    Returns counts: {"parsed", "unchanged", "failed"}.
+    """
+    stats = {"parsed": 0, "unchanged": 0, "failed": 0}
+    with sqlite3.connect(str(db_path)) as conn:
+        ensure_schema(conn)
+        sheets = conn.execute(
+            "SELECT file_path, MIN(patient_id) FROM scans WHERE doc_type = ? AND file_path IS NOT NULL "
+            "GROUP BY file_path ORDER BY MIN(rowid)",
+            (DOC_TYPE_LAB_SHEET,),
+        ).fetchall()
+        known = dict(conn.execute("SELECT file_path, content_sha256 FROM lab_sheet_fields"))
+
+        batch = []
+        for file_path, patient_id in sheets:
+            try:
+                content_sha256 = sha256_file(file_path)
+                if not force and known.get(file_path) == content_sha256:
+                    stats["unchanged"] += 1
+                    continue
+                fields = extract_lab_sheet_fields(file_path, db_path)
+            except Exception as e:
+                LOGGER.warning("Lab sheet parsing failed for %s: %s", file_path, e)
+                stats["failed"] += 1
+                continue
+            batch.append({"file_path": file_path, "content_sha256": content_sha256, "patient_id": patient_id,
+                          **fields})
+            if len(batch) >= batch_size:
+                stats["parsed"] += upsert_lab_sheet_fields(batch, conn)
+                conn.commit()
+                batch = []
+        stats["parsed"] += upsert_lab_sheet_fields(batch, conn)
+        conn.commit()
+
+    LOGGER.info("Lab sheet fields: %(parsed)d parsed, %(unchanged)d unchanged, %(failed)d failed", stats)
+    return stats
+
+
+def load_lab_sheet_fields(db_path: str | Path = DB_PATH) -> pd.DataFrame:
+    with sqlite3.connect(str(db_path)) as conn:
+        return pd.read_sql_query(
+            f"SELECT file_path, patient_id, {', '.join(FIELD_COLUMNS)} FROM lab_sheet_fields", conn
+        )
@@ -0,0 +1,178 @@
+# neuro_core/neuropacks/health/protocheck/ingesters/ocr_batch.py
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from neuro_core.neuropacks.health.protocheck.core.constants import DB_PATH
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+from neuro_core.neuropacks.health.protocheck.core.ocr_cache import get_ocr_cache
+from neuro_core.neuropacks.health.protocheck.core.schema import ensure_schema
+
+LOGGER = get_logger(__name__)
+
+SCAN_SUFFIXES = (".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff")
+
+
+def find_scan_files(directory: str | Path) -> list[str]:
+    """All scan files (PDF or image) under a directory, recursively, in a stable order."""
+    return sorted(str(p) for p in Path(directory).rglob("*") if p.suffix.lower() in SCAN_SUFFIXES)
+
+
+def default_run_id(source: str) -> str:
+    """Run id derived from the input (directory or CSV), so re-running it resumes."""
+    return hashlib.sha256(str(Path(source).resolve()).encode("utf-8")).hexdigest()[:16]
+
+
+def _ocr_file(file_path: str, db_path: str) -> int:
+    # Runs in a worker process; results land in the OCR cache of the run's DB, pinned
+    # so that a large batch never evicts its own earlier files once they are checkpointed
+    return len(get_ocr_cache(db_path).ocr_pages(file_path, pin=True))
+
+
+class BatchProgress:
+    """Throughput and ETA over the files processed in this invocation."""
+
+    def __init__(self, total: int, already_done: int = 0) -> None:
+        self.total = total
+        self.already_done = already_done
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def record(self, ok: bool) -> None:
+        self.done += 1
+        if not ok:
+            self.failed += 1
+
+    @property
+    def files_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.files_per_second
+        remaining = self.total - self.already_done - self.done
+        return remaining / rate if rate else None
+
+    def summary(self) -> str:
+        eta = self.eta_seconds
+        eta_text = time.strftime("%H:%M:%S", time.gmtime(eta)) if eta is not None else "--:--:--"
+        return (
+            f"{self.already_done + self.done}/{self.total} files | {self.files_per_second:.2f} files/s | "
+            f"ETA {eta_text} | {self.failed} failed"
+        )
+
+
+def _register(conn: sqlite3.Connection, run_id: str, files: Iterable[str], retry_failed: bool) -> None:
+    now = datetime.now().isoformat(timespec="seconds")
+    conn.executemany(
+        "INSERT OR IGNORE INTO ocr_batch_files (run_id, file_path, status, updated_at) VALUES (?, ?, 'pending', ?)",
+        [(run_id, f, now) for f in files],
+    )
+    if retry_failed:
+        conn.execute(
+            "UPDATE ocr_batch_files SET status = 'pending', error = NULL WHERE run_id = ? AND status = 'failed'",
+            (run_id,),
+        )
+    conn.commit()
+
+
+def _checkpoint(conn: sqlite3.Connection, run_id: str, file_path: str, pages: Optional[int], error: Optional[str]):
+    conn.execute(
+        "UPDATE ocr_batch_files SET status = ?, pages = ?, error = ?, updated_at = ? WHERE run_id = ? AND file_path = ?",
+        ("failed" if error else "done", pages, error, datetime.now().isoformat(timespec="seconds"),
+         run_id, file_path),
+    )
+    conn.commit()
+
+
+def run_ocr_batch(
+    files: list[str],
+    run_id: str,
+    db_path: str | Path = DB_PATH,
+    workers: int = 1,
+    retry_failed: bool = False,
+    on_progress: Optional[Callable[[BatchProgress], None]] = None,
+) -> dict:
+    """
+    OCR `files` into the OCR cache as pinned entries (never evicted), checkpointing
+    each file in ocr_batch_files under run_id. Files already done in that run are
+    skipped, so re-running after a crash or Ctrl+C resumes; failed files are retried
+    only with retry_failed=True. workers > 1 spreads files over a process pool (one
+    OCR model per process, unless the OCR service is running).
+    Returns {"done", "failed", "skipped", "failures"}; failed and failures cover
+    this invocation only (earlier failures are logged).
+    """
+    with sqlite3.connect(str(db_path), timeout=30) as conn:
+        ensure_schema(conn)
+        _register(conn, run_id, files, retry_failed)
+        status = dict(conn.execute(
+            "SELECT file_path, status FROM ocr_batch_files WHERE run_id = ?", (run_id,)
+        ).fetchall())
+        todo = [f for f in files if status.get(f) == "pending"]
+        already_done = sum(1 for f in files if status.get(f) == "done")
+        # Files that failed in an earlier invocation (retry_failed=False) are left out
+        progress = BatchProgress(total=already_done + len(todo), already_done=already_done)
+        LOGGER.info(
+            "OCR batch %s: %d files, %d to process, %d failed earlier and not retried",
+            run_id, len(files), len(todo), len(files) - already_done - len(todo),
+        )
+
+        failures = []
+
+        def record(file_path: str, pages: Optional[int], error: Optional[str]) -> None:
+            _checkpoint(conn, run_id, file_path, pages, error)
+            progress.record(error is None)
+            if error:
+                failures.append((file_path, error))
+                LOGGER.warning("OCR failed for %s: %s", file_path, error)
+            if on_progress is not None:
+                on_progress(progress)
+
+        if workers <= 1:
+            for file_path in todo:
+                try:
+                    record(file_path, _ocr_file(file_path, str(db_path)), None)
+                except Exception as e:
+                    record(file_path, None, f"{type(e).__name__}: {e}")
+        else:
+            pending = iter(todo)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Keep a bounded number of files in flight so an interrupt loses little work
+                in_flight = {}
+                for file_path in pending:
+                    in_flight[pool.submit(_ocr_file, file_path, str(db_path))] = file_path
+                    if len(in_flight) >= workers * 2:
+                        break
+                try:
+                    while in_flight:
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            file_path = in_flight.pop(future)
+                            try:
+                                record(file_path, future.result(), None)
+                            except Exception as e:
+                                record(file_path, None, f"{type(e).__name__}: {e}")
+                            next_file = next(pending, None)
+                            if next_file is not None:
+                                in_flight[pool.submit(_ocr_file, next_file, str(db_path))] = next_file
+                except KeyboardInterrupt:
+                    for future in in_flight:
+                        future.cancel()
+                    raise
+
+    LOGGER.info("OCR batch %s finished: %s", run_id, progress.summary())
+    return {
+        "done": progress.done - progress.failed,
+        "failed": progress.failed,
+        "skipped": progress.already_done,
+        "failures": sorted(failures),
+    }
@@ -1,8 +1,8 @@
 import pandas as pd
-import sqlite3
 from pathlib import Path
 from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE
 from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+from neuro_core.neuropacks.health.protocheck.core.upsert import upsert_rows
 
 logger = get_logger(__name__)
 
@@ -32,7 +32,10 @@ def load_quotes_csv(file_path: str) -> pd.DataFrame:
 
 
 
-def upsert_quotes(df: pd.DataFrame, db_path: str = DB_FILE):
-    with sqlite3.connect(db_path) as conn:
-        df.to_sql("quotes", conn, if_exists="append", index=False)
-    logger.info("Inserted %d rows into quotes table.", len(df))
+def upsert_quotes(df: pd.DataFrame, db_path: str = DB_FILE) -> dict:
+    """
+    Idempotent import into quotes, keyed on (quote_id, code): a re-imported quote line
+    whose status or content changed replaces the stored one.
+    Returns {"inserted", "updated", "unchanged"}.
+    """
+    return upsert_rows(db_path, "quotes", df)
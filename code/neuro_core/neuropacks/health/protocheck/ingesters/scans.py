@@ -12,6 +12,8 @@ from ..core.constants import (
     DOC_TYPE_INSURANCE_CARD,
     DOC_TYPE_INSURANCE_CLAIM,
 )
+from ..core.doc_index import update_patient_documents
+from ..core.upsert import upsert_rows
 
 LOGGER = get_logger(__name__)
 
@@ -45,10 +47,14 @@ def load_scans_index(csv_path: str) -> pd.DataFrame:
     return df
 
 
-def upsert_scans(df: pd.DataFrame, db_path: Path = DB_PATH):
+def upsert_scans(df: pd.DataFrame, db_path: Path = DB_PATH) -> dict:
     """
-    Insert validated scan records into the scans table.
+    Insert validated scan records into the scans table, skipping rows already stored
+    (same content hash), and fold them into the per-patient document index.
+    Returns {"inserted", "updated", "unchanged"}.
     """
     with sqlite3.connect(db_path) as conn:
-        df.to_sql("scans", conn, if_exists="append", index=False)
-    LOGGER.info("Inserted %d rows into scans table", len(df))
+        stats = upsert_rows(conn, "scans", df)
+        update_patient_documents(conn, df)
+        conn.commit()
+    return stats
@@ -0,0 +1,125 @@
+# neuro_core/neuropacks/health/protocheck/ingesters/streaming.py
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE, IMPORT_CHUNK_ROWS
+from neuro_core.neuropacks.health.protocheck.core.logger import get_logger
+from neuro_core.neuropacks.health.protocheck.core.upsert import to_date_text, upsert_rows
+from neuro_core.neuropacks.health.protocheck.core.utils.prosthetics_filter import filter_prosthetics
+
+LOGGER = get_logger(__name__)
+
+# Columns holding dates in every export; stored as DATE_FMT text
+DATE_COLUMNS = ("date",)
+
+
+def _iter_xlsx_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook  # imported lazily: only needed for .xlsx exports
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = ["" if h is None else str(h) for h in next(rows, ())]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_file_chunks(path: str, chunksize: int = IMPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV or XLSX export in frames of at most chunksize rows. Legacy .xls files
+    cannot be streamed and are read whole, then sliced.
+    """
+    path = str(path)
+    if path.endswith(".xlsx"):
+        yield from _iter_xlsx_chunks(path, chunksize)
+    elif path.endswith(".xls"):
+        df = pd.read_excel(path)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def normalize_columns(df: pd.DataFrame, expected: list[str], what: str) -> pd.DataFrame:
+    """
+    Lower-cased, stripped column names limited to `expected`, with the date columns
+    as DATE_FMT text whatever the reader produced (XLSX cells come back as datetimes).
+    """
+    df.columns = df.columns.str.strip().str.lower()
+    missing = set(expected) - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing columns in {what} file: {missing}")
+    df = df[expected]
+    return df.assign(**{c: to_date_text(df[c]) for c in DATE_COLUMNS if c in df.columns})
+
+
+class ImportProgress:
+    """Rows read and written so far, and the read rate."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.kept = 0
+        self.stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+        self.started = time.perf_counter()
+
+    def record(self, rows: int, kept: int, stats: dict) -> None:
+        self.rows += rows
+        self.kept += kept
+        for key in self.stats:
+            self.stats[key] += stats[key]
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.rows} rows | {self.rows_per_second:.0f} rows/s | {self.kept} prosthetic | "
+            f"{self.stats['inserted']} inserted, {self.stats['updated']} updated, {self.stats['unchanged']} unchanged"
+        )
+
+
+def stream_import(
+    path: str | Path,
+    table: str,
+    expected_columns: list[str],
+    what: str,
+    db_path: str | Path = DB_FILE,
+    chunksize: int = IMPORT_CHUNK_ROWS,
+    prosthetics_only: bool = True,
+    on_progress: Optional[Callable[[ImportProgress], None]] = None,
+) -> dict:
+    """
+    Import an export file chunk by chunk: normalize the columns, keep prosthetic
+    codes (filter_prosthetics) and upsert each chunk in its own transaction, so
+    memory stays bounded by chunksize and rows are visible as soon as their chunk
+    commits. Returns {"rows", "kept", "inserted", "updated", "unchanged", "rows_per_second"}.
+    """
+    progress = ImportProgress()
+    for chunk in iter_file_chunks(str(path), chunksize):
+        df = normalize_columns(chunk, expected_columns, what)
+        if prosthetics_only:
+            df = filter_prosthetics(df, db_path=db_path)
+        stats = upsert_rows(db_path, table, df) if not df.empty else {"inserted": 0, "updated": 0, "unchanged": 0}
+        progress.record(len(chunk), len(df), stats)
+        if on_progress is not None:
+            on_progress(progress)
+
+    LOGGER.info("Imported %s into %s: %s", path, table, progress.summary())
+    return {"rows": progress.rows, "kept": progress.kept, **progress.stats,
+            "rows_per_second": progress.rows_per_second}
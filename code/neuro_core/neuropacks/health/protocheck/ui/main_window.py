@@ -15,9 +15,14 @@ from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QPushButton
 from PyQt6.QtGui import QPixmap, QColor
 from PyQt6.QtCore import QSize
 
-from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import run_feature1_lab_no_billing
+from neuro_core.neuropacks.health.protocheck.checks.feature1_incremental import (
+    load_feature1_findings,
+    refresh_feature1_findings,
+)
+from neuro_core.neuro_ai.ocr.main import get_engine as get_ocr_engine
 from neuro_core.utils.lang_loader import load_translations  # utility to load langs/*.json
 from neuro_core.neuropacks.health.protocheck.core.constants import DB_FILE as DB_PATH
+from neuro_core.neuropacks.health.protocheck.core.schema import init_db
 
 
 
@@ -28,6 +33,7 @@ class ProtoCheckWindow(QWidget):
         self.setStyleSheet("background-color: #f2e6dc;")
         self.current_tab = "materiaux"
         self.lang = load_translations("fr")  # Load French translation for now
+        init_db(str(DB_PATH))  # tables added since the database was created; the refreshes create none
 
         self.table_headers = {
             "materiaux": [
@@ -49,6 +55,9 @@ class ProtoCheckWindow(QWidget):
             ]
         }
 
+        # Load the OCR model in the background so the first validation doesn't wait for it
+        get_ocr_engine().warm_up()
+
         self.init_ui()
 
     def init_ui(self):
@@ -183,8 +192,10 @@ class ProtoCheckWindow(QWidget):
 
     def load_data_from_backend(self):
         try:
-            df = run_feature1_lab_no_billing(
-                conn_or_path=DB_PATH,
+            # Only patients touched by imports since the last refresh are re-evaluated
+            refresh_feature1_findings(DB_PATH)
+            df = load_feature1_findings(
+                DB_PATH,
                 start_date="2023-01-01",
                 end_date="2025-12-31"
             )
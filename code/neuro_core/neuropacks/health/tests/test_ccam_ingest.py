@@ -9,6 +9,7 @@ from neuro_core.neuropacks.health.protocheck.core.schema import init_db
 from neuro_core.neuropacks.health.protocheck.ingesters.ccam import (
     load_ccam_from_csv,
     load_ccam_from_txt,
+    bulk_upsert_ccam,
     upsert_ccam,
 )
 from neuro_core.neuropacks.health.protocheck.core.adapters.azzem_ccam import (
@@ -78,3 +79,27 @@ def test_azzem_adapter_stub_skips_gracefully():
     adapter = AzzemCcamAdapter()
     assert adapter.ping() is False
     assert adapter.fetch_by_code("HBLD001") is None
+
+
+def test_bulk_upsert_ccam_reports_changes_and_is_fast(tmp_path):
+    import time
+
+    db = tmp_path / "protocheck_test.db"
+    df = pd.DataFrame({
+        "code": [f"HBLD{i:05d}" for i in range(20_000)],
+        "label": [f"Prosthesis {i}" for i in range(20_000)],
+        "is_prosthetic": 1,
+        "materials": "Ceramic",
+        "basket": "Basket A",
+    })
+
+    started = time.perf_counter()
+    first = bulk_upsert_ccam(df, str(db))
+    revision = df.assign(label=df["label"].where(df.index % 10 != 0, "Revised"))
+    second = bulk_upsert_ccam(revision, str(db))
+    elapsed = time.perf_counter() - started
+
+    assert first == {"inserted": 20_000, "updated": 0, "unchanged": 0}
+    assert second == {"inserted": 0, "updated": 2_000, "unchanged": 18_000}
+    assert bulk_upsert_ccam(df.head(3), str(db), chunk_size=2) == {"inserted": 0, "updated": 1, "unchanged": 2}
+    assert elapsed < 1.0
@@ -0,0 +1,98 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.core.doc_index import (
+    DOC_BITS,
+    DocumentIndex,
+    load_document_index,
+    rebuild_patient_documents,
+)
+from neuro_core.neuropacks.health.protocheck.core.schema import ensure_schema
+from neuro_core.neuropacks.health.protocheck.ingesters.scans import upsert_scans
+
+
+def scans(rows):
+    return pd.DataFrame(rows, columns=["patient_id", "doc_type", "file_path", "date"])
+
+
+FIRST = scans([
+    ("P1", "insurance_card", "c1.pdf", "2024-01-10"),
+    ("P1", "pec", "p1.pdf", "2024-02-01"),
+    ("P1", "pec", "p2.pdf", "2024-03-05"),
+    ("P2", "lab_sheet", "l2.pdf", "2024-01-20"),
+    (None, "pec", "orphan.pdf", "2024-01-01"),
+])
+SECOND = scans([
+    ("P2", "insurance_claim", "k2.pdf", "2024-04-01"),
+    ("P1", "pec", "p0.pdf", "2023-12-01"),
+    ("P3", "signed_quote", "q3.pdf", "2024-05-01"),
+])
+
+
+def test_vectorized_lookups():
+    index = DocumentIndex.from_scans(FIRST)
+    ids = ["P1", "P2", "UNKNOWN", "P1"]
+
+    assert index.masks_for(ids).tolist() == [
+        DOC_BITS["insurance_card"] | DOC_BITS["pec"], DOC_BITS["lab_sheet"], 0,
+        DOC_BITS["insurance_card"] | DOC_BITS["pec"],
+    ]
+    assert index.has(ids, "pec", "insurance_claim").tolist() == [True, False, False, True]
+    assert index.has_all(ids, "insurance_card", "pec").tolist() == [True, False, False, True]
+    assert list(index.latest(ids, "pec")) == ["2024-03-05", None, None, "2024-03-05"]
+    assert isinstance(index.has(ids, "pec"), np.ndarray)
+
+
+def test_upsert_scans_maintains_index_incrementally(tmp_path):
+    db = tmp_path / "protocheck.db"
+    upsert_scans(FIRST, db_path=db)
+    upsert_scans(SECOND, db_path=db)
+
+    with sqlite3.connect(db) as conn:
+        incremental = conn.execute("SELECT * FROM patient_documents ORDER BY patient_id").fetchall()
+        rebuild_patient_documents(conn)
+        rebuilt = conn.execute("SELECT * FROM patient_documents ORDER BY patient_id").fetchall()
+        index = DocumentIndex.from_db(conn)
+
+    assert incremental == rebuilt
+    assert index.has(["P1", "P2", "P3"], "insurance_claim", "pec").tolist() == [True, True, False]
+    assert list(index.latest(["P1"], "pec")) == ["2024-03-05"]  # the older SECOND scan does not win
+
+
+def test_index_is_backfilled_for_existing_scans(tmp_path):
+    db = tmp_path / "protocheck.db"
+    with sqlite3.connect(db) as conn:
+        ensure_schema(conn)
+        FIRST.to_sql("scans", conn, if_exists="append", index=False)  # loaded before the index existed
+
+        index = load_document_index(conn)
+        assert index.has(["P1", "P2"], "insurance_card").tolist() == [True, False]
+        assert list(index.latest(["P1"], "pec")) == ["2024-03-05"]
+        # Reading never writes: the index is persisted by the next scans import
+        assert conn.execute("SELECT COUNT(*) FROM patient_documents").fetchone() == (0,)
+
+    upsert_scans(SECOND, db_path=db)
+    with sqlite3.connect(db) as conn:
+        index = DocumentIndex.from_db(conn)
+    assert index.has(["P2", "P3"], "insurance_claim", "signed_quote").tolist() == [True, True]
+
+
+def test_deleted_and_retyped_scans_leave_the_index(tmp_path):
+    db = tmp_path / "protocheck.db"
+    upsert_scans(FIRST, db_path=db)
+    upsert_scans(SECOND, db_path=db)
+
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM scans WHERE file_path = 'c1.pdf'")  # P1's only card
+        conn.execute("UPDATE scans SET doc_type = 'signed_quote' WHERE file_path = 'p2.pdf'")
+        conn.execute("UPDATE scans SET patient_id = 'P4' WHERE file_path = 'q3.pdf'")  # P3 is left with nothing
+        maintained = conn.execute("SELECT * FROM patient_documents ORDER BY patient_id").fetchall()
+        rebuild_patient_documents(conn)
+        assert maintained == conn.execute("SELECT * FROM patient_documents ORDER BY patient_id").fetchall()
+        index = DocumentIndex.from_db(conn)
+
+    assert index.has(["P1", "P3", "P4"], "insurance_card", "signed_quote").tolist() == [True, False, True]
+    assert not index.has(["P1"], "insurance_card")[0]
+    assert list(index.latest(["P1"], "pec")) == ["2024-02-01"]
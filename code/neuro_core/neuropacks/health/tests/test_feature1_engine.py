@@ -5,8 +5,11 @@ import pandas as pd
 import pytest
 from datetime import date
 
-from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import run_feature1_lab_no_billing
-from neuro_core.neuropacks.health.protocheck.core.schema import DDL
+from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import (
+    iter_feature1_rows,
+    run_feature1_lab_no_billing,
+)
+from neuro_core.neuropacks.health.protocheck.core.schema import DDL, ensure_schema
 
 
 @pytest.fixture
@@ -94,3 +97,130 @@ def test_no_invoice_but_deleted_act_found(in_memory_db):
     assert len(df) == 1
     assert "NO_INVOICE" in df["flags"].iloc[0]
     assert "DELETED_ACT_FOUND" in df["flags"].iloc[0]
+
+
+def _populate_random(conn, n_patients, n_sheets, n_invoices, n_deleted, seed=0, time_of_day=""):
+    import random
+    from datetime import timedelta
+
+    rng = random.Random(seed)
+    base = date(2023, 1, 1)
+    codes = ["HBMD001", "HBLD002", "HBLD003"]
+    conn.executemany(
+        "INSERT OR IGNORE INTO ccam_prosthetics (code, label, is_prosthetic) VALUES (?, ?, ?)",
+        [("HBLD002", "Bridge", 1), ("HBLD003", None, 1)],
+    )
+
+    def day():
+        return (base + timedelta(days=rng.randrange(120))).isoformat() + time_of_day
+
+    def patient():
+        return f"P{rng.randrange(n_patients):05d}"
+
+    conn.executemany(
+        "INSERT INTO scans (patient_id, doc_type, file_path, date) VALUES (?, ?, ?, ?)",
+        [(patient(), rng.choice(["lab_sheet", "lab_sheet", "pec"]), f"s{i}.pdf", day())
+         for i in range(n_sheets)],
+    )
+    conn.executemany(
+        """INSERT INTO invoices (invoice_no, date, patient_id, patient_name, doctor_id, doctor_name,
+               code, qty, amount, fse_no, source_file) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(f"INV{i}", day(), patient(), rng.choice(["Jane Roe", "", None]), "D001", "Dr. Smith",
+          rng.choice(codes), 1, 100.0, rng.choice(["FSE1", None]), "inv.csv")
+         for i in range(n_invoices)],
+    )
+    conn.executemany(
+        """INSERT INTO deleted_acts (date, patient_id, patient_name, doctor_id, doctor_name,
+               code, label, amount, source_file) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(day(), patient(), rng.choice(["Jane Roe", "John Doe"]), "D001", "Dr. Smith",
+          rng.choice(codes), "x", 90.0, "deleted.csv")
+         for _ in range(n_deleted)],
+    )
+    conn.commit()
+
+
+def test_merge_engine_matches_loop_engine(in_memory_db):
+    _populate_random(in_memory_db, n_patients=40, n_sheets=150, n_invoices=600, n_deleted=80)
+
+    expected = run_feature1_lab_no_billing(in_memory_db, date(2023, 2, 1), date(2023, 3, 31), engine="loop")
+    # The loop engine leaves NULL names/labels as NaN (`NaN or "—"` is truthy)
+    expected = expected.fillna("—")
+    actual = run_feature1_lab_no_billing(in_memory_db, date(2023, 2, 1), date(2023, 3, 31), engine="merge")
+
+    assert not expected.empty
+    assert set(expected["Validé"]) == {"Validé", "Supprimé", "—"}
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_sql_engine_matches_merge_engine(in_memory_db):
+    _populate_random(in_memory_db, n_patients=40, n_sheets=150, n_invoices=600, n_deleted=80, seed=1)
+
+    expected = run_feature1_lab_no_billing(in_memory_db, date(2023, 2, 1), date(2023, 3, 31), engine="merge")
+    actual = run_feature1_lab_no_billing(in_memory_db, date(2023, 2, 1), date(2023, 3, 31), engine="sql")
+
+    assert not expected.empty
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_sql_engine_matches_merge_engine_on_timestamped_dates(in_memory_db):
+    # Excel / datetime sources store "YYYY-MM-DD HH:MM:SS"
+    _populate_random(in_memory_db, n_patients=40, n_sheets=150, n_invoices=600, n_deleted=80, seed=2,
+                     time_of_day=" 00:00:00")
+    insert_scan(in_memory_db, "P900", "lab_sheet", "last_day.pdf", "2023-03-31 00:00:00")
+    insert_invoice(in_memory_db, "INV900", "2023-04-07 00:00:00", "P900", "D001", "HBMD001", 1, 150.0)
+
+    expected = run_feature1_lab_no_billing(in_memory_db, date(2023, 2, 1), date(2023, 3, 31), engine="merge")
+    actual = run_feature1_lab_no_billing(in_memory_db, date(2023, 2, 1), date(2023, 3, 31), engine="sql")
+
+    last_day = expected[expected["Date"] == "2023-03-31"]
+    assert "Conforme" in set(last_day["Statut"])  # sheet on the range's last day, invoice on the window's
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_sql_engine_uses_indexes_without_creating_them(in_memory_db):
+    insert_scan(in_memory_db, "P001", "lab_sheet", "scan1.pdf", "2023-01-10")
+    insert_invoice(in_memory_db, "INV001", "2023-01-09", "P001", "D001", "HBMD001", 1, 150.0)
+
+    rows = list(iter_feature1_rows(in_memory_db, "2023-01-01", "2023-01-31"))
+    assert [r["Statut"] for r in rows] == ["Conforme"]
+    names = {r[0] for r in in_memory_db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_scans_doc_type_date" not in names  # the check never writes DDL
+
+    ensure_schema(in_memory_db)  # as init_db and the loaders do
+
+    from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import _FEATURE1_SQL
+    plan = " ".join(
+        str(r[-1]) for r in in_memory_db.execute(
+            "EXPLAIN QUERY PLAN " + _FEATURE1_SQL,
+            {"doc_type": "lab_sheet", "start": "2023-01-01", "end": "2023-01-31",
+             "before": "-7 days", "after": "+7 days"},
+        )
+    )
+    assert "idx_scans_doc_type_date" in plan
+    assert "idx_invoices_patient_code_date" in plan
+    assert "idx_deleted_acts_patient_code" in plan
+
+
+def test_merge_engine_empty_range(in_memory_db):
+    insert_scan(in_memory_db, "P001", "lab_sheet", "scan1.pdf", "2023-01-10")
+
+    df = run_feature1_lab_no_billing(in_memory_db, date(2024, 1, 1), date(2024, 1, 31))
+    assert df.empty
+
+
+def test_merge_engine_scales_to_100k_invoices(in_memory_db):
+    import time
+
+    _populate_random(in_memory_db, n_patients=5_000, n_sheets=3_000, n_invoices=100_000, n_deleted=5_000)
+
+    started = time.perf_counter()
+    df = run_feature1_lab_no_billing(in_memory_db, date(2023, 1, 1), date(2023, 12, 31))
+    elapsed = time.perf_counter() - started
+
+    assert not df.empty
+    assert elapsed < 10
+
+
+def test_unknown_engine_rejected(in_memory_db):
+    with pytest.raises(ValueError):
+        run_feature1_lab_no_billing(in_memory_db, date(2023, 1, 1), date(2023, 1, 31), engine="nope")
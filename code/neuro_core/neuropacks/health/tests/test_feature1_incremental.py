@@ -0,0 +1,162 @@
+import sqlite3
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from neuro_core.neuropacks.health.protocheck.checks.feature1_incremental import (
+    load_feature1_findings,
+    refresh_feature1_findings,
+)
+from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import run_feature1_lab_no_billing
+from neuro_core.neuropacks.health.protocheck.checks.findings_store import load_findings
+from neuro_core.neuropacks.health.protocheck.core.schema import DDL
+from neuro_core.neuropacks.health.protocheck.ingesters.deleted import upsert_deleted_acts
+from neuro_core.neuropacks.health.protocheck.ingesters.invoices import upsert_invoices
+from neuro_core.neuropacks.health.protocheck.ingesters.lab_sheet_fields import upsert_lab_sheet_fields
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    for stmt in DDL:
+        conn.execute(stmt)
+    conn.executemany(
+        "INSERT INTO ccam_prosthetics (code, label, is_prosthetic) VALUES (?, ?, ?)",
+        [("HBMD001", "Crown on molar", 1), ("HBLD002", "Bridge", 1)],
+    )
+    conn.executemany(
+        "INSERT INTO scans (patient_id, doc_type, file_path, date) VALUES (?, ?, ?, ?)",
+        [
+            ("P001", "lab_sheet", "s1.pdf", "2023-01-10"),
+            ("P002", "lab_sheet", "s2.pdf", "2023-02-15"),
+            ("P003", "lab_sheet", "s3.pdf", "2023-03-20"),
+        ],
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def add_invoice(conn, invoice_no, date_, patient_id, code="HBMD001"):
+    # Through the import path, which marks the new rows' patients in patient_changes
+    upsert_invoices(pd.DataFrame([{
+        "invoice_no": invoice_no, "date": date_, "patient_id": patient_id, "patient_name": "John Doe",
+        "doctor_id": "D001", "doctor_name": "Dr. Smith", "code": code, "qty": 1, "amount": 100.0,
+        "fse_no": None, "source_file": "inv.csv",
+    }]), conn)
+
+
+def assert_matches_engine(conn):
+    expected = run_feature1_lab_no_billing(conn, date(2023, 1, 1), date(2023, 12, 31))
+    stored = load_feature1_findings(conn, date(2023, 1, 1), date(2023, 12, 31))
+    pd.testing.assert_frame_equal(stored, expected, check_dtype=False)
+
+
+def test_first_refresh_materializes_all_patients(db):
+    add_invoice(db, "INV001", "2023-01-12", "P001")
+
+    assert refresh_feature1_findings(db) == 3
+    assert_matches_engine(db)
+
+
+def test_refresh_only_reevaluates_changed_patients(db):
+    refresh_feature1_findings(db)
+    assert refresh_feature1_findings(db) == 0
+
+    add_invoice(db, "INV002", "2023-02-14", "P002", code="HBLD002")
+    upsert_deleted_acts(
+        pd.DataFrame([{"date": "2023-03-21", "patient_id": "P003", "patient_name": "Jane Roe", "code": "HBMD001"}]), db
+    )
+
+    assert refresh_feature1_findings(db) == 2
+    assert_matches_engine(db)
+
+
+def test_edited_last_inserted_invoice_is_reevaluated(db):
+    add_invoice(db, "INV001", "2023-01-12", "P001")
+    add_invoice(db, "INV002", "2023-02-28", "P002")  # outside P002's window
+    refresh_feature1_findings(db)
+    stored = load_feature1_findings(db, "2023-02-01", "2023-02-28")
+    assert set(stored["Statut"]) == {"Incohérent"}
+
+    # Corrected date re-imported: the replaced row can get its old rowid back
+    corrected = pd.DataFrame([{
+        "invoice_no": "INV002", "date": "2023-02-16", "patient_id": "P002", "patient_name": "John Doe",
+        "doctor_id": "D001", "doctor_name": "Dr. Smith", "code": "HBMD001", "qty": 1, "amount": 100.0,
+        "fse_no": None, "source_file": "inv.csv",
+    }])
+    assert upsert_invoices(corrected, db)["updated"] == 1
+
+    assert refresh_feature1_findings(db) == 1
+    assert "Conforme" in set(load_feature1_findings(db, "2023-02-01", "2023-02-28")["Statut"])
+    assert_matches_engine(db)
+
+
+def test_row_moved_to_another_patient_reevaluates_both(db):
+    add_invoice(db, "INV001", "2023-01-12", "P001")
+    refresh_feature1_findings(db)
+
+    db.execute("UPDATE invoices SET patient_id = 'P003', date = '2023-03-19' WHERE invoice_no = 'INV001'")
+    db.commit()
+
+    assert refresh_feature1_findings(db) == 2
+    assert_matches_engine(db)
+
+
+def test_ccam_change_triggers_rebuild(db):
+    refresh_feature1_findings(db)
+    db.execute("UPDATE ccam_prosthetics SET label = 'Zirconia crown' WHERE code = 'HBMD001'")
+    db.commit()
+
+    assert refresh_feature1_findings(db) == 3
+    assert_matches_engine(db)
+
+
+def test_load_filters_by_sheet_date(db):
+    refresh_feature1_findings(db)
+
+    df = load_feature1_findings(db, "2023-02-01", "2023-02-28")
+    assert set(df["Date"]) == {"2023-02-15"}
+    assert len(df) == 2
+
+
+def test_refresh_records_feature1_findings(db):
+    add_invoice(db, "INV001", "2023-01-12", "P001")
+    refresh_feature1_findings(db)
+
+    stored = load_findings(db, check="feature1_lab_no_billing")
+    # 3 sheets x 2 codes, minus P001's invoiced crown
+    assert len(stored) == 5
+    assert set(stored["flag"]) == {"NO_INVOICE"}
+
+    add_invoice(db, "INV002", "2023-02-14", "P002", code="HBLD002")
+    refresh_feature1_findings(db)
+
+    stored = load_findings(db, check="feature1_lab_no_billing")
+    assert len(stored) == 4
+    assert not ((stored["patient_id"] == "P002") & (stored["code_rowid"] == 2)).any()
+    run = db.execute("SELECT checks, new, persisting, resolved FROM finding_runs ORDER BY ran_at DESC, rowid DESC").fetchone()
+    # Only P002 was re-evaluated: its other code persists, P001 and P003 are left alone
+    assert run == ("feature1_lab_no_billing", 0, 1, 1)
+
+
+def test_deleted_and_replaced_lab_sheet_fields_mark_their_patients(db):
+    db.executemany(
+        "INSERT INTO lab_sheet_fields (file_path, patient_id, material) VALUES (?, ?, 'zirconia')",
+        [("s1.pdf", "P001"), ("s2.pdf", "P002")],
+    )
+    refresh_feature1_findings(db)
+
+    # Re-parsed under another patient: REPLACE fires no delete trigger, the upsert marks both
+    upsert_lab_sheet_fields([{
+        "file_path": "s1.pdf", "content_sha256": "x", "patient_id": "P003", "material": "resin", "teeth": None,
+        "lab_name": None, "sheet_date": None, "delivery_date": None, "confidence": 1.0,
+    }], db)
+    db.commit()
+    assert refresh_feature1_findings(db) == 2
+
+    db.execute("DELETE FROM lab_sheet_fields WHERE file_path = 's2.pdf'")
+    db.commit()
+    assert refresh_feature1_findings(db) == 1
+    assert_matches_engine(db)
@@ -0,0 +1,61 @@
+import sqlite3
+
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.checks.findings_store import (
+    finding_keys,
+    load_findings,
+    record_findings,
+)
+from neuro_core.neuropacks.health.protocheck.core.schema import init_db
+
+KEYS = {"insurance_coverage": ("patient_id", "quote_id"), "material_mismatch": ("quote_id",)}
+
+
+def insurance(*rows):
+    return pd.DataFrame(
+        [("insurance_coverage", p, q, "insurance_card", "INSURANCE_DOC_MISSING") for p, q in rows],
+        columns=["check", "patient_id", "quote_id", "missing_type", "flag"],
+    )
+
+
+def test_keys_are_stable_across_row_order_and_extra_columns():
+    df = insurance(("P1", "q1"), ("P2", "q2"))
+    keys = finding_keys("insurance_coverage", df, KEYS["insurance_coverage"])
+    shuffled = df.iloc[::-1].assign(missing_type="pec_or_claim")
+
+    assert list(finding_keys("insurance_coverage", shuffled, KEYS["insurance_coverage"])) == list(keys[::-1])
+    assert keys.nunique() == 2
+    assert set(finding_keys("other_check", df, KEYS["insurance_coverage"])).isdisjoint(keys)
+
+
+def test_runs_are_diffed_by_key(tmp_path):
+    db = init_db(str(tmp_path / "protocheck.db"))
+    mismatch = pd.DataFrame([{"check": "material_mismatch", "patient_id": "P9", "quote_id": "q9",
+                              "lab_material": "resin", "flag": "MATERIAL_MISMATCH"}])
+    checks = ["insurance_coverage", "material_mismatch"]
+
+    first = record_findings(db, pd.concat([insurance(("P1", "q1"), ("P2", "q2")), mismatch]), checks, KEYS,
+                            seen_at="2024-01-01T00:00:00")
+    second = record_findings(db, insurance(("P2", "q2"), ("P3", "q3")), ["insurance_coverage"], KEYS,
+                             seen_at="2024-01-02T00:00:00")
+    third = record_findings(db, insurance(("P1", "q1"), ("P2", "q2"), ("P3", "q3")), ["insurance_coverage"], KEYS,
+                            seen_at="2024-01-03T00:00:00")
+
+    assert first == {"new": 3, "persisting": 0, "resolved": 0}
+    assert second == {"new": 1, "persisting": 1, "resolved": 1}  # material_mismatch did not run: untouched
+    assert third == {"new": 1, "persisting": 2, "resolved": 0}   # P1 reopened
+
+    open_findings = load_findings(db)
+    assert len(open_findings) == 4
+    p1 = open_findings[open_findings["patient_id"] == "P1"].iloc[0]
+    assert (p1["first_seen"], p1["last_seen"], p1["missing_type"]) == (
+        "2024-01-01T00:00:00", "2024-01-03T00:00:00", "insurance_card",
+    )
+    assert load_findings(db, check="material_mismatch")["lab_material"].tolist() == ["resin"]
+
+    pages = [load_findings(db, check="insurance_coverage", limit=2, offset=o) for o in (0, 2)]
+    assert [len(p) for p in pages] == [2, 1]
+    assert set(pd.concat(pages)["quote_id"]) == {"q1", "q2", "q3"}
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM finding_runs").fetchone() == (3,)
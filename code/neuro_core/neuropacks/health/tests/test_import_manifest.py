@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import sys
+
+from neuro_core.neuropacks.health.protocheck.cli import quotes_load, scans_load
+from neuro_core.neuropacks.health.protocheck.core import import_manifest
+from neuro_core.neuropacks.health.protocheck.core.import_manifest import import_once
+from neuro_core.neuropacks.health.protocheck.core.schema import init_db
+from neuro_core.neuropacks.health.protocheck.core.utils.prosthetics_filter import (
+    invalidate_prosthetic_codes,
+    prosthetic_codes_digest,
+)
+
+
+def test_unchanged_files_are_skipped(tmp_path, monkeypatch):
+    db = tmp_path / "protocheck.db"
+    export = tmp_path / "invoices.csv"
+    export.write_text("invoice_no,code\nF1,HBLD036\n")
+    first_size = export.stat().st_size
+    calls = []
+
+    def do_import():
+        calls.append(1)
+        return {"inserted": 1, "updated": 0, "unchanged": 0}
+
+    assert import_once("invoices", export, do_import, db_path=db) == {"inserted": 1, "updated": 0, "unchanged": 0}
+    assert import_once("invoices", export, do_import, db_path=db) is None
+    assert import_once("quotes", export, do_import, db_path=db) is not None  # manifests are per ingester
+    assert len(calls) == 2
+
+    # Touched but identical: the hash decides, once; then size + mtime suffice again
+    os.utime(export, (1_700_000_000, 1_700_000_000))
+    hashed = []
+    real_sha = import_manifest.sha256_file
+    monkeypatch.setattr(import_manifest, "sha256_file", lambda p: hashed.append(p) or real_sha(p))
+    assert import_once("invoices", export, do_import, db_path=db) is None
+    assert import_once("invoices", export, do_import, db_path=db) is None
+    assert len(hashed) == 1 and len(calls) == 2
+
+    export.write_text("invoice_no,code\nF1,HBLD036\nF2,HBLD036\n")
+    assert import_once("invoices", export, do_import, db_path=db) is not None
+    assert import_once("invoices", export, do_import, db_path=db, force=True) is not None
+    assert len(calls) == 4
+
+    with sqlite3.connect(db) as conn:
+        rows = conn.execute(
+            "SELECT ingester, size, rows FROM import_manifest ORDER BY ingester"
+        ).fetchall()
+    assert rows == [("invoices", export.stat().st_size, 1), ("quotes", first_size, 1)]
+
+
+def test_ccam_change_reimports_filtered_exports(tmp_path):
+    db = str(tmp_path / "protocheck.db")
+    init_db(db)
+    export = tmp_path / "invoices.csv"
+    export.write_text("invoice_no,code\nF1,HBLD036\n")
+    calls = []
+
+    def do_import():
+        calls.append(1)
+        return 1
+
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO ccam_prosthetics (code, is_prosthetic) VALUES ('HBLD036', 1)")
+    invalidate_prosthetic_codes(db)
+    assert import_once("invoices", export, do_import, db_path=db, depends_on=prosthetic_codes_digest(db)) == 1
+    assert import_once("invoices", export, do_import, db_path=db, depends_on=prosthetic_codes_digest(db)) is None
+
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO ccam_prosthetics (code, is_prosthetic) VALUES ('HBLD040', 1)")
+    invalidate_prosthetic_codes(db)  # as upsert_ccam does
+    assert import_once("invoices", export, do_import, db_path=db, depends_on=prosthetic_codes_digest(db)) == 1
+    assert len(calls) == 2
+
+
+def test_loaders_import_into_the_given_db(tmp_path, monkeypatch):
+    db = str(tmp_path / "other.db")
+    init_db(db)
+    quotes = tmp_path / "quotes.csv"
+    quotes.write_text("quote_id,status,date,patient_id,doctor_id,code,amount,source_file\n"
+                      "q1,accepted,2024-01-01,P1,D1,HBLD036,100,quotes.csv\n")
+    scans = tmp_path / "scans.csv"
+    scans.write_text(f"patient_id,doc_type,file_path,date\nP1,pec,{tmp_path / 'pec.pdf'},2024-01-01\n")
+
+    for module, path in ((quotes_load, quotes), (scans_load, scans)):
+        monkeypatch.setattr(sys, "argv", [module.__name__, "--csv", str(path), "--db", db])
+        module.main()
+
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT quote_id FROM quotes").fetchall() == [("q1",)]
+        assert conn.execute("SELECT patient_id FROM scans").fetchall() == [("P1",)]
+        manifest = conn.execute("SELECT ingester FROM import_manifest ORDER BY ingester").fetchall()
+    assert manifest == [("quotes",), ("scans",)]
@@ -0,0 +1,102 @@
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.core.invoice_index import InvoiceDateIndex
+
+
+def make_invoices(n, n_patients=1_000, seed=0):
+    rng = random.Random(seed)
+    dates = pd.date_range("2023-01-01", periods=365).strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        "patient_id": [f"P{rng.randrange(n_patients):05d}" for _ in range(n)],
+        "code": [rng.choice(["HBMD001", "HBLD002", "HBLD003"]) for _ in range(n)],
+        "date": [rng.choice(dates) for _ in range(n)],
+    })
+
+
+def brute_force(df, dates, patient_id, code, start, end):
+    mask = (
+        (df["patient_id"] == patient_id)
+        & (df["code"] == code)
+        & dates.between(pd.Timestamp(start), pd.Timestamp(end))
+    )
+    return set(np.flatnonzero(mask.to_numpy()))
+
+
+def test_window_matches_brute_force():
+    df = make_invoices(2_000, n_patients=50)
+    index = InvoiceDateIndex(df)
+    dates = pd.to_datetime(df["date"])
+    rng = random.Random(1)
+
+    for _ in range(200):
+        row = df.iloc[rng.randrange(len(df))]
+        start = pd.Timestamp(row["date"]) - pd.Timedelta(days=rng.randrange(10))
+        end = pd.Timestamp(row["date"]) + pd.Timedelta(days=rng.randrange(10))
+        got = index.window(row["patient_id"], row["code"], start, end)
+        assert set(got) == brute_force(df, dates, row["patient_id"], row["code"], start, end)
+        assert list(dates.iloc[got]) == sorted(dates.iloc[got])
+
+
+def test_unknown_key_and_missing_values():
+    df = pd.DataFrame({
+        "patient_id": ["P1", None, "P1"],
+        "code": ["C1", "C1", "C1"],
+        "date": ["2023-01-05", "2023-01-05", None],
+    })
+    index = InvoiceDateIndex(df)
+
+    assert len(index) == 1
+    assert list(index.window("P1", "C1", "2023-01-01", "2023-01-31")) == [0]
+    assert not index.has_in_window("P2", "C1", "2023-01-01", "2023-01-31")
+    assert not index.has_in_window("P1", "C1", "2023-02-01", "2023-02-28")
+
+
+def test_join_windows_matches_scalar_queries():
+    df = make_invoices(3_000, n_patients=80, seed=2)
+    index = InvoiceDateIndex(df)
+    queries = df.sample(300, random_state=3).reset_index(drop=True)
+    queries.loc[0, "patient_id"] = "UNKNOWN"
+    starts = pd.to_datetime(queries["date"]) - pd.Timedelta(days=7)
+    ends = pd.to_datetime(queries["date"]) + pd.Timedelta(days=7)
+
+    query_pos, row_pos = index.join_windows(queries["patient_id"], queries["code"], starts, ends)
+
+    for i in range(len(queries)):
+        expected = set(index.window(queries["patient_id"][i], queries["code"][i], starts[i], ends[i]))
+        assert set(row_pos[query_pos == i]) == expected
+    assert not (query_pos == 0).any()
+
+
+def test_build_and_query_100k_invoices():
+    df = make_invoices(100_000)
+
+    started = time.perf_counter()
+    index = InvoiceDateIndex(df)
+    build_seconds = time.perf_counter() - started
+
+    queries = df.sample(10_000, random_state=0).reset_index(drop=True)
+    started = time.perf_counter()
+    same_day = [len(index.window(p, c, day, day)) for p, c, day in queries.itertuples(index=False)]
+    per_query = (time.perf_counter() - started) / len(queries)
+
+    starts = pd.to_datetime(queries["date"]) - pd.Timedelta(days=7)
+    ends = pd.to_datetime(queries["date"]) + pd.Timedelta(days=7)
+    started = time.perf_counter()
+    query_pos, row_pos = index.join_windows(queries["patient_id"], queries["code"], starts, ends)
+    vectorized_seconds = time.perf_counter() - started
+
+    # Every query is an invoice itself, so each window holds at least that row
+    assert min(same_day) >= 1
+    assert set(query_pos) == set(range(len(queries)))
+    matched = df.iloc[row_pos].reset_index(drop=True)
+    assert (matched["patient_id"].to_numpy() == queries["patient_id"].to_numpy()[query_pos]).all()
+    assert (matched["code"].to_numpy() == queries["code"].to_numpy()[query_pos]).all()
+    assert pd.to_datetime(matched["date"]).between(starts.to_numpy()[query_pos], ends.to_numpy()[query_pos]).all()
+
+    assert build_seconds < 5
+    assert per_query < 1e-3
+    assert vectorized_seconds < 1
@@ -0,0 +1,125 @@
+import sqlite3
+from datetime import date
+
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.checks.feature1_incremental import (
+    load_feature1_findings,
+    refresh_feature1_findings,
+)
+from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import run_feature1_lab_no_billing
+from neuro_core.neuropacks.health.protocheck.checks.validations import validate_material_mismatch
+from neuro_core.neuropacks.health.protocheck.ingesters import lab_sheet_fields
+from neuro_core.neuropacks.health.protocheck.ingesters.lab_sheet_fields import (
+    ingest_lab_sheet_fields,
+    load_lab_sheet_fields,
+    parse_lab_sheet,
+)
+
+SHEET_TEXT = """Laboratoire : Dentalab Lyon
+Date : 03/02/2024
+Patient : Dupont
+Dents : 11, 21 et 22
+Couronne céramo-métallique, teinte A2 — Zircone
+Livraison prévue le 10/02/2024"""
+
+
+def test_parse_lab_sheet_fields():
+    boxes = [{"bbox": [], "text": "Zircone", "prob": 0.87}, {"bbox": [], "text": "Dents : 11, 21 et 22", "prob": 0.9}]
+    fields = parse_lab_sheet([{"text": SHEET_TEXT, "boxes": boxes, "source": "ocr"}])
+
+    assert fields == {
+        "material": "metal",  # "métallique" comes first on the sheet
+        "teeth": "11,21,22",
+        "lab_name": "Dentalab Lyon",
+        "sheet_date": "2024-02-03",
+        "delivery_date": "2024-02-10",
+        "confidence": 0.0,
+    }
+
+
+def test_parse_stops_once_required_fields_are_found():
+    read = []
+
+    def pages():
+        for text in ["Labo : Ceramlab\nDate : 01/03/2024\nDent 36 — résine", "Annexe", "Annexe"]:
+            read.append(text)
+            yield {"text": text, "boxes": [], "source": "text_layer"}
+
+    fields = parse_lab_sheet(pages())
+    assert fields["material"] == "resin"
+    assert fields["confidence"] == 1.0
+    assert fields["teeth"] == "36"
+    assert len(read) == 1
+
+
+def _db(tmp_path, sheets):
+    db = tmp_path / "protocheck.db"
+    with sqlite3.connect(db) as conn:
+        from neuro_core.neuropacks.health.protocheck.core.schema import ensure_schema
+
+        ensure_schema(conn)
+        conn.executemany("INSERT INTO scans (patient_id, doc_type, file_path, date) VALUES (?, ?, ?, ?)", sheets)
+        conn.execute("INSERT INTO ccam_prosthetics (code, label, is_prosthetic) VALUES ('HBLD634', 'Couronne', 1)")
+    return db
+
+
+def test_ingest_skips_unchanged_sheets_and_feeds_checks(tmp_path, monkeypatch):
+    sheet_a, sheet_b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    sheet_a.write_text("zircone")
+    sheet_b.write_text("résine")
+    db = _db(tmp_path, [("P1", "lab_sheet", str(sheet_a), "2024-02-03"),
+                        ("P2", "lab_sheet", str(sheet_b), "2024-02-05"),
+                        ("P3", "lab_sheet", str(tmp_path / "missing.pdf"), "2024-02-06")])
+    parsed = []
+
+    def fake_extract(path, db_path):
+        assert db_path == db
+        parsed.append(path)
+        return parse_lab_sheet([{"text": open(path).read(), "boxes": [], "source": "text_layer"}])
+
+    monkeypatch.setattr(lab_sheet_fields, "extract_lab_sheet_fields", fake_extract)
+
+    assert ingest_lab_sheet_fields(db) == {"parsed": 2, "unchanged": 0, "failed": 1}
+    refresh_feature1_findings(db)
+
+    sheet_b.write_text("métal")
+    assert ingest_lab_sheet_fields(db) == {"parsed": 1, "unchanged": 1, "failed": 1}
+    assert parsed[-1] == str(sheet_b)
+    assert refresh_feature1_findings(db) == 1  # only P2 is re-evaluated
+
+    fields = load_lab_sheet_fields(db)
+    assert dict(zip(fields["patient_id"], fields["material"])) == {"P1": "zirconia", "P2": "metal"}
+
+    expected = ["zirconia", "metal", "—"]
+    for engine in ("merge", "sql", "loop"):
+        df = run_feature1_lab_no_billing(db, date(2024, 1, 1), date(2024, 12, 31), engine=engine)
+        assert df["Matériau Fiche LABO"].tolist() == expected
+    findings = load_feature1_findings(db, "2024-01-01", "2024-12-31")
+    assert findings["Matériau Fiche LABO"].tolist() == expected
+
+    quotes = pd.DataFrame({"quote_id": ["Q1", "Q2"], "patient_id": ["P1", "P2"],
+                           "declared_material": ["Zirconia", "resin"]})
+    scans = pd.DataFrame({"patient_id": ["P1", "P2"], "doc_type": "lab_sheet",
+                          "file_path": [str(sheet_a), str(sheet_b)]})
+    mismatches = validate_material_mismatch(quotes, scans, fields_df=fields)
+    assert mismatches[["quote_id", "lab_material"]].values.tolist() == [["Q2", "metal"]]
+
+
+def test_sheets_are_read_through_the_run_database_cache(tmp_path, monkeypatch):
+    sheet = tmp_path / "a.pdf"
+    sheet.write_text("zircone")
+    db = _db(tmp_path, [("P1", "lab_sheet", str(sheet), "2024-02-03")])
+    caches = []
+
+    class FakeCache:
+        def iter_pages(self, path):
+            yield {"text": "Dent 11 — zircone", "boxes": [], "source": "text_layer"}
+
+    def fake_get_ocr_cache(db_path):
+        caches.append(db_path)
+        return FakeCache()
+
+    monkeypatch.setattr(lab_sheet_fields, "get_ocr_cache", fake_get_ocr_cache)
+    assert ingest_lab_sheet_fields(db)["parsed"] == 1
+    assert caches == [db]
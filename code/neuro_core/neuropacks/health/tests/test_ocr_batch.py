@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+from neuro_core.neuropacks.health.protocheck.ingesters import ocr_batch
+from neuro_core.neuropacks.health.protocheck.ingesters.ocr_batch import (
+    BatchProgress,
+    find_scan_files,
+    run_ocr_batch,
+)
+
+
+def make_scans(tmp_path, n):
+    folder = tmp_path / "archive" / "2023"
+    folder.mkdir(parents=True)
+    for i in range(n):
+        (folder / f"sheet{i:02d}.pdf").write_bytes(b"%PDF")
+    (folder / "notes.txt").write_text("not a scan")
+    return find_scan_files(tmp_path / "archive")
+
+
+def test_interrupted_run_resumes_and_reports_failures(tmp_path, monkeypatch):
+    files = make_scans(tmp_path, 6)
+    db = tmp_path / "protocheck.db"
+    calls = []
+
+    def flaky_ocr(path, db_path):
+        calls.append(path)
+        if path.endswith("sheet01.pdf"):
+            raise ValueError("unreadable page")
+        if len(calls) == 4:
+            raise KeyboardInterrupt
+        return 2
+
+    monkeypatch.setattr(ocr_batch, "_ocr_file", flaky_ocr)
+    with pytest.raises(KeyboardInterrupt):
+        run_ocr_batch(files, "run1", db_path=db)
+    assert len(calls) == 4
+
+    progress = []
+    result = run_ocr_batch(files, "run1", db_path=db, on_progress=lambda p: progress.append(p.summary()))
+    assert calls[4:] == files[3:]  # the interrupted file and the rest, nothing else
+    assert result["skipped"] == 2  # done before; the earlier failure is not retried nor skipped
+    assert result["done"] == 3
+    # The failure belongs to the interrupted invocation: not reported again
+    assert (result["failed"], result["failures"]) == (0, [])
+    assert progress[-1].startswith("5/5 files")
+
+    monkeypatch.setattr(ocr_batch, "_ocr_file", flaky_ocr)
+    failing = run_ocr_batch(files, "run1", db_path=db, retry_failed=True)
+    assert (failing["failed"], failing["failures"]) == (1, [(files[1], "ValueError: unreadable page")])
+
+    monkeypatch.setattr(ocr_batch, "_ocr_file", lambda path, db_path: 1)
+    retried = run_ocr_batch(files, "run1", db_path=db, retry_failed=True)
+    assert (retried["done"], retried["failures"]) == (1, [])
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ocr_batch_files WHERE status = 'done'").fetchone() == (6,)
+
+
+def test_results_go_to_the_run_database(tmp_path, monkeypatch):
+    files = make_scans(tmp_path, 2)
+    db = tmp_path / "other.db"
+    caches = []
+
+    class FakeCache:
+        def ocr_pages(self, path, pin=False):
+            assert pin
+            return [{"text": ""}]
+
+    def fake_get_ocr_cache(db_path):
+        caches.append(db_path)
+        return FakeCache()
+
+    monkeypatch.setattr(ocr_batch, "get_ocr_cache", fake_get_ocr_cache)
+    assert run_ocr_batch(files, "run1", db_path=db)["done"] == 2
+    assert caches == [str(db)] * 2
+
+
+def test_progress_rate_and_eta():
+    progress = BatchProgress(total=10, already_done=4)
+    progress.started -= 2.0
+    for ok in (True, True, False, True):
+        progress.record(ok)
+
+    assert progress.files_per_second == pytest.approx(2.0, rel=0.05)
+    assert progress.eta_seconds == pytest.approx(1.0, rel=0.05)
+    assert "8/10 files" in progress.summary()
+    assert "1 failed" in progress.summary()
@@ -0,0 +1,163 @@
+import sqlite3
+
+from neuro_core.neuropacks.health.protocheck.core.ocr_cache import OcrCache
+from neuro_core.neuropacks.health.protocheck.core.utils.file_hash import sha256_file
+
+SETTINGS = {"engine": "fake", "langs": ["en", "fr"]}
+
+
+class FakeOcr:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return [{"text": f"zirconia crown {self.calls}", "boxes": [{"bbox": [[0, 0], [1, 0], [1, 1], [0, 1]],
+                                                                     "text": "zirconia", "prob": 0.9}]}]
+
+
+def test_second_run_does_no_ocr(tmp_path):
+    scan = tmp_path / "sheet.png"
+    scan.write_bytes(b"fake image bytes")
+    cache = OcrCache(tmp_path / "cache.db")
+    ocr = FakeOcr()
+
+    first = cache.ocr_pages(scan, compute=ocr, settings=SETTINGS)
+    # A fresh instance (new process) reads the persisted entry
+    second = OcrCache(tmp_path / "cache.db").ocr_pages(scan, compute=ocr, settings=SETTINGS)
+
+    assert ocr.calls == 1
+    assert first == second
+    assert second[0]["boxes"][0]["text"] == "zirconia"
+    assert cache.stats()["misses"] == 1
+
+
+def test_key_follows_content_not_path_and_settings(tmp_path):
+    a = tmp_path / "a.png"
+    b = tmp_path / "copy_of_a.png"
+    a.write_bytes(b"same content")
+    b.write_bytes(b"same content")
+    cache = OcrCache(tmp_path / "cache.db")
+    ocr = FakeOcr()
+
+    cache.ocr_texts(a, compute=ocr, settings=SETTINGS)
+    cache.ocr_texts(b, compute=ocr, settings=SETTINGS)
+    assert ocr.calls == 1
+    assert cache.stats()["hits"] == 1
+
+    cache.ocr_texts(a, compute=ocr, settings={**SETTINGS, "langs": ["en"]})
+    assert ocr.calls == 2
+
+    a.write_bytes(b"rescanned content")
+    cache.ocr_texts(a, compute=ocr, settings=SETTINGS)
+    assert ocr.calls == 3
+
+
+def test_size_based_eviction_drops_least_recently_used(tmp_path):
+    cache = OcrCache(tmp_path / "cache.db", max_bytes=250)
+    ocr = FakeOcr()
+    files = []
+    for i in range(3):
+        f = tmp_path / f"scan{i}.png"
+        f.write_bytes(f"content {i}".encode())
+        files.append(f)
+
+    cache.ocr_pages(files[0], compute=ocr, settings=SETTINGS)
+    cache.ocr_pages(files[1], compute=ocr, settings=SETTINGS)
+    cache.ocr_pages(files[0], compute=ocr, settings=SETTINGS)  # refresh files[0]
+    cache.ocr_pages(files[2], compute=ocr, settings=SETTINGS)
+
+    stats = cache.stats()
+    assert stats["evictions"] >= 1
+    assert stats["size_bytes"] <= 250
+
+    calls = ocr.calls
+    cache.ocr_pages(files[2], compute=ocr, settings=SETTINGS)
+    assert ocr.calls == calls  # most recent entry survived
+    cache.ocr_pages(files[1], compute=ocr, settings=SETTINGS)
+    assert ocr.calls == calls + 1  # least recently used entry was evicted
+
+
+class LazyOcr:
+    """Five-page document; the material is on page 1, annexes follow."""
+
+    def __init__(self):
+        self.pages_computed = []
+
+    def __call__(self, path, first_page):
+        for page_no in range(first_page, 6):
+            self.pages_computed.append(page_no)
+            text = "Couronne zirconia" if page_no == 1 else f"Annexe {page_no}"
+            yield {"text": text, "boxes": [], "source": "ocr"}
+
+
+def test_material_extraction_stops_after_matching_page(tmp_path, monkeypatch):
+    from neuro_core.neuropacks.health.protocheck.checks import validations
+    from neuro_core.neuropacks.health.protocheck.core import ocr_cache
+
+    scan = tmp_path / "sheet.pdf"
+    scan.write_bytes(b"five page lab sheet")
+    cache = OcrCache(tmp_path / "cache.db")
+    ocr = LazyOcr()
+    monkeypatch.setattr(ocr_cache, "_default_ocr_iter", lambda: (ocr, SETTINGS))
+    monkeypatch.setattr(validations, "get_ocr_cache", lambda: cache)
+
+    assert validations.extract_material_from_ocr(str(scan)) == "zirconia"
+    assert ocr.pages_computed == [1]
+
+    # The stored prefix serves the next lookup without any OCR
+    assert validations.extract_material_from_ocr(str(scan)) == "zirconia"
+    assert ocr.pages_computed == [1]
+
+    # A full read resumes after the prefix and completes the entry
+    assert len(list(cache.iter_pages(scan))) == 5
+    assert ocr.pages_computed == [1, 2, 3, 4, 5]
+    assert len(cache.ocr_pages(scan, compute=FakeOcr(), settings=SETTINGS)) == 5
+
+
+def test_partial_entry_is_not_served_as_complete(tmp_path):
+    scan = tmp_path / "sheet.pdf"
+    scan.write_bytes(b"content")
+    cache = OcrCache(tmp_path / "cache.db")
+
+    pages = cache.iter_pages(scan, compute=LazyOcr(), settings=SETTINGS)
+    next(pages)
+    pages.close()
+
+    key = cache.key_for(sha256_file(scan), SETTINGS)
+    assert cache.get(key) is None
+    ocr = FakeOcr()
+    cache.ocr_pages(scan, compute=ocr, settings=SETTINGS)
+    assert ocr.calls == 1
+
+
+def test_existing_cache_table_gains_complete_column(tmp_path):
+    db = tmp_path / "old.db"
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE ocr_cache (cache_key TEXT PRIMARY KEY, content_sha256 TEXT, settings_hash TEXT,"
+                     " pages TEXT, size_bytes INTEGER, hits INTEGER DEFAULT 0, created_at TEXT, last_access REAL)")
+        conn.execute("INSERT INTO ocr_cache (cache_key, pages) VALUES ('k:s', '[]')")
+
+    OcrCache(db)
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT complete FROM ocr_cache").fetchone() == (1,)
+
+
+def test_pinned_entries_are_never_evicted(tmp_path):
+    cache = OcrCache(tmp_path / "cache.db", max_bytes=250)
+    ocr = FakeOcr()
+    files = []
+    for i in range(4):
+        f = tmp_path / f"scan{i}.png"
+        f.write_bytes(f"content {i}".encode())
+        files.append(f)
+
+    for f in files[:3]:
+        cache.ocr_pages(f, compute=ocr, settings=SETTINGS, pin=True)  # together over max_bytes
+    cache.ocr_pages(files[3], compute=ocr, settings=SETTINGS)
+    assert cache.stats()["pinned"] == 3
+
+    calls = ocr.calls
+    for f in files[:3]:
+        cache.ocr_pages(f, compute=ocr, settings=SETTINGS)
+    assert ocr.calls == calls
@@ -0,0 +1,151 @@
+import subprocess
+import sys
+import threading
+import types
+from pathlib import Path
+
+from neuro_core.neuro_ai.ocr.main import OcrEngine
+
+CODE_ROOT = Path(__file__).resolve().parents[4]
+
+
+def install_fake_easyocr(monkeypatch):
+    created = []
+
+    class Reader:
+        def __init__(self, langs, **kwargs):
+            created.append(langs)
+
+        def readtext(self, image):
+            return [([[0, 0], [1, 0], [1, 1], [0, 1]], "zirconia", 0.9)]
+
+    monkeypatch.setitem(sys.modules, "easyocr", types.SimpleNamespace(Reader=Reader))
+    return created
+
+
+def test_importing_validations_does_not_load_easyocr():
+    code = (
+        "import sys\n"
+        "import neuro_core.neuropacks.health.protocheck.checks.validations\n"
+        "import neuro_core.neuropacks.health.protocheck.ingesters.lab_ocr\n"
+        "print('easyocr' in sys.modules)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=CODE_ROOT, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_reader_created_lazily_once(monkeypatch):
+    created = install_fake_easyocr(monkeypatch)
+    engine = OcrEngine(["en", "fr"])
+    assert not engine.loaded
+    assert created == []
+
+    threads = [threading.Thread(target=engine.readtext, args=(None,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert created == [["en", "fr"]]
+    assert engine.loaded
+
+
+def test_background_warm_up_and_release(monkeypatch):
+    created = install_fake_easyocr(monkeypatch)
+    engine = OcrEngine()
+
+    engine.warm_up().join(timeout=5)
+    assert engine.loaded
+
+    engine.release()
+    assert not engine.loaded
+    engine.readtext(None)
+    assert len(created) == 2
+
+
+def install_fake_pdf(monkeypatch, pages=6):
+    from PIL import Image
+
+    from neuro_core.neuro_ai.ocr import main
+
+    rendered = []
+
+    def convert_from_path(path, dpi, grayscale, first_page, last_page):
+        rendered.append((first_page, dpi, grayscale))
+        return [Image.new("L" if grayscale else "RGB", (2, 2), color=first_page)]
+
+    monkeypatch.setattr(main, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(main, "pdfinfo_from_path", lambda path: {"Pages": pages})
+    return rendered
+
+
+def test_pdf_pages_stream_in_order_with_range(monkeypatch):
+    from neuro_core.neuro_ai.ocr.main import iter_pdf_pages
+
+    rendered = install_fake_pdf(monkeypatch)
+    pages = list(iter_pdf_pages("sheet.pdf", dpi=150, grayscale=True, threads=3, first_page=2, last_page=5))
+
+    assert [p.getpixel((0, 0)) for p in pages] == [2, 3, 4, 5]
+    assert sorted(rendered) == [(n, 150, True) for n in range(2, 6)]
+
+
+def test_pdf_pages_stop_rendering_when_caller_stops(monkeypatch):
+    from neuro_core.neuro_ai.ocr.main import iter_pdf_pages
+
+    rendered = install_fake_pdf(monkeypatch, pages=50)
+    stream = iter_pdf_pages("sheet.pdf", threads=2)
+    first = next(stream)
+    stream.close()
+
+    assert first.getpixel((0, 0)) == 1
+    assert len(rendered) <= 3
+
+
+def test_text_layer_pages_skip_ocr(monkeypatch):
+    from neuro_core.neuro_ai.ocr import main
+
+    rendered = install_fake_pdf(monkeypatch, pages=3)
+    monkeypatch.setattr(main, "pdf_text_layer", lambda path, first, last: [
+        "Fiche laboratoire : couronne zircone", "", "Annexe : conditions générales de vente",
+    ])
+    install_fake_easyocr(monkeypatch)
+    monkeypatch.setattr(main, "_ENGINE", OcrEngine())
+
+    pages = main.ocr_pages_from_file("sheet.pdf")
+
+    assert [p["source"] for p in pages] == ["text_layer", "ocr", "text_layer"]
+    assert pages[0]["text"] == "Fiche laboratoire : couronne zircone"
+    assert pages[1]["text"] == "zirconia"
+    assert [r[0] for r in rendered] == [2]
+
+
+def test_pdf_text_layer_splits_pages(monkeypatch):
+    from neuro_core.neuro_ai.ocr import main
+
+    calls = []
+
+    def run(args, **kwargs):
+        calls.append(args)
+        return types.SimpleNamespace(stdout="page one\fpage two\f".encode())
+
+    monkeypatch.setattr(main.subprocess, "run", run)
+    assert main.pdf_text_layer("doc.pdf", 2, 3) == ["page one", "page two"]
+    assert calls[0][-2:] == ["doc.pdf", "-"]
+    assert "-f" in calls[0] and "-l" in calls[0]
+
+
+def test_iter_ocr_pages_is_lazy(monkeypatch):
+    from neuro_core.neuro_ai.ocr import main
+
+    rendered = install_fake_pdf(monkeypatch, pages=20)
+    monkeypatch.setattr(main, "pdf_text_layer", lambda path, first, last: [])
+    install_fake_easyocr(monkeypatch)
+    monkeypatch.setattr(main, "_ENGINE", OcrEngine())
+
+    pages = main.iter_ocr_pages("sheet.pdf")
+    assert next(pages)["text"] == "zirconia"
+    pages.close()
+
+    assert len(rendered) <= main.PDF_THREADS + 1
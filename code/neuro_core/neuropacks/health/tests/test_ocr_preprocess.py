@@ -0,0 +1,82 @@
+import numpy as np
+from PIL import Image
+
+from neuro_core.neuro_ai.ocr.main import page_from_results
+from neuro_core.neuro_ai.ocr.preprocess import (
+    PreprocessCache,
+    PreprocessConfig,
+    estimate_skew,
+    estimate_text_height,
+    otsu_threshold,
+    preprocess,
+)
+
+
+def lined_page(line_height=40, lines=6, width=600):
+    """White page with dark horizontal bars standing in for text lines."""
+    page = np.full((lines * line_height * 2 + line_height, width), 240, dtype=np.uint8)
+    for i in range(lines):
+        top = line_height + i * line_height * 2
+        page[top:top + line_height, 50:width - 50] = 20
+    return page
+
+
+def test_downscale_to_target_text_height_maps_boxes_back():
+    page = lined_page(line_height=40)
+    assert estimate_text_height(page) == 40
+
+    prepared = preprocess(np.stack([page] * 3, axis=-1), PreprocessConfig(target_text_height=20))
+
+    assert prepared.image.ndim == 2
+    assert prepared.scale == 0.5
+    assert prepared.image.shape == (page.shape[0] // 2, page.shape[1] // 2)
+    box = [[10, 10], [20, 10], [20, 20], [10, 20]]
+    mapped = page_from_results([(box, "zirconia", 0.9)], prepared)
+    assert mapped["boxes"][0]["bbox"][0] == [20.0, 20.0]
+
+
+def test_small_text_is_never_upscaled_and_roi_offsets_boxes():
+    page = lined_page(line_height=10)
+    prepared = preprocess(page, PreprocessConfig(target_text_height=30, roi=("lab_sheet", "prescription")))
+
+    assert prepared.scale == 1.0
+    assert prepared.offset == (0, int(0.15 * page.shape[0]))
+    assert prepared.to_original(5, 5) == (5, 5 + prepared.offset[1])
+
+
+def test_deskew_and_binarize():
+    page = lined_page(line_height=12, lines=10)
+    skewed = np.asarray(Image.fromarray(page).rotate(-3, fillcolor=255))
+    assert abs(estimate_skew(skewed) - 3) <= 0.5
+
+    threshold = otsu_threshold(page)
+    assert 20 <= threshold < 240
+    binary = preprocess(page, PreprocessConfig(binarize=True)).image
+    assert set(np.unique(binary)) == {0, 255}
+
+
+def test_cache_reuses_and_evicts_preprocessed_pages():
+    config = PreprocessConfig(target_text_height=20)
+    first, second = lined_page(40), lined_page(40, lines=5)
+    cache = PreprocessCache(max_bytes=preprocess(first, config).image.nbytes)
+
+    a = cache.get_or_compute(first, config)
+    assert cache.get_or_compute(first.copy(), config) is a
+    cache.get_or_compute(second, config)
+    cache.get_or_compute(first, config)
+
+    assert cache.hits == 1
+    assert cache.misses == 3
+
+
+def test_deskewed_boxes_map_back_to_the_original_page():
+    page = lined_page(line_height=12, lines=10)
+    skewed = np.array(Image.fromarray(page).rotate(-3, fillcolor=255))
+    skewed[100:104, 200:204] = 0  # a mark on the skewed page, centred on (202, 102)
+
+    prepared = preprocess(skewed, PreprocessConfig(deskew=True))
+    assert prepared.angle == 3.0
+
+    ys, xs = np.nonzero(prepared.image[90:115, 190:215] == 0)
+    x, y = prepared.to_original(190 + xs.mean() + 0.5, 90 + ys.mean() + 0.5)
+    assert abs(x - 202) < 1 and abs(y - 102) < 1
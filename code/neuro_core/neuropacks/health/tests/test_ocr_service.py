@@ -0,0 +1,155 @@
+import os
+import queue
+import stat
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from neuro_core.neuro_ai.ocr.service import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    OcrClient,
+    OcrServer,
+    OcrSettingsMismatch,
+    OcrWorker,
+    default_address,
+    load_authkey,
+    service_settings,
+)
+
+BOX = [[0, 0], [1, 0], [1, 1], [0, 1]]
+
+
+class FakeEngine:
+    loaded = True
+
+    def __init__(self):
+        self.batches = []
+
+    def readtext_batch(self, images):
+        self.batches.append([int(img[0, 0]) for img in images])
+        return [[(BOX, f"page {int(img[0, 0])}", 0.9)] for img in images]
+
+
+def fake_loader(path, pages=None):
+    # "doc-<n>-<pages>": n identifies the document, pages its page count
+    _, n, count = path.rsplit("-", 2)
+    if n == "bad":
+        raise ValueError("unreadable")
+    return [np.full((4, 4), int(n) * 10 + i, dtype=np.uint8) for i in range(int(count))]
+
+
+def test_pages_from_several_documents_share_batches():
+    engine = FakeEngine()
+    worker = OcrWorker(engine, batch_size=4, batch_window=0.2, loader=fake_loader)
+    futures = [worker.submit(f"doc-{n}-2") for n in range(1, 4)]
+    worker.start()
+
+    pages = [f.result(timeout=5) for f in futures]
+    worker.stop()
+
+    assert [p["text"] for p in pages[1]] == ["page 20", "page 21"]
+    assert engine.batches == [[10, 11, 20, 21], [30, 31]]
+    stats = worker.stats()
+    assert stats["jobs_done"] == 3
+    assert stats["pages"] == 6
+    assert stats["batches"] == 2
+    assert stats["pages_per_second"] > 0
+
+
+def test_priority_order_and_failures():
+    engine = FakeEngine()
+    worker = OcrWorker(engine, batch_size=1, loader=fake_loader)
+    low = worker.submit("doc-1-1", priority=PRIORITY_LOW)
+    bad = worker.submit("doc-bad-1")
+    high = worker.submit("doc-2-1", priority=PRIORITY_HIGH)
+    worker.start()
+
+    assert high.result(timeout=5)[0]["text"] == "page 20"
+    assert low.result(timeout=5)[0]["text"] == "page 10"
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    worker.stop()
+
+    assert engine.batches == [[20], [10]]
+    assert worker.stats()["jobs_failed"] == 1
+
+
+def test_queue_is_bounded():
+    worker = OcrWorker(FakeEngine(), max_queue=2, loader=fake_loader)
+    worker.submit("doc-1-1")
+    worker.submit("doc-2-1")
+    with pytest.raises(queue.Full):
+        worker.submit("doc-3-1", timeout=0.01)
+
+
+def test_client_server_round_trip(tmp_path):
+    address = str(tmp_path / "ocr.sock")
+    server = OcrServer(OcrWorker(FakeEngine(), loader=fake_loader), address, authkey=b"test")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with OcrClient(address, authkey=b"test") as client:
+            pages = client.ocr_pages("doc-4-1")
+            assert pages[0]["boxes"][0]["text"] == "page 40"
+            with pytest.raises(RuntimeError, match="unreadable"):
+                client.ocr_pages("doc-bad-1")
+            assert client.stats()["jobs_done"] == 1
+    finally:
+        server.close()
+        thread.join(timeout=5)
+
+
+def test_settings_mismatch_is_refused(tmp_path):
+    address = str(tmp_path / "ocr.sock")
+    server = OcrServer(OcrWorker(FakeEngine(), loader=fake_loader), address, authkey=b"test")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with OcrClient(address, authkey=b"test") as client:
+            other_dpi = {**service_settings(), "dpi": 600}
+            with pytest.raises(OcrSettingsMismatch):
+                client.ocr_pages("doc-4-1", settings=other_dpi)
+            assert client.stats()["jobs_submitted"] == 0
+    finally:
+        server.close()
+        thread.join(timeout=5)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+def test_default_key_and_socket_are_private(tmp_path, monkeypatch):
+    monkeypatch.delenv("NEURO_OCR_AUTHKEY", raising=False)
+    monkeypatch.delenv("NEURO_OCR_SERVICE", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+    key = load_authkey()
+    assert len(key) == 64 and load_authkey() == key
+    directory = os.path.dirname(default_address())
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(os.path.join(directory, "authkey")).st_mode) == 0o600
+
+    os.chmod(directory, 0o755)  # e.g. planted by another user
+    with pytest.raises(PermissionError):
+        load_authkey()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix sockets")
+def test_server_only_replaces_its_own_stale_socket(tmp_path):
+    address = tmp_path / "ocr.sock"
+    address.write_text("not a socket")
+
+    with pytest.raises(FileExistsError):
+        OcrServer(OcrWorker(FakeEngine(), loader=fake_loader), str(address), authkey=b"test")
+    assert address.read_text() == "not a socket"
+
+
+def test_client_without_a_service_creates_nothing(tmp_path, monkeypatch):
+    monkeypatch.delenv("NEURO_OCR_AUTHKEY", raising=False)
+    monkeypatch.delenv("NEURO_OCR_SERVICE", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+    with pytest.raises(FileNotFoundError):
+        OcrClient()
+    assert list(tmp_path.iterdir()) == []  # no runtime directory, no key file
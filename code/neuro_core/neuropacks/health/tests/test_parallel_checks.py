@@ -0,0 +1,68 @@
+import sqlite3
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.checks.feature1_lab_no_billing import run_feature1_lab_no_billing
+from neuro_core.neuropacks.health.protocheck.checks.parallel import partition_ids, run_partitioned
+from neuro_core.neuropacks.health.protocheck.checks.validations import (
+    INSURANCE_ORDER_COLUMNS,
+    validate_insurance_coverage,
+)
+from neuro_core.neuropacks.health.protocheck.core.schema import DDL
+from neuro_core.neuropacks.health.tests.test_feature1_engine import _populate_random
+
+
+def test_partition_ids_are_stable_and_in_range():
+    ids = pd.Series([f"P{i}" for i in range(1_000)])
+    parts = partition_ids(ids, 4)
+
+    assert set(np.unique(parts)) == {0, 1, 2, 3}
+    assert (partition_ids(ids, 4) == parts).all()
+    assert (partition_ids(ids.iloc[::-1], 4) == parts[::-1]).all()
+
+
+def test_parallel_insurance_coverage_matches_serial():
+    rng = np.random.default_rng(0)
+    patients = [f"P{i:04d}" for i in range(300)]
+    quotes_df = pd.DataFrame({
+        "quote_id": [f"Q{i}" for i in range(600)],
+        "patient_id": rng.choice(patients, 600),
+        "status": rng.choice(["accepted", "proposed", "deleted"], 600),
+    })
+    invoices_df = pd.DataFrame({
+        "invoice_no": [f"INV{i}" for i in range(600)],
+        "patient_id": rng.choice(patients, 600),
+        "fse_no": None,
+    })
+    scans_df = pd.DataFrame({
+        "patient_id": rng.choice(patients, 500),
+        "doc_type": rng.choice(["insurance_card", "pec", "insurance_claim", "lab_sheet"], 500),
+        "file_path": "scan.pdf",
+        "date": "2024-01-01",
+    })
+
+    serial = validate_insurance_coverage(quotes_df, invoices_df, scans_df)
+    parallel = run_partitioned(
+        validate_insurance_coverage, [quotes_df, invoices_df, scans_df], workers=3,
+        order_by=INSURANCE_ORDER_COLUMNS, with_order=True,
+    )
+
+    assert not serial.empty
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_parallel_feature1_matches_serial():
+    conn = sqlite3.connect(":memory:")
+    for stmt in DDL:
+        conn.execute(stmt)
+    conn.execute("INSERT INTO ccam_prosthetics (code, label, is_prosthetic) VALUES ('HBMD001', 'Crown', 1)")
+    _populate_random(conn, n_patients=200, n_sheets=400, n_invoices=2_000, n_deleted=200, seed=4)
+
+    serial = run_feature1_lab_no_billing(conn, date(2023, 1, 1), date(2023, 12, 31), workers=1)
+    parallel = run_feature1_lab_no_billing(conn, date(2023, 1, 1), date(2023, 12, 31), workers=2)
+    conn.close()
+
+    assert not serial.empty
+    pd.testing.assert_frame_equal(parallel, serial)
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.core.schema import init_db
+from neuro_core.neuropacks.health.protocheck.core.utils import prosthetics_filter
+from neuro_core.neuropacks.health.protocheck.core.utils.prosthetics_filter import (
+    filter_prosthetics,
+    prosthetic_codes,
+)
+from neuro_core.neuropacks.health.protocheck.ingesters.ccam import bulk_upsert_ccam
+
+
+def ccam(*codes):
+    return pd.DataFrame({"code": codes, "label": "Crown", "is_prosthetic": 1, "materials": "", "basket": ""})
+
+
+def test_codes_are_cached_until_ccam_changes(tmp_path, monkeypatch):
+    db = init_db(str(tmp_path / "protocheck.db"))
+    bulk_upsert_ccam(ccam("HBLD036", "HBLD040"), db)
+    acts = pd.DataFrame({"code": ["HBLD036", "HBQK002", "HBLD040", "HBLD099"]})
+
+    connects = []
+    real_connect = sqlite3.connect
+
+    def counting_connect(*args, **kwargs):
+        connects.append(args)
+        return real_connect(*args, **kwargs)
+
+    monkeypatch.setattr(prosthetics_filter.sqlite3, "connect", counting_connect)
+
+    assert filter_prosthetics(acts, db)["code"].tolist() == ["HBLD036", "HBLD040"]
+    assert filter_prosthetics(acts, db)["code"].tolist() == ["HBLD036", "HBLD040"]
+    assert prosthetic_codes(db) == frozenset({"HBLD036", "HBLD040"})
+    assert len(connects) == 1
+
+    bulk_upsert_ccam(ccam("HBLD036", "HBLD040"), db)  # unchanged reference: cache kept
+    assert filter_prosthetics(acts, db)["code"].tolist() == ["HBLD036", "HBLD040"]
+    assert len(connects) == 2  # only bulk_upsert_ccam's own connection
+
+    bulk_upsert_ccam(ccam("HBLD099"), db)
+    assert filter_prosthetics(acts, db)["code"].tolist() == ["HBLD036", "HBLD040", "HBLD099"]
+
+
+def test_codes_written_by_another_connection_are_seen(tmp_path):
+    db = init_db(str(tmp_path / "protocheck.db"))
+    bulk_upsert_ccam(ccam("HBLD036"), db)
+    assert prosthetic_codes(db) == frozenset({"HBLD036"})
+
+    # As another process would: no invalidate_prosthetic_codes in this process
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO ccam_prosthetics (code, is_prosthetic) VALUES ('HBLD040', 1)")
+    assert prosthetic_codes(db) == frozenset({"HBLD036", "HBLD040"})
+    acts = pd.DataFrame({"code": ["HBLD040", "HBQK002"]})
+    assert filter_prosthetics(acts, db)["code"].tolist() == ["HBLD040"]
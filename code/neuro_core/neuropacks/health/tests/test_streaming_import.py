@@ -0,0 +1,92 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from neuro_core.neuropacks.health.protocheck.core.schema import init_db
+from neuro_core.neuropacks.health.protocheck.ingesters.deleted import stream_deleted_from_file
+from neuro_core.neuropacks.health.protocheck.ingesters.invoices import EXPECTED_COLUMNS, stream_invoices_from_file
+from neuro_core.neuropacks.health.protocheck.ingesters.streaming import normalize_columns
+
+
+def make_db(tmp_path):
+    db = init_db(str(tmp_path / "protocheck.db"))
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO ccam_prosthetics (code, is_prosthetic) VALUES ('HBLD036', 1)")
+    return db
+
+
+def test_invoices_stream_in_committed_chunks(tmp_path):
+    db = make_db(tmp_path)
+    n = 1000
+    csv = tmp_path / "invoices.csv"
+    pd.DataFrame({
+        "Invoice_No ": [f"F{i}" for i in range(n)], "date": "2024-01-10",
+        "patient_id": [f"P{i % 50}" for i in range(n)],
+        "patient_name": "Doe", "doctor_id": "D1", "doctor_name": "Dr X",
+        "code": ["HBLD036" if i % 2 else "HBQK002" for i in range(n)],  # every other act is not prosthetic
+        "qty": 1, "amount": 100.0, "fse_no": "", "source_file": "invoices.csv",
+    }).to_csv(csv, index=False)
+
+    stored_per_chunk = []
+
+    def on_progress(progress):
+        with sqlite3.connect(db) as conn:
+            stored_per_chunk.append(conn.execute("SELECT COUNT(*) FROM invoices").fetchone()[0])
+
+    result = stream_invoices_from_file(str(csv), db_path=db, chunksize=100, on_progress=on_progress)
+
+    assert stored_per_chunk == list(range(50, 501, 50))  # each chunk is committed before the next is read
+    assert (result["rows"], result["kept"], result["inserted"]) == (1000, 500, 500)
+    assert result["rows_per_second"] > 0
+
+    again = stream_invoices_from_file(str(csv), db_path=db, chunksize=300)
+    assert (again["inserted"], again["unchanged"]) == (0, 500)
+
+
+def test_deleted_stream_rejects_missing_columns(tmp_path):
+    db = make_db(tmp_path)
+    csv = tmp_path / "deleted.csv"
+    pd.DataFrame({"date": ["2024-01-01"], "code": ["HBLD036"]}).to_csv(csv, index=False)
+
+    try:
+        stream_deleted_from_file(str(csv), db_path=db)
+    except ValueError as e:
+        assert "Missing columns in deleted acts file" in str(e)
+    else:
+        raise AssertionError("expected a ValueError")
+
+
+def invoice_rows(n):
+    return pd.DataFrame({
+        "invoice_no": [f"F{i}" for i in range(n)],
+        "date": [datetime(2024, 1, 1 + i % 28, 9, 30) for i in range(n)],
+        "patient_id": "P1", "patient_name": "Doe", "doctor_id": "D1", "doctor_name": "Dr X",
+        "code": "HBLD036", "qty": 1, "amount": 100.0, "fse_no": "", "source_file": "invoices.xlsx",
+    })
+
+
+def test_date_columns_are_normalized_to_text():
+    chunk = invoice_rows(3).astype({"date": object})
+    chunk.loc[2, "date"] = None
+
+    df = normalize_columns(chunk, EXPECTED_COLUMNS, "invoice")
+
+    assert df["date"].tolist()[:2] == ["2024-01-01", "2024-01-02"]
+    assert pd.isna(df["date"].iloc[2])
+
+
+def test_xlsx_invoices_stream_with_datetime_cells(tmp_path):
+    pytest.importorskip("openpyxl")
+    db = make_db(tmp_path)
+    xlsx = tmp_path / "invoices.xlsx"
+    invoice_rows(250).to_excel(xlsx, index=False)
+
+    result = stream_invoices_from_file(str(xlsx), db_path=db, chunksize=100)
+    assert (result["rows"], result["inserted"]) == (250, 250)
+    again = stream_invoices_from_file(str(xlsx), db_path=db, chunksize=100)
+    assert (again["inserted"], again["unchanged"]) == (0, 250)
+    with sqlite3.connect(db) as conn:
+        dates = conn.execute("SELECT DISTINCT date FROM invoices ORDER BY date").fetchall()
+    assert dates[0] == ("2024-01-01",) and len(dates) == 28
@@ -0,0 +1,118 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from neuro_core.neuropacks.health.protocheck.core.schema import ensure_schema
+from neuro_core.neuropacks.health.protocheck.ingesters.deleted import upsert_deleted_acts
+from neuro_core.neuropacks.health.protocheck.ingesters.invoices import upsert_invoices
+from neuro_core.neuropacks.health.protocheck.ingesters.quotes import upsert_quotes
+from neuro_core.neuropacks.health.protocheck.ingesters.scans import upsert_scans
+
+
+def invoices(amounts):
+    return pd.DataFrame({
+        "invoice_no": [f"F{i}" for i in range(len(amounts))],
+        "date": "2024-01-10", "patient_id": "P1", "patient_name": "Doe", "doctor_id": "D1",
+        "doctor_name": "Dr X", "code": "HBLD036", "qty": 1, "amount": amounts, "fse_no": "",
+        "source_file": "invoices.csv",
+    })
+
+
+def test_keyed_reimport_is_idempotent_and_replaces_changed_rows(tmp_path):
+    db = str(tmp_path / "protocheck.db")
+
+    assert upsert_invoices(invoices([100, 200, 300]), db) == {"inserted": 3, "updated": 0, "unchanged": 0}
+    with sqlite3.connect(db) as conn:
+        rowids = dict(conn.execute("SELECT invoice_no, rowid FROM invoices"))
+
+    assert upsert_invoices(invoices([100.0, 250, 300, 400]), db) == {"inserted": 1, "updated": 1, "unchanged": 2}
+    with sqlite3.connect(db) as conn:
+        rows = dict(conn.execute("SELECT invoice_no, amount FROM invoices"))
+        new_rowids = dict(conn.execute("SELECT invoice_no, rowid FROM invoices"))
+    assert rows == {"F0": 100.0, "F1": 250.0, "F2": 300.0, "F3": 400.0}
+    assert new_rowids["F0"] == rowids["F0"]
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT patient_id FROM patient_changes").fetchall() == [("P1",)]
+
+    quotes = pd.DataFrame({"quote_id": ["q1", "q1"], "status": ["proposed", "deleted"], "date": "2024-01-01",
+                           "patient_id": "P1", "doctor_id": "D1", "code": "HBLD036", "amount": "120",
+                           "source_file": "q.csv"})
+    assert upsert_quotes(quotes, db) == {"inserted": 1, "updated": 0, "unchanged": 0}  # last row wins
+    assert upsert_quotes(quotes, db)["unchanged"] == 1
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT status, amount FROM quotes").fetchall() == [("deleted", 120.0)]
+
+
+def test_unkeyed_tables_are_deduplicated_on_content(tmp_path):
+    db = str(tmp_path / "protocheck.db")
+    deleted = pd.DataFrame({
+        "date": ["2024-01-01", "2024-01-02", "2024-01-02"], "patient_id": "P1", "patient_name": "Doe",
+        "doctor_id": "D1", "doctor_name": "Dr X", "code": "HBLD036", "label": "Crown", "amount": [80, 90, 90],
+        "source_file": "deleted.csv",
+    })
+
+    assert upsert_deleted_acts(deleted, db) == {"inserted": 2, "updated": 0, "unchanged": 1}
+    again = upsert_deleted_acts(deleted.assign(source_file="deleted_march.csv", amount=[80.0, 90.0, 90.0]), db)
+    assert again == {"inserted": 0, "updated": 0, "unchanged": 3}
+
+    scans = pd.DataFrame({"patient_id": ["P1", "P2"], "doc_type": "lab_sheet",
+                          "file_path": ["a.pdf", "b.pdf"], "date": "2024-01-01"})
+    with sqlite3.connect(db) as conn:
+        ensure_schema(conn)
+        # Rows loaded before row_hash existed, including a duplicate
+        conn.executemany("INSERT INTO scans (patient_id, doc_type, file_path, date) VALUES (?, ?, ?, ?)",
+                         [("P1", "lab_sheet", "a.pdf", "2024-01-01")] * 2)
+    assert upsert_scans(scans, db) == {"inserted": 1, "updated": 0, "unchanged": 1}
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*), COUNT(row_hash) FROM scans").fetchone() == (2, 2)
+        assert conn.execute("SELECT COUNT(*) FROM deleted_acts").fetchone() == (2,)
+
+
+def test_datetime_columns_are_stored_as_date_text(tmp_path):
+    db = str(tmp_path / "protocheck.db")
+    df = invoices([100, 200, 300])
+    # What read_excel yields: a datetime64 column with NaT, or Timestamps in an object column
+    df["date"] = pd.to_datetime(["2024-01-10", "2024-01-11", None])
+    assert upsert_invoices(df, db) == {"inserted": 3, "updated": 0, "unchanged": 0}
+
+    mixed = df.assign(date=pd.Series([pd.Timestamp("2024-01-10"), "2024-01-11", None], dtype=object))
+    assert upsert_invoices(mixed, db) == {"inserted": 0, "updated": 0, "unchanged": 3}
+    with sqlite3.connect(db) as conn:
+        stored = conn.execute("SELECT invoice_no, date FROM invoices ORDER BY invoice_no").fetchall()
+    assert stored == [("F0", "2024-01-10"), ("F1", "2024-01-11"), ("F2", None)]
+
+
+def test_xlsx_invoices_import(tmp_path):
+    pytest.importorskip("openpyxl")
+    from neuro_core.neuropacks.health.protocheck.ingesters.invoices import load_invoices_from_file
+
+    path = str(tmp_path / "invoices.xlsx")
+    invoices([100, 200]).assign(date=pd.to_datetime(["2024-01-10", "2024-02-01"])).to_excel(path, index=False)
+    db = str(tmp_path / "protocheck.db")
+
+    assert upsert_invoices(load_invoices_from_file(path), db)["inserted"] == 2
+    assert upsert_invoices(load_invoices_from_file(path), db)["unchanged"] == 2
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT date FROM invoices ORDER BY invoice_no").fetchall() == [
+            ("2024-01-10",), ("2024-02-01",),
+        ]
+
+
+def test_rows_with_null_keys_are_kept_and_not_duplicated(tmp_path):
+    db = str(tmp_path / "protocheck.db")
+    df = invoices([100, 200, 300, 300])
+    df["invoice_no"] = ["F0", None, None, None]  # FSE-only lines; the last one repeats the third
+    df["fse_no"] = ["", "FSE1", "FSE2", "FSE2"]
+
+    assert upsert_invoices(df, db) == {"inserted": 3, "updated": 0, "unchanged": 1}
+    assert upsert_invoices(df, db) == {"inserted": 0, "updated": 0, "unchanged": 4}
+    with sqlite3.connect(db) as conn:
+        # A NULL-key row written by an older version (no row_hash) is matched too
+        conn.execute("INSERT INTO invoices (invoice_no, code, amount, fse_no) VALUES (NULL, 'HBLD036', 50, 'FSE3')")
+    legacy = df.iloc[:1].assign(invoice_no=None, date=None, patient_id=None, patient_name=None, doctor_id=None,
+                                doctor_name=None, qty=None, amount=50, fse_no="FSE3")
+    assert upsert_invoices(legacy, db) == {"inserted": 0, "updated": 0, "unchanged": 1}
+    with sqlite3.connect(db) as conn:
+        rows = conn.execute("SELECT fse_no, amount FROM invoices WHERE invoice_no IS NULL ORDER BY fse_no").fetchall()
+    assert rows == [("FSE1", 200.0), ("FSE2", 300.0), ("FSE3", 50.0)]
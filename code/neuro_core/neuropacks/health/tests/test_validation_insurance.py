@@ -26,3 +26,73 @@ def test_missing_insurance_docs():
     assert not result.empty
     assert result.iloc[0]["flag"] == "INSURANCE_DOC_MISSING"
     assert "pec_or_claim" in result.iloc[0]["missing_type"]
+
+
+def _reference_insurance_coverage(quotes_df, invoices_df, scans_df):
+    """The original row-by-row implementation."""
+    grouped = scans_df.groupby(["patient_id", "doc_type"])
+    records = pd.concat([quotes_df[quotes_df["status"] == "accepted"], invoices_df], ignore_index=True)
+    results = []
+    for _, row in records.iterrows():
+        pid = row["patient_id"]
+        missing = []
+        if (pid, "insurance_card") not in grouped.groups:
+            missing.append("insurance_card")
+        if not ((pid, "pec") in grouped.groups or (pid, "insurance_claim") in grouped.groups):
+            missing.append("pec_or_claim")
+        if missing:
+            results.append({
+                "patient_id": pid,
+                "quote_id": row.get("quote_id", ""),
+                "invoice_id": row.get("invoice_no") or row.get("fse_no") or "",
+                "missing_type": ",".join(missing),
+                "flag": "INSURANCE_DOC_MISSING",
+            })
+    return pd.DataFrame(results)
+
+
+def _random_frames(n_quotes, n_invoices, n_scans, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    patients = np.array([f"P{i:05d}" for i in range(max(10, n_invoices // 10))], dtype=object)
+    quotes_df = pd.DataFrame({
+        "quote_id": [f"Q{i}" for i in range(n_quotes)],
+        "patient_id": rng.choice(patients, n_quotes),
+        "status": rng.choice(["accepted", "proposed", "deleted"], n_quotes),
+    })
+    invoice_no = np.array([f"INV{i}" for i in range(n_invoices)], dtype=object)
+    invoice_no[rng.random(n_invoices) < 0.3] = None
+    fse_no = np.array([f"FSE{i}" for i in range(n_invoices)], dtype=object)
+    fse_no[rng.random(n_invoices) < 0.5] = ""
+    invoices_df = pd.DataFrame({
+        "invoice_no": invoice_no,
+        "patient_id": rng.choice(patients, n_invoices),
+        "fse_no": fse_no,
+    })
+    scans_df = pd.DataFrame({
+        "patient_id": rng.choice(patients, n_scans),
+        "doc_type": rng.choice(["insurance_card", "pec", "insurance_claim", "lab_sheet"], n_scans),
+    })
+    return quotes_df, invoices_df, scans_df
+
+
+def test_vectorized_coverage_matches_row_by_row():
+    frames = _random_frames(400, 800, 300, seed=1)
+    expected = _reference_insurance_coverage(*frames)
+    result = validate_insurance_coverage(*frames)
+
+    assert len(result) > 0
+    pd.testing.assert_frame_equal(result.astype(str), expected.astype(str))
+
+
+def test_coverage_scales_to_a_million_invoices():
+    import time
+
+    frames = _random_frames(100_000, 1_000_000, 200_000, seed=2)
+    started = time.perf_counter()
+    result = validate_insurance_coverage(*frames)
+    elapsed = time.perf_counter() - started
+
+    assert len(result) > 0
+    assert elapsed < 10, f"{elapsed:.1f}s"
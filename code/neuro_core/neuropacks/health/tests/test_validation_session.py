@@ -0,0 +1,131 @@
+import sqlite3
+
+import pandas as pd
+
+from neuro_core.neuropacks.health.protocheck.checks import session as session_module
+from neuro_core.neuropacks.health.protocheck.checks.session import Check, ValidationSession
+from neuro_core.neuropacks.health.protocheck.core.doc_index import rebuild_patient_documents
+from neuro_core.neuropacks.health.protocheck.core.schema import ensure_schema
+from neuro_core.neuropacks.health.protocheck.ingesters.scans import upsert_scans
+
+
+def make_db(tmp_path):
+    db = tmp_path / "protocheck.db"
+    with sqlite3.connect(db) as conn:
+        ensure_schema(conn)
+        conn.executemany(
+            "INSERT INTO quotes (quote_id, status, date, patient_id, doctor_id, code, declared_material, tooth_number) "
+            "VALUES (?, ?, ?, ?, 'D1', 'HBLD036', ?, '24')",
+            [("q1", "deleted", "2024-01-01", "P1", "zirconia"),
+             ("q2", "accepted", "2024-02-01", "P1", "zirconia"),
+             ("q3", "accepted", "2024-02-01", "P2", "resin")],
+        )
+        conn.executemany(
+            "INSERT INTO scans (patient_id, doc_type, file_path, date) VALUES (?, ?, ?, '2024-01-15')",
+            [("P1", "lab_sheet", "/s/p1.pdf"), ("P1", "insurance_card", "/s/c1.pdf"), ("P1", "pec", "/s/pec1.pdf"),
+             ("P2", "lab_sheet", "/s/p2.pdf")],
+        )
+        conn.execute("INSERT INTO lab_sheet_fields (file_path, material) VALUES ('/s/p2.pdf', 'zirconia')")
+        conn.execute("INSERT INTO ccam_prosthetics (code, is_prosthetic) VALUES ('HBLD036', 1)")
+        conn.execute("INSERT INTO deleted_acts (date, patient_id, code) VALUES ('2024-03-01', 'P2', 'HBLD036')")
+        rebuild_patient_documents(conn)
+    return db
+
+
+def test_session_reads_each_table_once_and_combines_findings(tmp_path, monkeypatch):
+    db = make_db(tmp_path)
+    queries = []
+    read_sql_query = pd.read_sql_query
+
+    def counting_read(sql, conn, *args, **kwargs):
+        queries.append(sql)
+        return read_sql_query(sql, conn, *args, **kwargs)
+
+    monkeypatch.setattr(session_module.pd, "read_sql_query", counting_read)
+
+    session = ValidationSession(db, workers=4)
+    findings = session.run()
+
+    assert sorted(q.split(" FROM ")[1] for q in queries) == [
+        "deleted_acts", "invoices", "lab_sheet_fields", "patient_documents", "quotes", "scans",
+    ]
+    assert "SELECT quote_id, status, patient_id, declared_material FROM quotes" in queries
+    assert findings.groupby("check").size().to_dict() == {
+        "deleted_quote_flow": 1,
+        "duplicate_quotes_after_deletion": 1,
+        "material_mismatch": 1,
+        "insurance_coverage": 1,  # P2 has neither card nor PEC
+        "deleted_prosthetic_invoices": 1,
+    }
+    assert list(findings["check"].drop_duplicates()) == [c.name for c in session.checks]
+    assert set(session.timings) == {"snapshot"} | {c.name for c in session.checks}
+
+
+def test_registered_check_gets_shared_frames(tmp_path):
+    db = make_db(tmp_path)
+    seen = []
+
+    def count_lab_sheets(scans_df):
+        seen.append(scans_df)
+        return pd.DataFrame({"patient_id": scans_df["patient_id"].unique(), "flag": "SEEN"})
+
+    session = ValidationSession(db, checks=[
+        Check("first", count_lab_sheets, {"scans_df": ("scans", ("patient_id",))}),
+        Check("second", count_lab_sheets, {"scans_df": ("scans", ("patient_id", "doc_type"))}),
+    ], workers=1)
+    findings = session.run()
+
+    assert seen[0] is seen[1] is session.frames["scans"]
+    assert list(seen[0].columns) == ["patient_id", "doc_type"]
+    assert list(findings.columns) == ["check", "patient_id", "flag"]
+    assert len(findings) == 4
+
+
+def test_session_stores_findings_between_runs(tmp_path):
+    db = make_db(tmp_path)
+    first = ValidationSession(db)
+    first.run()
+    assert first.diff == {"new": 5, "persisting": 0, "resolved": 0}
+
+    upsert_scans(pd.DataFrame({
+        "patient_id": ["P2", "P2"], "doc_type": ["insurance_card", "pec"],
+        "file_path": ["/s/c2.pdf", "/s/pec2.pdf"], "date": ["2024-03-01", "2024-03-01"],
+    }), db_path=db)
+    second = ValidationSession(db)
+    second.run()
+    assert second.diff == {"new": 0, "persisting": 4, "resolved": 1}
+
+
+def test_insurance_check_reads_the_persisted_document_index(tmp_path):
+    db = make_db(tmp_path)
+    with sqlite3.connect(db) as conn:
+        # The stored index is authoritative; scans is not re-aggregated per run
+        conn.execute("UPDATE patient_documents SET doc_mask = (SELECT doc_mask FROM patient_documents "
+                     "WHERE patient_id = 'P1') WHERE patient_id = 'P2'")
+
+    session = ValidationSession(db, checks=[c for c in session_module.DEFAULT_CHECKS if c.name == "insurance_coverage"])
+    findings = session.run()
+
+    assert "scans" not in session.frames
+    assert findings.empty
+
+
+def test_sql_checks_run_inside_the_snapshot_transaction(tmp_path):
+    db = make_db(tmp_path)
+    seen = []
+
+    def probe(conn):
+        seen.append(conn.in_transaction)
+        return pd.DataFrame({"quotes": [conn.execute("SELECT COUNT(*) FROM quotes").fetchone()[0]]})
+
+    session = ValidationSession(db, checks=[
+        Check("probe", probe, uses_db=True),
+        Check("frames", lambda quotes_df: pd.DataFrame({"quotes": [len(quotes_df)]}),
+              {"quotes_df": ("quotes", ("quote_id",))}),
+    ], workers=2)
+    findings = session.run()
+
+    assert seen == [True]
+    assert findings["check"].tolist() == ["probe", "frames"]
+    assert findings["quotes"].tolist() == [3, 3]
+    assert set(session.timings) == {"snapshot", "probe", "frames"}
@@ -1,15 +1,20 @@
 import pytest
 import sqlite3
-from neuro_core.neuropacks.health.protocheck.core.schema import DDL
-from neuro_core.neuropacks.health.protocheck.checks.validations import validate_deleted_quote_flow
+from neuro_core.neuropacks.health.protocheck.core.schema import DDL, INDEXES
+from neuro_core.neuropacks.health.protocheck.checks.validations import (
+    DUPLICATE_QUOTES_SQL,
+    iter_deleted_quote_flow,
+    validate_deleted_quote_flow,
+    validate_duplicate_quotes_after_deletion,
+)
 
 @pytest.fixture
 def in_memory_db():
     conn = sqlite3.connect(":memory:")
 
-    # Apply schema
+    # Apply schema (tables and indexes, as init_db and the ingesters create them)
     cur = conn.cursor()
-    for stmt in DDL:
+    for stmt in DDL + INDEXES:
         cur.execute(stmt)
     conn.commit()
 
@@ -22,13 +27,11 @@ def test_validate_deleted_quote_flow_missing_invoice(monkeypatch, in_memory_db):
 
     # Insert test data: deleted quote and lab scan, but no invoice
     in_memory_db.execute("""
-        INSERT INTO quotes VALUES (
-            'q1', 'deleted', '2024-01-01', 'P001', 'D001',
-            'HBMD001', 120.0, 'Ceramic', 'source.csv'
-        );
+        INSERT INTO quotes (quote_id, status, date, patient_id, doctor_id, code, amount, declared_material, source_file)
+        VALUES ('q1', 'deleted', '2024-01-01', 'P001', 'D001', 'HBMD001', 120.0, 'Ceramic', 'source.csv');
     """)
     in_memory_db.execute("""
-        INSERT INTO scans VALUES (
+        INSERT INTO scans (patient_id, doc_type, file_path, date) VALUES (
             'P001', 'lab_sheet', '/path/to/scan.pdf', '2024-01-01'
         );
     """)
@@ -43,13 +46,11 @@ def test_validate_deleted_quote_flow_with_invoice(monkeypatch, in_memory_db):
 
     # Insert test data: deleted quote and matching invoice
     in_memory_db.execute("""
-        INSERT INTO quotes VALUES (
-            'q1', 'deleted', '2024-01-01', 'P001', 'D001',
-            'HBMD001', 120.0, 'Ceramic', 'source.csv'
-        );
+        INSERT INTO quotes (quote_id, status, date, patient_id, doctor_id, code, amount, declared_material, source_file)
+        VALUES ('q1', 'deleted', '2024-01-01', 'P001', 'D001', 'HBMD001', 120.0, 'Ceramic', 'source.csv');
     """)
     in_memory_db.execute("""
-        INSERT INTO scans VALUES (
+        INSERT INTO scans (patient_id, doc_type, file_path, date) VALUES (
             'P001', 'lab_sheet', '/path/to/scan.pdf', '2024-01-01'
         );
     """)
@@ -63,3 +64,89 @@ def test_validate_deleted_quote_flow_with_invoice(monkeypatch, in_memory_db):
 
     results = validate_deleted_quote_flow()
     assert any(r["flag"] == "OK_REPLACED" for r in results)
+
+
+def test_validate_deleted_quote_flow_one_row_per_quote(monkeypatch, in_memory_db):
+    monkeypatch.setattr("sqlite3.connect", lambda _: in_memory_db)
+
+    in_memory_db.executemany(
+        "INSERT INTO quotes (quote_id, status, date, patient_id, doctor_id, code) VALUES (?, ?, ?, ?, ?, ?)",
+        [("q1", "deleted", "2024-01-01", "P001", "D001", "HBMD001"),
+         ("q2", "deleted", "2024-01-05", "P001", "D001", "HBLD036"),
+         ("q3", "accepted", "2024-01-06", "P001", "D001", "HBMD001")],
+    )
+    in_memory_db.executemany(
+        "INSERT INTO scans (patient_id, doc_type, file_path, date) VALUES ('P001', 'lab_sheet', ?, ?)",
+        [(f"/scans/{n}.pdf", f"2024-01-{n:02d}") for n in range(1, 6)],
+    )
+    in_memory_db.executemany(
+        "INSERT INTO invoices (invoice_no, date, patient_id, code, fse_no) VALUES (?, ?, 'P001', 'HBMD001', ?)",
+        [(f"INV{n}", f"2024-02-{n:02d}", None) for n in range(1, 10)] + [("", "2024-03-01", "")],
+    )
+    in_memory_db.commit()
+
+    results = validate_deleted_quote_flow()
+    assert [(r["quote_id"], r["flag"]) for r in results] == [
+        ("q1", "OK_REPLACED"), ("q2", "QUOTE_DELETED_NO_INVOICE"),
+    ]
+    assert results[0]["scan_path"] == "/scans/5.pdf"
+    assert (results[0]["invoice_no"], results[0]["invoice_date"]) == ("INV9", "2024-02-09")
+    assert results[1]["invoice_no"] is None
+    assert list(iter_deleted_quote_flow(batch_size=1)) == results
+
+
+def test_duplicate_quotes_after_deletion_respects_time_order(monkeypatch, in_memory_db):
+    monkeypatch.setattr("sqlite3.connect", lambda _: in_memory_db)
+
+    in_memory_db.executemany(
+        "INSERT INTO quotes (quote_id, status, date, patient_id, doctor_id, code, declared_material, tooth_number) "
+        "VALUES (?, ?, ?, 'P001', 'D001', 'HBLD036', ?, ?)",
+        [("q0", "proposed", "2024-01-01", "zirconia", "24"),   # before any deletion
+         ("q1", "deleted", "2024-01-02", "zirconia", "24"),
+         ("q2", "deleted", "2024-02-01", "zirconia", "24"),
+         ("q3", "proposed", "2024-02-01", "zirconia", "24"),   # same day as the q2 deletion
+         ("q4", "accepted", "2024-03-01", "zirconia", "24"),
+         ("q5", "proposed", "2024-03-01", "resin", "24"),      # different material
+         ("q6", "deleted", "2024-01-01", "zirconia", None),
+         ("q7", "accepted", "2024-02-01", "zirconia", None)],  # no tooth: not comparable
+    )
+    in_memory_db.commit()
+
+    results = validate_duplicate_quotes_after_deletion()
+    assert [(r["quote_id"], r["deleted_quote_id"], r["deleted_quote_date"]) for r in results] == [
+        ("q3", "q2", "2024-02-01"), ("q4", "q2", "2024-02-01"),
+    ]
+    assert {r["flag"] for r in results} == {"RECREATED_QUOTE_AFTER_DELETION"}
+
+
+def test_deleted_quote_flow_does_not_create_indexes(tmp_path):
+    db = tmp_path / "protocheck.db"
+    with sqlite3.connect(db) as conn:
+        for stmt in DDL:
+            conn.execute(stmt)
+
+    assert list(iter_deleted_quote_flow(db)) == []
+    with sqlite3.connect(db) as conn:
+        created = conn.execute("SELECT name FROM sqlite_master WHERE name = 'idx_quotes_status'").fetchall()
+    assert created == []
+
+
+def test_duplicate_quotes_run_without_the_support_indexes(tmp_path):
+    db = tmp_path / "protocheck.db"
+    with sqlite3.connect(db) as conn:
+        for stmt in DDL:  # a database from an earlier version: tables only
+            conn.execute(stmt)
+        conn.executemany(
+            "INSERT INTO quotes (quote_id, status, date, patient_id, doctor_id, code, declared_material, tooth_number) "
+            "VALUES (?, ?, ?, 'P001', 'D001', 'HBLD036', 'zirconia', '24')",
+            [("q1", "deleted", "2024-01-02"), ("q2", "proposed", "2024-02-01")],
+        )
+
+    results = validate_duplicate_quotes_after_deletion(db)
+    assert [(r["quote_id"], r["deleted_quote_id"]) for r in results] == [("q2", "q1")]
+
+
+def test_duplicate_quotes_use_the_partition_index_when_present(in_memory_db):
+    plan = " | ".join(row[3] for row in in_memory_db.execute("EXPLAIN QUERY PLAN " + DUPLICATE_QUOTES_SQL))
+    assert "idx_quotes_partition_date" in plan
+    assert "TEMP B-TREE" not in plan